@@ -0,0 +1,147 @@
+"""
+成就规则引擎
+成就用数据声明自己关心的游戏事件（event）、事件需满足的条件（where）和计数目标（target），
+连续类成就用 reset_on 声明哪些事件会把计数清零
+
+引擎按事件类型建立 事件 -> 规则 的索引，并为每条规则维护增量计数：
+一个事件只处理订阅了它的规则，已解锁的规则从索引中移除，成就再多也不用逐帧扫描
+"""
+import operator
+
+# ========== 游戏事件 ==========
+ROUND_STARTED = "round_started"  # difficulty, used_items
+ROUND_WON = "round_won"  # difficulty, reason, elapsed_ms, used_items
+ROUND_LOST = "round_lost"  # difficulty, elapsed_ms, used_items
+BALL_ABSORBED = "ball_absorbed"  # count：本步进洞的彩球数
+NEAR_MISS = "near_miss"  # count：本步擦身而过的彩球数
+ITEM_BOUGHT = "item_bought"  # item
+ITEM_USED = "item_used"
+
+# where 条件中 (运算符, 值) 形式支持的运算符
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "!=": operator.ne,
+    "in": lambda value, options: value in options,
+}
+
+
+class Rule:
+    """一条成就规则"""
+
+    __slots__ = ("id", "event", "target", "where", "amount", "reset_on")
+
+    def __init__(self, rule_id, event, target=1, where=None, amount=None, reset_on=()):
+        """
+        Args:
+            rule_id: 规则 ID（与成就 ID 相同）
+            event: 计数的事件类型
+            target: 计数达到多少时解锁
+            where: 事件数据需满足的条件 {字段: 值 或 (运算符, 值)}
+            amount: 每次计数增加事件数据中该字段的值，默认每次加 1
+            reset_on: 发生这些事件时计数清零（连续类成就）
+        """
+        for op_value in (where or {}).values():
+            if isinstance(op_value, tuple) and op_value[0] not in _OPERATORS:
+                raise ValueError(f"成就 {rule_id} 的条件运算符无效：{op_value[0]}")
+        self.id = rule_id
+        self.event = event
+        self.target = target
+        self.where = where or {}
+        self.amount = amount
+        self.reset_on = tuple(reset_on)
+
+    @classmethod
+    def from_spec(cls, rule_id, spec):
+        """从成就定义中的 rule 字典创建"""
+        return cls(rule_id, spec["event"], spec.get("target", 1), spec.get("where"),
+                   spec.get("amount"), spec.get("reset_on", ()))
+
+    def matches(self, data):
+        for key, expected in self.where.items():
+            value = data.get(key)
+            if isinstance(expected, tuple):
+                op, operand = expected
+                if value is None or not _OPERATORS[op](value, operand):
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+
+class RuleEngine:
+    """按事件索引规则并维护计数的成就引擎"""
+
+    def __init__(self, rules):
+        self.rules = {rule.id: rule for rule in rules}
+        self.progress = dict.fromkeys(self.rules, 0)
+        self.unlocked = set()
+        self.dirty = set()  # 计数变化、还没保存的规则
+        self._index = {}  # 事件 -> 计数规则列表
+        self._reset_index = {}  # 事件 -> 清零规则列表
+        for rule in self.rules.values():
+            self._subscribe(rule)
+
+    def _subscribe(self, rule):
+        self._index.setdefault(rule.event, []).append(rule)
+        for event in rule.reset_on:
+            self._reset_index.setdefault(event, []).append(rule)
+
+    def _unsubscribe(self, rule):
+        self._index[rule.event].remove(rule)
+        for event in rule.reset_on:
+            self._reset_index[event].remove(rule)
+
+    def load(self, progress, unlocked):
+        """
+        恢复保存的计数和解锁状态
+
+        Args:
+            progress: {规则ID: 计数}
+            unlocked: 已解锁的规则 ID
+        """
+        for rule_id, value in progress.items():
+            if rule_id in self.progress:
+                self.progress[rule_id] = value
+        for rule_id in unlocked:
+            if rule_id in self.rules and rule_id not in self.unlocked:
+                self.unlocked.add(rule_id)
+                self._unsubscribe(self.rules[rule_id])
+
+    def subscribers(self, event):
+        """订阅了该事件（计数或清零）的未解锁规则数"""
+        return len(self._index.get(event, ())) + len(self._reset_index.get(event, ()))
+
+    def emit(self, event, **data):
+        """
+        处理一个事件
+
+        Returns:
+            list: 本次达到目标、新解锁的规则 ID
+        """
+        progress = self.progress
+        for rule in self._reset_index.get(event, ()):
+            if progress[rule.id]:
+                progress[rule.id] = 0
+                self.dirty.add(rule.id)
+
+        newly_unlocked = []
+        for rule in self._index.get(event, ()):
+            if not rule.matches(data):
+                continue
+            progress[rule.id] += data.get(rule.amount, 1) if rule.amount else 1
+            self.dirty.add(rule.id)
+            if progress[rule.id] >= rule.target:
+                newly_unlocked.append(rule)
+        for rule in newly_unlocked:
+            self.unlocked.add(rule.id)
+            self._unsubscribe(rule)
+        return [rule.id for rule in newly_unlocked]
+
+    def pop_dirty(self):
+        """取出并清空计数有变化的规则 ID"""
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
@@ -5,54 +5,91 @@
 import pygame
 import json
 import os
-import sys
+from collections import OrderedDict
+
+from config import get_data_path
+from font_cache import get_font
+from dirty_rect import mark_dirty
+from async_writer import CoalescingWriter
+from achievement_rules import (
+    RuleEngine, Rule,
+    ROUND_STARTED, ROUND_WON, ROUND_LOST, BALL_ABSORBED, NEAR_MISS, ITEM_BOUGHT, ITEM_USED,
+)
+
+
+# 成就列表条目尺寸
+ENTRY_WIDTH = 400
+ENTRY_HEIGHT = 80
+ENTRY_SPACING = 15
+ROW_HEIGHT = ENTRY_HEIGHT + ENTRY_SPACING
+ENTRY_CACHE_SIZE = 64  # 缓存的条目 Surface 数量上限（远多于一屏能显示的条目）
+
+# 成就定义：rule 声明计数的事件、条件和目标（规则格式见 achievement_rules.Rule）
+ACHIEVEMENT_DEFINITIONS = [
+    {"id": "first_easy", "name": "小试牛刀", "description": "首次通过简单难度", "icon": "🥉",
+     "rule": {"event": ROUND_WON, "where": {"difficulty": "easy"}}},
+    {"id": "first_normal", "name": "登堂入室", "description": "首次通过普通难度", "icon": "🥈",
+     "rule": {"event": ROUND_WON, "where": {"difficulty": "normal"}}},
+    {"id": "first_hell", "name": "已臻化境", "description": "首次通过地狱难度", "icon": "🥇",
+     "rule": {"event": ROUND_WON, "where": {"difficulty": "hell"}}},
+    {"id": "win_streak_3", "name": "势如破竹", "description": "连续赢得3局", "icon": "🔥",
+     "rule": {"event": ROUND_WON, "target": 3, "reset_on": (ROUND_LOST,)}},
+    {"id": "quick_clear", "name": "速战速决", "description": "5秒内让所有彩球入洞", "icon": "⚡",
+     "rule": {"event": ROUND_WON, "where": {"reason": "all_balls_absorbed", "elapsed_ms": ("<=", 5000)}}},
+    {"id": "absorb_50", "name": "黑洞饲养员", "description": "累计50个彩球入洞", "icon": "🕳",
+     "rule": {"event": BALL_ABSORBED, "target": 50, "amount": "count"}},
+    {"id": "near_miss_1", "name": "擦肩而过", "description": "与彩球擦身而过", "icon": "💨",
+     "rule": {"event": NEAR_MISS, "amount": "count"}},
+    {"id": "near_miss_100", "name": "刀尖起舞", "description": "累计与彩球擦身而过100次", "icon": "🗡",
+     "rule": {"event": NEAR_MISS, "target": 100, "amount": "count"}},
+    {"id": "first_purchase", "name": "精打细算", "description": "首次购买道具", "icon": "🛒",
+     "rule": {"event": ITEM_BOUGHT}},
+]
 
 
 class AchievementSystem:
     """
     成就系统类
-    管理所有成就的解锁状态和显示
+    管理所有成就的解锁状态和显示，解锁判定由规则引擎按游戏事件增量完成
     """
 
-    def __init__(self):
-        """初始化成就系统，加载成就定义和保存数据"""
-        # 成就定义 - 只保留三个难度通关成就
-        self.achievements = {
-            "first_easy": {
-                "id": "first_easy",
-                "name": "小试牛刀",
-                "description": "首次通过简单难度",
-                "icon": "🥉",  # 可以用emoji或图片
-                "unlocked": False,
-                "hidden": False,
-                "unlock_time": None
-            },
-            "first_normal": {
-                "id": "first_normal",
-                "name": "登堂入室",
-                "description": "首次通过普通难度",
-                "icon": "🥈",
-                "unlocked": False,
-                "hidden": False,
-                "unlock_time": None
-            },
-            "first_hell": {
-                "id": "first_hell",
-                "name": "已臻化境",
-                "description": "首次通过地狱难度",
-                "icon": "🥇",
+    def __init__(self, definitions=None):
+        """
+        初始化成就系统（只建立成就定义，保存的数据由 load_achievements 加载）
+
+        Args:
+            definitions: 成就定义列表，默认 ACHIEVEMENT_DEFINITIONS
+        """
+        if definitions is None:
+            definitions = ACHIEVEMENT_DEFINITIONS
+        self.achievements = {}
+        for definition in definitions:
+            self.achievements[definition["id"]] = {
+                "id": definition["id"],
+                "name": definition["name"],
+                "description": definition["description"],
+                "icon": definition["icon"],
                 "unlocked": False,
-                "hidden": False,
-                "unlock_time": None
+                "hidden": definition.get("hidden", False),
+                "unlock_time": None,
+                "progress": 0,
+                "target": definition["rule"].get("target", 1),
             }
-            # 已删除："hell_no_items" - 天下无敌成就
-        }
+        self.engine = RuleEngine([Rule.from_spec(d["id"], d["rule"]) for d in definitions])
+        self.unlocked_count = 0  # 已解锁数量（加载时统计，解锁时加一，不必每帧遍历）
 
         # 当前游戏状态追踪
         self.current_difficulty = None  # 当前游戏难度
+        self.used_items = False  # 本局是否使用了道具
+
+        # 后台存档写入器（第一次保存时创建）
+        self._writer = None
 
-        # 加载已解锁的成就
-        self.load_achievements()
+        # 成就列表：渲染好的条目（LRU）、显示顺序和滚动位置
+        self._entry_cache = OrderedDict()
+        self._order = []
+        self._order_key = None
+        self.scroll_offset = 0
 
     def get_save_path(self):
         """
@@ -61,33 +98,32 @@ class AchievementSystem:
         Returns:
             str: 成就数据文件路径
         """
-        try:
-            # 如果是exe文件，保存到用户目录
-            if getattr(sys, 'frozen', False):
-                # 运行在PyInstaller打包的exe中
-                if sys.platform == 'win32':
-                    # Windows: 保存到用户的AppData/Roaming目录
-                    appdata_path = os.getenv('APPDATA')
-                    save_dir = os.path.join(appdata_path, '躲避球游戏')
-                    if not os.path.exists(save_dir):
-                        os.makedirs(save_dir)
-                    return os.path.join(save_dir, 'achievements.json')
-                else:
-                    # macOS/Linux: 保存到用户home目录
-                    home_path = os.path.expanduser('~')
-                    save_dir = os.path.join(home_path, '.躲避球游戏')
-                    if not os.path.exists(save_dir):
-                        os.makedirs(save_dir)
-                    return os.path.join(save_dir, 'achievements.json')
-            else:
-                # 开发环境：保存在当前目录
-                return "achievements.json"
-        except:
-            # 出错时使用当前目录
-            return "achievements.json"
+        return get_data_path("achievements.json")
 
     def load_achievements(self):
-        """从文件加载已解锁的成就"""
+        """从档案库加载成就状态和计数（档案库不可用时从文件加载）"""
+        from profile_store import get_profile_store
+        store = get_profile_store()
+        if store is not None:
+            saved = store.load_profile()["achievements"]
+            for key, data in saved.items():
+                if key in self.achievements:
+                    self.achievements[key].update(data)
+            if not saved:
+                # 档案库中还没有成就：导入旧的 JSON 存档（随下一次提交写入档案库）
+                self._load_json()
+                self.save_achievements()
+        else:
+            self._load_json()
+
+        self.unlocked_count = sum(1 for a in self.achievements.values() if a["unlocked"])
+        # 规则引擎从保存的计数继续，已解锁的规则不再订阅事件
+        self.engine.load(
+            {key: a["progress"] for key, a in self.achievements.items()},
+            [key for key, a in self.achievements.items() if a["unlocked"]],
+        )
+
+    def _load_json(self):
         save_path = self.get_save_path()
         try:
             if os.path.exists(save_path):
@@ -101,23 +137,73 @@ class AchievementSystem:
         except Exception as e:
             print(f"加载成就数据失败: {e}")
 
-    def save_achievements(self):
-        """保存成就数据到文件"""
-        save_path = self.get_save_path()
-        try:
-            save_data = {}
-            for key, achievement in self.achievements.items():
-                # 只保存必要的数据
-                save_data[key] = {
-                    "unlocked": achievement["unlocked"],
-                    "unlock_time": achievement["unlock_time"]
-                }
-
-            with open(save_path, "w", encoding="utf-8") as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
-            print(f"成就数据保存到: {save_path}")
-        except Exception as e:
-            print(f"保存成就数据失败: {e}")
+    def save_achievements(self, keys=None):
+        """
+        保存成就数据（只在内存中生成快照，序列化和写文件由后台线程完成，不阻塞游戏帧）
+
+        Args:
+            keys: 有变化的成就 ID，默认全部
+        """
+        from profile_store import get_profile_store
+        store = get_profile_store()
+        if store is not None:
+            # 只暂存有变化的成就，随本局的事务一起提交
+            for key in (self.achievements if keys is None else keys):
+                achievement = self.achievements[key]
+                store.set_achievement(key, achievement["unlocked"], achievement["unlock_time"],
+                                      achievement["progress"])
+            return
+
+        save_data = {}
+        for key, achievement in self.achievements.items():
+            # 只保存必要的数据
+            save_data[key] = {
+                "unlocked": achievement["unlocked"],
+                "unlock_time": achievement["unlock_time"],
+                "progress": achievement["progress"]
+            }
+
+        if self._writer is None:
+            self._writer = CoalescingWriter(self.get_save_path(), name="achievement-writer")
+        self._writer.submit(save_data)
+
+    def flush(self):
+        """等待成就数据写完（退出前调用）"""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def handle_event(self, event, **data):
+        """
+        处理一个游戏事件（只有订阅了该事件的规则会被计算）
+
+        Args:
+            event: 事件类型（achievement_rules 中的常量）
+            **data: 事件数据
+
+        Returns:
+            dict or None: 新解锁的成就信息（同时解锁多个时合并显示），没有解锁返回None
+        """
+        if not self.engine.subscribers(event):
+            return None
+        unlocked_ids = self.engine.emit(event, **data)
+        dirty = self.engine.pop_dirty()
+        for key in dirty:
+            self.achievements[key]["progress"] = self.engine.progress[key]
+            self._entry_cache.pop(key, None)
+
+        unlocked = [info for info in (self.unlock_achievement(key) for key in unlocked_ids) if info]
+        if dirty:
+            self.save_achievements(dirty)
+        if not unlocked:
+            return None
+        if len(unlocked) == 1:
+            return unlocked[0]
+        return {
+            "name": "、".join(info["name"] for info in unlocked),
+            "description": "；".join(info["description"] for info in unlocked),
+            "icon": unlocked[0]["icon"],
+            "message": unlocked[0]["message"]
+        }
 
     def start_new_game(self, difficulty, used_items=False):
         """
@@ -125,41 +211,35 @@ class AchievementSystem:
 
         Args:
             difficulty: 游戏难度
-            used_items: 是否使用了道具（不再需要追踪道具使用）
+            used_items: 本局是否使用了道具
         """
         self.current_difficulty = difficulty
-
+        self.used_items = used_items
+        return self.handle_event(ROUND_STARTED, difficulty=difficulty, used_items=used_items)
 
     def mark_item_used(self):
-        """当玩家使用道具时调用（保留方法，但现在不需要特殊处理）"""
-        # 不再需要追踪道具使用情况
-        pass
+        """当玩家使用道具时调用"""
+        return self.handle_event(ITEM_USED)
+
+    def mark_item_bought(self, item_name):
+        """当玩家购买道具时调用"""
+        return self.handle_event(ITEM_BOUGHT, item=item_name)
 
-    def check_level_completion(self, difficulty, win_reason):
+    def check_level_completion(self, difficulty, win_reason, elapsed_ms=None):
         """
-        关卡完成时调用，检查是否解锁新成就
+        关卡结束时调用，检查是否解锁新成就
 
         Args:
             difficulty: 完成的难度
             win_reason: 胜利原因 ("all_balls_absorbed" 或 "time_survived" 或 "lose")
+            elapsed_ms: 本局用时（毫秒）
 
         Returns:
             dict or None: 解锁的成就信息，如果没有解锁返回None
         """
-        achievement_unlocked = None
-        achievement_key = f"first_{difficulty}"
-
-        # 只检查首次通关成就
-        if (achievement_key in self.achievements and
-                not self.achievements[achievement_key]["unlocked"] and
-                win_reason != "lose"):  # 只有胜利时才解锁成就
-
-            achievement_unlocked = self.unlock_achievement(
-                achievement_key,
-                f"首次通过{difficulty}难度！"
-            )
-
-        return achievement_unlocked
+        event = ROUND_LOST if win_reason == "lose" else ROUND_WON
+        return self.handle_event(event, difficulty=difficulty, reason=win_reason,
+                                 elapsed_ms=elapsed_ms, used_items=self.used_items)
 
     def unlock_achievement(self, achievement_id, message=""):
         """
@@ -176,19 +256,25 @@ class AchievementSystem:
                 not self.achievements[achievement_id]["unlocked"]):
             achievement = self.achievements[achievement_id]
             achievement["unlocked"] = True
+            self.unlocked_count += 1
             achievement["unlock_time"] = pygame.time.get_ticks()
+            achievement["progress"] = max(achievement["progress"], achievement["target"])
+            # 直接解锁时规则也不再订阅事件
+            self.engine.load({}, [achievement_id])
+            self._entry_cache.pop(achievement_id, None)
+            if achievement["hidden"]:
+                # 隐藏成就解锁后才显示，重建显示顺序
+                self._order_key = None
 
-            print(f"🎉 成就解锁: {achievement['name']} - {achievement['description']}")
-
-            # 保存到文件
-            self.save_achievements()
+            # 保存
+            self.save_achievements([achievement_id])
 
             # 返回成就信息用于显示
             return {
                 "name": achievement["name"],
                 "description": achievement["description"],
                 "icon": achievement["icon"],
-                "message": message
+                "message": message or achievement["description"]
             }
         return None
 
@@ -204,9 +290,7 @@ class AchievementSystem:
         Returns:
             tuple: (已解锁数量, 总数量)
         """
-        total = len(self.achievements)
-        unlocked = len(self.get_unlocked_achievements())
-        return unlocked, total
+        return self.unlocked_count, len(self.achievements)
 
     def get_recent_achievements(self, count=3):
         """
@@ -227,89 +311,151 @@ class AchievementSystem:
         )
         return sorted_achievements[:count]
 
-    def draw_achievement_list(self, screen, x, y, show_hidden=False):
+    def _visible_achievements(self, show_hidden):
+        # 显示顺序只在成就集合变化时重建
+        key = (id(self.achievements), len(self.achievements), show_hidden)
+        if key != self._order_key:
+            self._order = [achievement for achievement in self.achievements.values()
+                           if show_hidden or not achievement["hidden"] or achievement["unlocked"]]
+            self._order_key = key
+            self._entry_cache.clear()
+        return self._order
+
+    def _render_entry(self, achievement):
+        """把一个成就条目渲染成 Surface（只在第一次显示、解锁或进度变化后调用）"""
+        font = get_font(20)
+        desc_font = get_font(16)
+        check_font = get_font(16)
+        surface = pygame.Surface((ENTRY_WIDTH, ENTRY_HEIGHT), pygame.SRCALPHA)
+        entry_rect = surface.get_rect()
+
+        # 根据是否解锁选择颜色
+        if achievement["unlocked"]:
+            # 已解锁：金色边框，深色背景
+            pygame.draw.rect(surface, (50, 50, 70), entry_rect, border_radius=8)
+            pygame.draw.rect(surface, (255, 215, 0), entry_rect, 2, border_radius=8)
+        else:
+            # 未解锁：灰色边框，更深的背景
+            pygame.draw.rect(surface, (40, 40, 50), entry_rect, border_radius=8)
+            pygame.draw.rect(surface, (100, 100, 100), entry_rect, 2, border_radius=8)
+
+        # 图标（未解锁时显示为问号）
+        icon_text = achievement["icon"] if achievement["unlocked"] else "❓"
+        icon_color = (255, 215, 0) if achievement["unlocked"] else (100, 100, 100)
+        icon_surface = font.render(icon_text, True, icon_color)
+        surface.blit(icon_surface, icon_surface.get_rect(center=(40, ENTRY_HEIGHT // 2)))
+
+        # 成就名称
+        name_color = (255, 255, 255) if achievement["unlocked"] else (150, 150, 150)
+        surface.blit(font.render(achievement["name"], True, name_color), (80, 15))
+
+        # 成就描述（未解锁时显示为？？？，需要累计的成就显示进度）
+        desc_color = (200, 200, 200) if achievement["unlocked"] else (100, 100, 100)
+        desc_text = achievement["description"] if achievement["unlocked"] else "？？？"
+        target = achievement.get("target", 1)
+        if not achievement["unlocked"] and target > 1:
+            desc_text = f"{achievement['description']}（{achievement.get('progress', 0)}/{target}）"
+        surface.blit(desc_font.render(desc_text, True, desc_color), (80, 45))
+
+        # 解锁状态指示器
+        status_center = (ENTRY_WIDTH - 20, ENTRY_HEIGHT // 2)
+        if achievement["unlocked"]:
+            pygame.draw.circle(surface, (0, 255, 0), status_center, 8)
+
+            # 对勾标记
+            check_surface = check_font.render("✓", True, (255, 255, 255))
+            surface.blit(check_surface, check_surface.get_rect(center=status_center))
+        else:
+            pygame.draw.circle(surface, (100, 100, 100), status_center, 8)
+        return surface
+
+    def _get_entry_surface(self, achievement):
+        cache = self._entry_cache
+        key = achievement["id"]
+        surface = cache.get(key)
+        if surface is None:
+            surface = self._render_entry(achievement)
+            cache[key] = surface
+            if len(cache) > ENTRY_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return surface
+
+    def get_max_scroll(self, view_height, show_hidden=True):
+        """列表可滚动的最大距离（像素）"""
+        content_height = len(self._visible_achievements(show_hidden)) * ROW_HEIGHT - ENTRY_SPACING
+        return max(0, content_height - view_height)
+
+    def scroll(self, delta):
         """
-        在指定位置绘制成就列表
+        滚动成就列表（在绘制时按可视区域高度限制范围）
+
+        Args:
+            delta: 滚动距离（像素），正数向下
+        """
+        self.scroll_offset = max(0, self.scroll_offset + delta)
+
+    def draw_achievement_list(self, screen, x, y, show_hidden=False, height=None):
+        """
+        在指定位置绘制可滚动的成就列表（只绘制可视区域内的条目）
 
         Args:
             screen: Pygame屏幕Surface
             x: 列表起始x坐标
             y: 列表起始y坐标
-            show_hidden: 是否显示隐藏成就（现在没有隐藏成就）
+            show_hidden: 是否显示未解锁的隐藏成就
+            height: 可视区域高度，默认到屏幕底部
         """
-        try:
-            from config import FONT_PATH
-            title_font = pygame.font.Font(FONT_PATH, 24)
-            font = pygame.font.Font(FONT_PATH, 20)
-        except:
-            title_font = pygame.font.SysFont("simhei", 24)
-            font = pygame.font.SysFont("simhei", 20)
-
-        y_offset = y
-
-        # 绘制每个成就（现在所有成就都是公开的）
-        for achievement in self.achievements.values():
-            # 成就条目背景
-            entry_width = 400
-            entry_height = 80
-            entry_rect = pygame.Rect(x, y_offset, entry_width, entry_height)
-
-            # 根据是否解锁选择颜色
-            if achievement["unlocked"]:
-                # 已解锁：金色边框，深色背景
-                pygame.draw.rect(screen, (50, 50, 70), entry_rect, border_radius=8)
-                pygame.draw.rect(screen, (255, 215, 0), entry_rect, 2, border_radius=8)
-            else:
-                # 未解锁：灰色边框，更深的背景
-                pygame.draw.rect(screen, (40, 40, 50), entry_rect, border_radius=8)
-                pygame.draw.rect(screen, (100, 100, 100), entry_rect, 2, border_radius=8)
-
-            # 图标（未解锁时显示为问号）
-            icon_text = achievement["icon"] if achievement["unlocked"] else "❓"
-            icon_color = (255, 215, 0) if achievement["unlocked"] else (100, 100, 100)
-            icon_surface = font.render(icon_text, True, icon_color)
-            icon_rect = icon_surface.get_rect(center=(x + 40, y_offset + entry_height // 2))
-            screen.blit(icon_surface, icon_rect)
-
-            # 成就名称
-            name_color = (255, 255, 255) if achievement["unlocked"] else (150, 150, 150)
-            name_surface = font.render(achievement["name"], True, name_color)
-            name_rect = name_surface.get_rect(topleft=(x + 80, y_offset + 15))
-            screen.blit(name_surface, name_rect)
-
-            # 成就描述（未解锁时显示为？？？）
-            desc_color = (200, 200, 200) if achievement["unlocked"] else (100, 100, 100)
-            desc_text = achievement["description"] if achievement["unlocked"] else "？？？"
-
-            # 获取小字体
-            try:
-                desc_font = pygame.font.Font(FONT_PATH, 16)
-            except:
-                desc_font = pygame.font.SysFont("simhei", 16)
-
-            desc_surface = desc_font.render(desc_text, True, desc_color)
-            desc_rect = desc_surface.get_rect(topleft=(x + 80, y_offset + 45))
-            screen.blit(desc_surface, desc_rect)
-
-            # 解锁状态指示器
-            status_rect = pygame.Rect(x + entry_width - 30, y_offset + entry_height // 2 - 10, 20, 20)
-            if achievement["unlocked"]:
-                pygame.draw.circle(screen, (0, 255, 0), status_rect.center, 8)
-
-                # 对勾标记
-                try:
-                    check_font = pygame.font.Font(FONT_PATH, 16)
-                except:
-                    check_font = pygame.font.SysFont("simhei", 16)
-
-                check_surface = check_font.render("✓", True, (255, 255, 255))
-                check_rect = check_surface.get_rect(center=status_rect.center)
-                screen.blit(check_surface, check_rect)
-            else:
-                pygame.draw.circle(screen, (100, 100, 100), status_rect.center, 8)
-
-            y_offset += entry_height + 15
-
-
-# 全局成就系统实例
-achievement_system = AchievementSystem()
\ No newline at end of file
+        if height is None:
+            height = screen.get_height() - y
+        height = max(ROW_HEIGHT, height)
+        achievements = self._visible_achievements(show_hidden)
+        self.scroll_offset = min(self.scroll_offset, self.get_max_scroll(height, show_hidden))
+
+        viewport = pygame.Rect(x, y, ENTRY_WIDTH, height)
+        old_clip = screen.get_clip()
+        screen.set_clip(viewport.clip(old_clip))
+
+        # 只遍历与可视区域相交的条目
+        first = self.scroll_offset // ROW_HEIGHT
+        last = min(len(achievements), (self.scroll_offset + height) // ROW_HEIGHT + 1)
+        for index in range(first, last):
+            entry_y = y + index * ROW_HEIGHT - self.scroll_offset
+            screen.blit(self._get_entry_surface(achievements[index]), (x, entry_y))
+        screen.set_clip(old_clip)
+        mark_dirty(viewport)
+
+        # 内容超出可视区域时绘制滚动条
+        max_scroll = self.get_max_scroll(height, show_hidden)
+        if max_scroll > 0:
+            track = pygame.Rect(x + ENTRY_WIDTH + 8, y, 6, height)
+            thumb_height = max(20, height * height // (height + max_scroll))
+            thumb_y = y + (height - thumb_height) * self.scroll_offset // max_scroll
+            pygame.draw.rect(screen, (80, 80, 90), track, border_radius=3)
+            pygame.draw.rect(screen, (200, 200, 210), (track.x, thumb_y, track.width, thumb_height), border_radius=3)
+            mark_dirty(track)
+
+
+# 全局成就系统实例（第一次使用时创建并加载，导入模块时不打开档案库）
+_achievement_system = None
+
+
+def get_achievement_system():
+    """
+    全局成就系统（第一次调用时创建并加载保存的数据）
+
+    Returns:
+        AchievementSystem: 成就系统
+    """
+    global _achievement_system
+    if _achievement_system is None:
+        _achievement_system = AchievementSystem()
+        _achievement_system.load_achievements()
+    return _achievement_system
+
+
+def flush_achievements():
+    """等待成就数据写完（退出前调用，成就系统未创建时什么也不做）"""
+    if _achievement_system is not None:
+        _achievement_system.flush()
\ No newline at end of file
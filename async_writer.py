@@ -0,0 +1,149 @@
+"""
+后台存档写入模块
+游戏线程只提交要保存的数据快照（内存操作），由后台线程序列化并写文件：
+短时间内的多次提交合并成一次写入（只写最新的快照），先写临时文件再改名，
+写到一半崩溃也不会破坏原来的存档；退出前调用 flush 等待写完
+
+- CoalescingWriter：反复保存同一个文件（成就存档），只写最新的快照
+- QueuedWriter：按提交顺序各写一个文件（回放），每次提交都会写出
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+COALESCE_DELAY = 0.2  # 收到提交后再等多久才写（秒），期间的提交合并为一次写入
+
+
+def write_file_atomic(path, data):
+    """
+    先写临时文件、fsync 后再改名，写到一半崩溃也不会破坏原来的文件
+
+    Args:
+        path: 文件路径（目录不存在时创建）
+        data: str（按 UTF-8 写入）或 bytes
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    if isinstance(data, bytes):
+        f = open(tmp_path, "wb")
+    else:
+        f = open(tmp_path, "w", encoding="utf-8")
+    with f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CoalescingWriter:
+    """把 JSON 数据合并写入同一个文件的后台写入器"""
+
+    def __init__(self, path, name="save-writer"):
+        self.path = path
+        self.writes = 0  # 实际写文件次数
+        self.submits = 0  # 提交次数
+        self._pending = None  # 最新的待写数据
+        self._has_pending = False
+        self._busy = False  # 正在写文件
+        self._flushing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        # 后台线程是守护线程，正常退出时兜底写完
+        atexit.register(self.flush)
+
+    def submit(self, data):
+        """提交要保存的数据（调用方应传入快照，之后不再修改它）"""
+        with self._cond:
+            self._pending = data
+            self._has_pending = True
+            self.submits += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """等待已提交的数据全部写完"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            while self._has_pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"等待存档写入超时：{self.path}")
+                    break
+                self._cond.wait(remaining)
+            self._flushing = False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._has_pending:
+                    self._cond.wait()
+                # 合并窗口：等待更多提交，flush 时立即写
+                deadline = time.monotonic() + COALESCE_DELAY
+                while not self._flushing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                data = self._pending
+                self._pending = None
+                self._has_pending = False
+                self._busy = True
+            try:
+                self._write(data)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, data):
+        try:
+            write_file_atomic(self.path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+            self.writes += 1
+        except (OSError, TypeError, ValueError) as e:
+            print(f"保存 {self.path} 失败：{e}")
+
+
+class QueuedWriter:
+    """按提交顺序逐个写文件的后台写入器（每次提交写一个文件，不合并）"""
+
+    def __init__(self, name="file-writer"):
+        self.writes = 0  # 实际写文件次数
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, path, data, on_written=None):
+        """
+        提交一个要写的文件
+
+        Args:
+            path: 文件路径
+            data: str 或 bytes（调用方之后不再修改它）
+            on_written: 写完后在后台线程中调用的函数 on_written(path)（例如清理旧文件）
+        """
+        self._queue.put((path, data, on_written))
+
+    def flush(self):
+        """等待已提交的文件全部写完"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            path, data, on_written = self._queue.get()
+            try:
+                write_file_atomic(path, data)
+                self.writes += 1
+                if on_written is not None:
+                    on_written(path)
+            except OSError as e:
+                print(f"保存 {path} 失败：{e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,110 @@
+"""
+背景帧数据源模块
+按需（流式）解码 GIF/图片背景：只保留一个小的已解码帧环形缓冲区，
+启动时只解码第一帧，启动耗时和常驻内存都与 GIF 长度无关
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class BackgroundSource:
+    """
+    背景帧数据源
+    通过生成器顺序解码 PIL 图像的帧，已解码的帧放在有界的环形缓冲区中
+    """
+
+    def __init__(self, path, ring_size=8, speed_factor=1):
+        """
+        打开背景图片并立即解码第一帧
+
+        Args:
+            path: 图片路径（GIF/JPG/PNG）
+            ring_size: 最多保留的已解码帧数
+            speed_factor: 帧间隔倍率（1 为原速）
+        """
+        from PIL import Image
+
+        self.path = path
+        self.ring_size = max(1, ring_size)
+        self.speed_factor = speed_factor
+        self._image = Image.open(path)
+        try:
+            self.frame_count = self._image.n_frames  # 多帧 GIF
+        except AttributeError:
+            self.frame_count = 1  # 单帧 JPG/PNG 或单帧 GIF
+
+        self._ring = OrderedDict()  # 帧序号 -> (Surface, 帧间隔)
+        # 帧间隔单独保存（每帧一个数字），帧被挤出缓冲区后查间隔也不用重新解码
+        self._delays = [None] * self.frame_count
+        self._generator = None
+        self._next_idx = 0
+        # 第一帧立即可用
+        self.get_frame(0)
+
+    def _decode_frames(self, start_idx):
+        """从 start_idx 开始顺序解码帧的生成器"""
+        for frame_idx in range(start_idx, self.frame_count):
+            if self.frame_count > 1:
+                self._image.seek(frame_idx)
+            frame = self._image.convert("RGBA")
+            surface = pygame.image.fromstring(frame.tobytes(), frame.size, frame.mode)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            delay = self._image.info.get("duration", 100) * self.speed_factor
+            yield frame_idx, surface, delay
+
+    def _decode(self, frame_idx):
+        # 顺序播放时沿用同一个生成器；跳帧或回到开头时重新开始
+        if self._generator is None or frame_idx != self._next_idx:
+            self._generator = self._decode_frames(frame_idx)
+        decoded_idx, surface, delay = next(self._generator)
+        self._next_idx = decoded_idx + 1
+        self._delays[decoded_idx] = delay
+        if self._next_idx >= self.frame_count:
+            self._generator = None
+            self._next_idx = 0
+
+        self._ring[decoded_idx] = (surface, delay)
+        while len(self._ring) > self.ring_size:
+            self._ring.popitem(last=False)
+        return surface, delay
+
+    def _get_entry(self, frame_idx):
+        entry = self._ring.get(frame_idx)
+        if entry is None:
+            entry = self._decode(frame_idx)
+        return entry
+
+    def get_frame(self, frame_idx):
+        """
+        获取指定帧（未缩放）
+
+        Args:
+            frame_idx: 帧序号
+
+        Returns:
+            pygame.Surface: 背景帧
+        """
+        return self._get_entry(frame_idx % self.frame_count)[0]
+
+    def get_delay(self, frame_idx):
+        """获取指定帧的显示时长（毫秒），解码过一次后只是查表"""
+        frame_idx %= self.frame_count
+        delay = self._delays[frame_idx]
+        if delay is None:
+            delay = self._get_entry(frame_idx)[1]
+        return delay
+
+    def prefetch(self, frame_idx, count=1):
+        """提前解码从 frame_idx 开始的 count 帧（不超过环形缓冲区大小）"""
+        for offset in range(min(count, self.ring_size - 1)):
+            self._get_entry((frame_idx + offset) % self.frame_count)
+
+    def close(self):
+        """关闭底层图片文件"""
+        self._generator = None
+        self._ring.clear()
+        if self._image is not None:
+            self._image.close()
+            self._image = None
@@ -0,0 +1,225 @@
+"""
+数值平衡批量模拟工具
+用多进程在所有 CPU 核心上跑大量确定性模拟局（simulation.Simulation），
+按 难度 × 道具组合 统计胜率、胜利原因占比和存活时间分布，用来验证 DIFFICULTY_CONFIG /
+TIME_LIMIT / 道具效果的调整
+
+运行：python balance.py --rounds 100000 [--difficulty hell] [--items none item1] [--workers 8] [--json out.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from config import DIFFICULTY_CONFIG, TIME_LIMIT
+
+# 道具组合
+ITEM_COMBOS = {
+    "none": {},
+    "item1": {"item1": True},
+    "item2": {"item2": True},
+    "both": {"item1": True, "item2": True},
+}
+SURVIVAL_BIN_MS = 250  # 存活时间直方图的桶宽（毫秒）
+CHUNK_SIZE = 500  # 每个进程任务模拟的局数
+
+
+# ========== 模拟用的主球策略 ==========
+def idle_policy(seed):
+    """主球停在出生点不动"""
+    return None
+
+
+def wander_policy(seed):
+    """主球随机游走（每步最多移动 8 像素），随机数由局种子决定"""
+    rng = random.Random(seed)
+
+    def next_position(sim):
+        player = sim.player
+        x = min(max(player.x + rng.uniform(-8, 8), player.radius), sim.width - player.radius)
+        y = min(max(player.y + rng.uniform(-8, 8), player.radius), sim.height - player.radius)
+        return x, y
+
+    return next_position
+
+
+def potential_policy():
+    """势场避障自动驾驶（一个控制器批量服务整批模拟）"""
+    from controllers import PotentialFieldController
+    return PotentialFieldController()
+
+
+POLICIES = {
+    "idle": idle_policy,
+    "wander": wander_policy,
+}
+# 一个控制器服务整批模拟的策略（每步一次批量调用）
+BATCH_POLICIES = {
+    "potential": potential_policy,
+}
+
+
+def _empty_stats():
+    return {
+        "rounds": 0,
+        "wins": 0,
+        "reasons": {"all_balls_absorbed": 0, "time_survived": 0, "lose": 0},
+        "balls_absorbed": 0,
+        # 失败局的存活时间直方图，下标为 elapsed_ms // SURVIVAL_BIN_MS
+        "survival_bins": [0] * (TIME_LIMIT // SURVIVAL_BIN_MS + 1),
+        # 全部吸收获胜局的用时直方图
+        "clear_bins": [0] * (TIME_LIMIT // SURVIVAL_BIN_MS + 1),
+    }
+
+
+def _merge_stats(total, part):
+    total["rounds"] += part["rounds"]
+    total["wins"] += part["wins"]
+    total["balls_absorbed"] += part["balls_absorbed"]
+    for reason, count in part["reasons"].items():
+        total["reasons"][reason] += count
+    for key in ("survival_bins", "clear_bins"):
+        for i, count in enumerate(part[key]):
+            total[key][i] += count
+
+
+def run_chunk(difficulty, combo, policy, first_seed, count):
+    """
+    在子进程中模拟 count 局（种子为 first_seed ~ first_seed + count - 1）
+
+    Returns:
+        tuple: (难度, 道具组合, 统计 dict)
+    """
+    from simulation import Simulation, run_batch
+
+    stats = _empty_stats()
+    last_bin = len(stats["survival_bins"]) - 1
+    seeds = range(first_seed, first_seed + count)
+    # 放置警告在批量模拟中没有意义
+    with contextlib.redirect_stdout(io.StringIO()):
+        if policy in BATCH_POLICIES:
+            sims = [Simulation(difficulty, seed, ITEM_COMBOS[combo]) for seed in seeds]
+            results = run_batch(sims, BATCH_POLICIES[policy]())
+        else:
+            results = [Simulation(difficulty, seed, ITEM_COMBOS[combo], POLICIES[policy](seed)).run()
+                       for seed in seeds]
+        for result in results:
+            stats["rounds"] += 1
+            stats["reasons"][result["reason"]] += 1
+            stats["balls_absorbed"] += result["balls_absorbed"]
+            bin_index = min(result["elapsed_ms"] // SURVIVAL_BIN_MS, last_bin)
+            if result["result"] == "win":
+                stats["wins"] += 1
+                if result["reason"] == "all_balls_absorbed":
+                    stats["clear_bins"][bin_index] += 1
+            else:
+                stats["survival_bins"][bin_index] += 1
+    return difficulty, combo, stats
+
+
+def histogram_percentile(bins, q):
+    """按直方图估算分位数（毫秒，取桶中点），没有样本时返回 None"""
+    total = sum(bins)
+    if total == 0:
+        return None
+    target = math.ceil(total * q)
+    seen = 0
+    for i, count in enumerate(bins):
+        seen += count
+        if seen >= target:
+            return i * SURVIVAL_BIN_MS + SURVIVAL_BIN_MS // 2
+    return (len(bins) - 1) * SURVIVAL_BIN_MS
+
+
+def summarize(stats):
+    """把累计统计整理成报告行"""
+    rounds = stats["rounds"] or 1
+    reasons = stats["reasons"]
+    return {
+        "rounds": stats["rounds"],
+        "win_rate": stats["wins"] / rounds,
+        "absorbed_rate": reasons["all_balls_absorbed"] / rounds,
+        "survived_rate": reasons["time_survived"] / rounds,
+        "avg_balls_absorbed": stats["balls_absorbed"] / rounds,
+        "lose_survival_p10": histogram_percentile(stats["survival_bins"], 0.1),
+        "lose_survival_p50": histogram_percentile(stats["survival_bins"], 0.5),
+        "lose_survival_p90": histogram_percentile(stats["survival_bins"], 0.9),
+        "clear_time_p50": histogram_percentile(stats["clear_bins"], 0.5),
+        "survival_bins": stats["survival_bins"],
+        "clear_bins": stats["clear_bins"],
+    }
+
+
+def _format_ms(value):
+    return "-" if value is None else f"{value / 1000:.2f}s"
+
+
+def print_report(results):
+    print(f"{'难度':<8}{'道具':<8}{'局数':>10}{'胜率':>8}{'全吸收':>8}{'坚持':>8}"
+          f"{'败局P10':>10}{'败局P50':>10}{'败局P90':>10}{'清场P50':>10}")
+    for (difficulty, combo), row in results.items():
+        print(f"{difficulty:<8}{combo:<8}{row['rounds']:>10}{row['win_rate']:>8.1%}"
+              f"{row['absorbed_rate']:>8.1%}{row['survived_rate']:>8.1%}"
+              f"{_format_ms(row['lose_survival_p10']):>10}{_format_ms(row['lose_survival_p50']):>10}"
+              f"{_format_ms(row['lose_survival_p90']):>10}{_format_ms(row['clear_time_p50']):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数值平衡批量模拟")
+    parser.add_argument("--rounds", type=int, default=10000, help="每个 难度×道具组合 的模拟局数")
+    parser.add_argument("--difficulty", nargs="+", default=list(DIFFICULTY_CONFIG), choices=list(DIFFICULTY_CONFIG))
+    parser.add_argument("--items", nargs="+", default=list(ITEM_COMBOS), choices=list(ITEM_COMBOS))
+    parser.add_argument("--policy", default="wander", choices=list(POLICIES) + list(BATCH_POLICIES))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0, help="起始种子（各组合使用同一组种子，便于对比）")
+    parser.add_argument("--json", help="把统计结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    combos = [(difficulty, combo) for difficulty in args.difficulty for combo in args.items]
+    totals = {key: _empty_stats() for key in combos}
+    total_rounds = args.rounds * len(combos)
+    done = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = []
+        for difficulty, combo in combos:
+            for first in range(0, args.rounds, CHUNK_SIZE):
+                count = min(CHUNK_SIZE, args.rounds - first)
+                futures.append(pool.submit(run_chunk, difficulty, combo, args.policy, args.seed + first, count))
+
+        # 结果按完成顺序流式汇总
+        for future in as_completed(futures):
+            difficulty, combo, stats = future.result()
+            _merge_stats(totals[(difficulty, combo)], stats)
+            done += stats["rounds"]
+            elapsed = time.perf_counter() - start
+            print(f"\r进度 {done}/{total_rounds}（{done / elapsed:.0f} 局/秒）", end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+    results = {key: summarize(stats) for key, stats in totals.items()}
+    print_report(results)
+    print(f"共 {total_rounds} 局，用时 {time.perf_counter() - start:.1f}s，{args.workers} 个进程，策略 {args.policy}")
+
+    if args.json:
+        payload = {
+            "policy": args.policy,
+            "seed": args.seed,
+            "time_limit": TIME_LIMIT,
+            "survival_bin_ms": SURVIVAL_BIN_MS,
+            "results": [dict(difficulty=d, items=c, **row) for (d, c), row in results.items()],
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+彩球向量化物理模块
+用 NumPy 数组（结构数组 SoA）保存所有彩球的位置、速度和半径，
+移动、边界反弹、反弹加速和限速一次性向量化完成；
+进洞、主球碰撞和擦身而过也直接在数组上判断，绘制时从数组批量 blit，
+每一步不再逐个更新 Ball 精灵（控制器需要读取彩球状态时才按需写回）
+"""
+import numpy as np
+
+from config import MAX_SPEED, SPEED_MULTIPLIER, SIM_TICK_SCALE
+
+
+class BallArrayEngine:
+    """
+    彩球物理引擎（NumPy 后端）
+    彩球被移除时把最后一个彩球搬到空位，数组始终保持紧凑
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Args:
+            capacity: 初始容量，不够时自动翻倍
+        """
+        self.count = 0
+        self.views = []  # 与数组下标一一对应的 Ball 精灵
+        self.strips = []  # 与数组下标一一对应的呼吸闪烁贴图序列
+        self.render_alpha = 1.0  # 绘制时的插值系数
+        self._synced = True  # Ball 精灵是否与数组一致
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old_count = self.count
+        arrays = {}
+        for name in ("x", "y", "prev_x", "prev_y", "vx", "vy", "radius", "boost"):
+            new_array = np.zeros(capacity, dtype=np.float64)
+            if old_count:
+                new_array[:old_count] = getattr(self, name)[:old_count]
+            arrays[name] = new_array
+        self.x = arrays["x"]
+        self.y = arrays["y"]
+        self.prev_x = arrays["prev_x"]
+        self.prev_y = arrays["prev_y"]
+        self.vx = arrays["vx"]
+        self.vy = arrays["vy"]
+        self.radius = arrays["radius"]
+        self.boost = arrays["boost"]
+        self.capacity = capacity
+
+    def add_ball(self, ball):
+        """
+        把彩球交给引擎管理（之后它的位置由引擎写回）
+
+        Args:
+            ball: Ball 精灵，使用其当前的位置、速度、半径和反弹加速因子
+        """
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        i = self.count
+        self.x[i] = ball.x
+        self.y[i] = ball.y
+        self.prev_x[i] = ball.x
+        self.prev_y[i] = ball.y
+        self.vx[i] = ball.speed_x
+        self.vy[i] = ball.speed_y
+        self.radius[i] = ball.radius
+        self.boost[i] = ball.bounce_speed_boost
+        ball.engine = self
+        ball.engine_index = i
+        self.views.append(ball)
+        self.strips.append(ball.breathing_strip)
+        self.count += 1
+
+    def remove_ball(self, ball):
+        """移除彩球（被黑洞吸收时调用）"""
+        i = ball.engine_index
+        if ball.engine is not self or i < 0:
+            return
+        last = self.count - 1
+        if i != last:
+            for array in (self.x, self.y, self.prev_x, self.prev_y, self.vx, self.vy, self.radius, self.boost):
+                array[i] = array[last]
+            moved = self.views[last]
+            self.views[i] = moved
+            self.strips[i] = self.strips[last]
+            moved.engine_index = i
+        self.views.pop()
+        self.strips.pop()
+        self.count -= 1
+        ball.engine = None
+        ball.engine_index = -1
+
+    def clear(self):
+        """移除所有彩球"""
+        for ball in self.views:
+            ball.engine = None
+            ball.engine_index = -1
+        self.views = []
+        self.strips = []
+        self.count = 0
+        self._synced = True
+
+    def step(self, width, height):
+        """
+        推进一个模拟步：移动 + 边界反弹 + 反弹加速 + 限速（与 Ball.update 规则一致）
+
+        Args:
+            width: 窗口宽度
+            height: 窗口高度
+        """
+        n = self.count
+        if n == 0:
+            return
+        self._synced = False
+        x = self.x[:n]
+        y = self.y[:n]
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        r = self.radius[:n]
+
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        x += vx * (SPEED_MULTIPLIER * SIM_TICK_SCALE)
+        y += vy * (SPEED_MULTIPLIER * SIM_TICK_SCALE)
+
+        bounce_x = (x - r <= 0) | (x + r >= width)
+        bounce_y = (y - r <= 0) | (y + r >= height)
+        np.negative(vx, out=vx, where=bounce_x)
+        np.negative(vy, out=vy, where=bounce_y)
+
+        bounced = bounce_x | bounce_y
+        if bounced.any():
+            boost = self.boost[:n]
+            np.multiply(vx, boost, out=vx, where=bounced)
+            np.multiply(vy, boost, out=vy, where=bounced)
+            # 速度只会在反弹时变大，因此直接整体限速即可
+            np.clip(vx, -MAX_SPEED, MAX_SPEED, out=vx)
+            np.clip(vy, -MAX_SPEED, MAX_SPEED, out=vy)
+
+    def sync_sprites(self):
+        """
+        把数组中的位置（含上一步位置）和速度写回 Ball 精灵
+        只在需要读取精灵状态时调用（控制器），同一步内重复调用不会重复写
+        """
+        if self._synced:
+            return
+        n = self.count
+        xs = self.x[:n].tolist()
+        ys = self.y[:n].tolist()
+        prev_xs = self.prev_x[:n].tolist()
+        prev_ys = self.prev_y[:n].tolist()
+        vxs = self.vx[:n].tolist()
+        vys = self.vy[:n].tolist()
+        for ball, x, y, prev_x, prev_y, vx, vy in zip(self.views, xs, ys, prev_xs, prev_ys, vxs, vys):
+            ball.x = x
+            ball.y = y
+            ball.prev_x = prev_x
+            ball.prev_y = prev_y
+            # 控制器按精灵的速度预判彩球走向
+            ball.speed_x = vx
+            ball.speed_y = vy
+            ball.rect.center = (x, y)
+        self._synced = True
+
+    # ========== 碰撞检测（与 game_logic 的逐精灵判断规则一致） ==========
+    def _hits(self, ax0, ay0, ax1, ay1, radius, swept, indices=None):
+        """
+        圆 A 从 (ax0, ay0) 移动到 (ax1, ay1) 期间与哪些彩球相碰（与 collision.swept_circles_hit 逐项相同）
+
+        Args:
+            ax0, ay0, ax1, ay1, radius: 圆 A 的起点、终点和半径（标量，或与 indices 等长的数组）
+            swept: 是否按本步走过的线段判断
+            indices: 只判断这些下标的彩球，None 为全部
+
+        Returns:
+            numpy.ndarray: 布尔数组
+        """
+        if indices is None:
+            indices = slice(0, self.count)
+        x = self.x[indices]
+        y = self.y[indices]
+        radius_sum = self.radius[indices] + radius
+        if not swept:
+            dx = x - ax1
+            dy = y - ay1
+        else:
+            prev_x = self.prev_x[indices]
+            prev_y = self.prev_y[indices]
+            dx = prev_x - ax0
+            dy = prev_y - ay0
+            vx = (x - prev_x) - (ax1 - ax0)
+            vy = (y - prev_y) - (ay1 - ay0)
+            speed_sq = vx * vx + vy * vy
+            moving = speed_sq > 0
+            t = np.zeros(speed_sq.shape)
+            np.divide(-(dx * vx + dy * vy), speed_sq, out=t, where=moving)
+            np.clip(t, 0, 1, out=t)
+            dx = dx + vx * t
+            dy = dy + vy * t
+        return dx * dx + dy * dy <= radius_sum * radius_sum
+
+    def find_hole_hits(self, holes, swept=True):
+        """
+        本步进洞的彩球（一个彩球只算进第一个碰到的黑洞）
+
+        Args:
+            holes: 黑洞精灵列表（按检测顺序）
+
+        Returns:
+            list: [(黑洞, [Ball 精灵, ...]), ...]，只包含有彩球进入的黑洞
+        """
+        n = self.count
+        if n == 0 or not holes:
+            return []
+        hole_x = np.array([hole.x for hole in holes], dtype=np.float64)
+        hole_y = np.array([hole.y for hole in holes], dtype=np.float64)
+        hole_radius = np.array([hole.radius for hole in holes], dtype=np.float64)
+
+        # 粗筛：彩球本步扫过的包围盒与黑洞的包围盒相交，near[黑洞, 彩球]
+        x = self.x[:n]
+        y = self.y[:n]
+        radius = self.radius[:n]
+        if swept:
+            low_x = np.minimum(x, self.prev_x[:n]) - radius
+            high_x = np.maximum(x, self.prev_x[:n]) + radius
+            low_y = np.minimum(y, self.prev_y[:n]) - radius
+            high_y = np.maximum(y, self.prev_y[:n]) + radius
+        else:
+            low_x, high_x = x - radius, x + radius
+            low_y, high_y = y - radius, y + radius
+        near = (low_x <= (hole_x + hole_radius)[:, None]) & (high_x >= (hole_x - hole_radius)[:, None])
+        near &= (low_y <= (hole_y + hole_radius)[:, None]) & (high_y >= (hole_y - hole_radius)[:, None])
+        pair_holes, pair_balls = np.nonzero(near)
+        if len(pair_balls) == 0:
+            return []
+
+        # 精确判断只对候选对做
+        hx = hole_x[pair_holes]
+        hy = hole_y[pair_holes]
+        hits = self._hits(hx, hy, hx, hy, hole_radius[pair_holes], swept, pair_balls)
+        pair_holes = pair_holes[hits]
+        pair_balls = pair_balls[hits]
+        if len(pair_balls) == 0:
+            return []
+
+        # 候选对按黑洞顺序排列，每个彩球第一次出现即它碰到的第一个黑洞
+        balls, first = np.unique(pair_balls, return_index=True)
+        captured = {}
+        for hole_index, ball_index in zip(pair_holes[first].tolist(), balls.tolist()):
+            captured.setdefault(hole_index, []).append(self.views[ball_index])
+        return [(holes[hole_index], captured[hole_index]) for hole_index in sorted(captured)]
+
+    def find_player_hit(self, player, swept=True):
+        """
+        主球本步是否碰到彩球
+
+        Returns:
+            Ball or None: 碰到的一个彩球
+        """
+        if self.count == 0:
+            return None
+        hits = self._hits(player.prev_x, player.prev_y, player.x, player.y, player.radius, swept)
+        index = int(hits.argmax())
+        return self.views[index] if hits[index] else None
+
+    def balls_within(self, x, y, distance):
+        """当前位置与 (x, y) 的边缘距离不超过 distance 的彩球（Ball 精灵集合）"""
+        if self.count == 0:
+            return set()
+        hits = self._hits(x, y, x, y, distance, False)
+        return {self.views[i] for i in np.flatnonzero(hits).tolist()}
+
+    # ========== 绘制 ==========
+    def interpolate(self, alpha):
+        """
+        设置绘制位置为上一步和当前步之间的插值（只影响 draw，不改模拟状态）
+
+        Args:
+            alpha: 插值系数，0 为上一步位置，1 为当前位置
+        """
+        self.render_alpha = alpha
+
+    def draw(self, surface, breathing_frame, return_rects=False):
+        """
+        直接从数组批量绘制所有彩球（不经过 Ball 精灵）
+
+        Args:
+            surface: 目标 Surface
+            breathing_frame: 当前呼吸帧序号（所有彩球共用）
+            return_rects: 是否返回画过的区域（脏矩形渲染用）
+
+        Returns:
+            list or None: 画过的区域
+        """
+        n = self.count
+        if n == 0:
+            return [] if return_rects else None
+        alpha = self.render_alpha
+        prev_x = self.prev_x[:n]
+        prev_y = self.prev_y[:n]
+        r = self.radius[:n]
+        cx = prev_x + (self.x[:n] - prev_x) * alpha
+        cy = prev_y + (self.y[:n] - prev_y) * alpha
+        # 与 Rect.center 赋值一致：圆心四舍五入（远离 0）后减去半径
+        lefts = (np.trunc(cx + np.copysign(0.5, cx)) - r).astype(np.int64).tolist()
+        tops = (np.trunc(cy + np.copysign(0.5, cy)) - r).astype(np.int64).tolist()
+        # 所有贴图序列长度相同（BREATHING_ALPHAS），同一帧取同一下标
+        frame = breathing_frame % len(self.strips[0])
+        images = [strip[frame] for strip in self.strips]
+        return surface.blits(zip(images, zip(lefts, tops)), doreturn=return_rects)
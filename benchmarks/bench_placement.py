@@ -0,0 +1,58 @@
+"""
+出生点放置基准测试
+统计不同实体数量下关卡初始化（黑洞 + 彩球 + 主球）的耗时和约束放宽情况
+
+运行：python benchmarks/bench_placement.py [--counts 10 100 10000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DIFFICULTY_CONFIG, get_window_size  # noqa: E402
+from placement import place_points, find_safe_position  # noqa: E402
+
+
+def setup_level(count, difficulty, rng):
+    """按 reset_game 的约束放置 count 个黑洞、count 个彩球和 1 个主球"""
+    width, height = get_window_size()
+    cfg = DIFFICULTY_CONFIG[difficulty]
+    hole_radius = cfg["hole_radius"]
+    ball_radius = cfg["ball_radius"]
+    player_radius = 30
+
+    holes, hole_report = place_points(count, width, height, hole_radius * 2, hole_radius * 3, rng=rng)
+    hole_obstacles = [(x, y, (ball_radius + hole_radius) * 2) for x, y in holes]
+    balls, ball_report = place_points(count, width, height, ball_radius * 2, obstacles=hole_obstacles, rng=rng)
+    obstacles = [(x, y, player_radius + ball_radius + 500) for x, y in balls]
+    obstacles.extend((x, y, player_radius + hole_radius + 50) for x, y in holes)
+    _, is_safe = find_safe_position(width, height, player_radius * 2, obstacles, rng=rng)
+    return hole_report, ball_report, is_safe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="出生点放置基准测试")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 10000])
+    parser.add_argument("--difficulty", default="hell", choices=list(DIFFICULTY_CONFIG))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'数量':>8} {'平均耗时(ms)':>14} {'最长耗时(ms)':>14} {'黑洞放宽':>8} {'彩球放宽':>8} {'超出容量':>8} {'主球安全':>8}")
+    for count in args.counts:
+        rng = random.Random(args.seed)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hole_report, ball_report, is_safe = setup_level(count, args.difficulty, rng)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{count:>8} {sum(timings) / len(timings):>14.2f} {max(timings):>14.2f} "
+              f"{hole_report['relaxed']:>8} {ball_report['relaxed']:>8} "
+              f"{str(hole_report['infeasible']):>8} {str(is_safe):>8}")
+
+
+if __name__ == "__main__":
+    main()
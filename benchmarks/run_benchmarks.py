@@ -0,0 +1,243 @@
+"""
+热点路径基准测试
+在无头模式下按不同实体数量统计更新、碰撞检测、关卡初始化、精灵绘制和菜单绘制的耗时，
+结果保存为 JSON，并可与保存的基线对比，超过阈值的变慢视为性能回退（退出码 1）
+
+运行：python benchmarks/run_benchmarks.py [--counts 3 12 1000 10000] [--output result.json]
+                                          [--baseline baseline.json] [--threshold 0.15]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+import config  # noqa: E402
+
+DEFAULT_COUNTS = [3, 12, 1000, 10000]
+
+
+def measure(func, min_time=0.2, repeat=5, max_number=10000, setup=None):
+    """
+    计时：先估算每轮调用次数，使每轮约 min_time / repeat 秒，再取 repeat 轮的中位数
+
+    Args:
+        setup: 每次调用前执行、不计时的准备函数（恢复被 func 修改的场景），
+            指定时逐次计时，每次调用都从同样的场景开始
+
+    Returns:
+        dict: 每次调用的 median_us/min_us/mean_us 和总调用次数
+    """
+    def run(number):
+        if setup is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            return time.perf_counter() - start
+        elapsed = 0.0
+        for _ in range(number):
+            setup()
+            start = time.perf_counter()
+            func()
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    once = max(run(1), 1e-7)
+    number = max(1, min(max_number, int(min_time / repeat / once)))
+    samples = [run(number) / number * 1e6 for _ in range(repeat)]
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "mean_us": statistics.mean(samples),
+        "calls": number * repeat + 1,
+    }
+
+
+def _quiet_reset(difficulty, ball_count):
+    import game_logic
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_logic.reset_game(difficulty, ball_count=ball_count, seed=0, record=False)
+
+
+def _scene_restorer(player_pos):
+    """
+    记下当前场景，返回恢复函数：把进洞移除的彩球和黑洞放回精灵组，主球放到 player_pos，
+    并开始新的一步（下一次碰撞检测重建空间哈希）
+    """
+    import game_logic
+    ball_list = game_logic.balls.sprites()
+    hole_list = game_logic.holes.sprites()
+    player = game_logic.get_player_ball()
+
+    def restore():
+        for ball in ball_list:
+            if not ball.alive():
+                ball.add(game_logic.all_sprites, game_logic.balls)
+                if game_logic._ball_engine is not None:
+                    game_logic._ball_engine.add_ball(ball)
+        for hole in hole_list:
+            if not hole.alive():
+                hole.add(game_logic.all_sprites, game_logic.holes)
+        player.x, player.y = player.prev_x, player.prev_y = player_pos
+        player.rect.center = player_pos
+        game_logic._update_tick += 1
+    return restore
+
+
+# ========== 各基准项 ==========
+def bench_reset(difficulty, count, args):
+    """reset_game（含出生点放置）"""
+    return measure(lambda: _quiet_reset(difficulty, count), args.min_time, args.repeat)
+
+
+def bench_update(difficulty, count, args):
+    """update_all_sprites（Ball.update 或物理后端）"""
+    import game_logic
+    _quiet_reset(difficulty, count)
+    return measure(lambda: game_logic.update_all_sprites(config.SIM_TICK_MS), args.min_time, args.repeat)
+
+
+def bench_ball_hole(difficulty, count, args):
+    """check_ball_hole_collision（含每步一次的空间哈希重建）"""
+    import game_logic
+    _quiet_reset(difficulty, count)
+    width, height = config.get_window_size()
+    # 每次都从刚开局的场景开始，否则第一次进洞之后测的都是少了彩球和黑洞的场景
+    return measure(game_logic.check_ball_hole_collision, args.min_time, args.repeat,
+                   setup=_scene_restorer((width // 2, height // 2)))
+
+
+def bench_player(difficulty, count, args):
+    """check_player_collision（含每步一次的空间哈希重建）"""
+    import game_logic
+    _quiet_reset(difficulty, count)
+    width, height = config.get_window_size()
+    # 主球固定放在窗口中央（彩球分布在整个窗口，查询范围内有代表性的彩球数）
+    return measure(game_logic.check_player_collision, args.min_time, args.repeat,
+                   setup=_scene_restorer((width // 2, height // 2)))
+
+
+def bench_draw(difficulty, count, args):
+    """draw_sprites（黑洞、彩球、主球）"""
+    import game_logic
+    _quiet_reset(difficulty, count)
+    screen = config.get_screen()
+    return measure(lambda: game_logic.draw_sprites(screen), args.min_time, args.repeat)
+
+
+def bench_difficulty_menu(difficulty, count, args):
+    """draw_difficulty_buttons（难度选择界面的按钮）"""
+    from ui import draw_difficulty_buttons
+    return measure(lambda: draw_difficulty_buttons(False), args.min_time, args.repeat)
+
+
+def bench_achievement_list(difficulty, count, args):
+    """draw_achievement_list（count 个成就，一半已解锁）"""
+    from achievement_system import AchievementSystem
+    system = AchievementSystem()
+    template = next(iter(system.achievements.values()))
+    system.achievements = {}
+    for i in range(count):
+        key = f"bench_{i}"
+        system.achievements[key] = dict(template, id=key, name=f"成就 {i}", unlocked=i % 2 == 0)
+    screen = config.get_screen()
+    width, _ = config.get_window_size()
+    return measure(lambda: system.draw_achievement_list(screen, width // 2 - 200, 180, show_hidden=True),
+                   args.min_time, args.repeat)
+
+
+# 名称 -> (函数, 是否按实体数量参数化)
+BENCHMARKS = {
+    "reset_game": (bench_reset, True),
+    "update": (bench_update, True),
+    "ball_hole_collision": (bench_ball_hole, True),
+    "player_collision": (bench_player, True),
+    "sprite_draw": (bench_draw, True),
+    "difficulty_menu": (bench_difficulty_menu, False),
+    "achievement_list": (bench_achievement_list, True),
+}
+
+
+def compare(results, baseline, threshold):
+    """
+    与基线对比
+
+    Returns:
+        list: 回退项 [(名称, 基线耗时, 当前耗时, 比例), ...]
+    """
+    regressions = []
+    print(f"\n{'基准项':<36}{'基线(us)':>12}{'当前(us)':>12}{'变化':>10}")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- 回退"
+            regressions.append((key, base["median_us"], result["median_us"], ratio))
+        print(f"{key:<36}{base['median_us']:>12.1f}{result['median_us']:>12.1f}{ratio - 1:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热点路径基准测试")
+    parser.add_argument("--counts", type=int, nargs="+", default=DEFAULT_COUNTS, help="彩球数量")
+    parser.add_argument("--difficulty", default="hell", choices=list(config.DIFFICULTY_CONFIG))
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="只运行指定的基准项")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每项的大致计时时长（秒）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="与基线 JSON 对比")
+    parser.add_argument("--threshold", type=float, default=0.15, help="变慢超过该比例视为回退")
+    args = parser.parse_args()
+
+    config.init(headless=True)
+
+    results = {}
+    print(f"{'基准项':<36}{'中位数(us)':>12}{'最小(us)':>12}{'调用次数':>10}")
+    for name in args.only or BENCHMARKS:
+        func, per_count = BENCHMARKS[name]
+        for count in (args.counts if per_count else [0]):
+            key = f"{name}[{count}]" if per_count else name
+            result = func(args.difficulty, count, args)
+            results[key] = result
+            print(f"{key:<36}{result['median_us']:>12.1f}{result['min_us']:>12.1f}{result['calls']:>10}")
+
+    payload = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "physics_backend": config.PHYSICS_BACKEND,
+            "difficulty": args.difficulty,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）")
+            sys.exit(1)
+        print("\n没有性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+碰撞检测工具模块
+均匀网格（空间哈希）粗筛：只把附近的候选对象交给 collide_circle 精确判断，
+碰撞开销随局部密度变化，而不是随实体总数变化；
+连续（扫掠）碰撞检测：按一个时间步内走过的线段判断，快速移动的球不会穿过黑洞或主球
+"""
+import math
+
+
+class SpatialHash:
+    """
+    空间哈希
+    每个对象按圆心放进一个格子，查询时按 (查询半径 + 最大对象半径) 扩展要扫描的格子
+    """
+
+    def __init__(self, cell_size=64):
+        """
+        Args:
+            cell_size: 格子边长（像素），一般取对象直径的 2 倍左右
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.max_radius = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self, cell_size=None):
+        """清空网格，可同时修改格子大小"""
+        if cell_size is not None:
+            self.cell_size = cell_size
+        self.cells = {}
+        self.max_radius = 0
+        self._count = 0
+
+    def _cell_of(self, x, y):
+        size = self.cell_size
+        return int(x // size), int(y // size)
+
+    def insert(self, sprite):
+        """按精灵当前的 rect.center 和 radius 放入网格"""
+        x, y = sprite.rect.center
+        key = self._cell_of(x, y)
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [sprite]
+        else:
+            bucket.append(sprite)
+        if sprite.radius > self.max_radius:
+            self.max_radius = sprite.radius
+        self._count += 1
+
+    def rebuild(self, sprites):
+        """用一组精灵重新建立网格"""
+        self.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def remove(self, sprite):
+        """移除精灵（必须在它移动之前调用，按当前位置查找格子）"""
+        x, y = sprite.rect.center
+        bucket = self.cells.get(self._cell_of(x, y))
+        if bucket and sprite in bucket:
+            bucket.remove(sprite)
+            self._count -= 1
+
+    def query(self, x, y, radius):
+        """
+        查询可能与圆 (x, y, radius) 相交的候选对象
+
+        Args:
+            x: 圆心 x
+            y: 圆心 y
+            radius: 查询半径
+
+        Returns:
+            list: 候选对象（需要再做精确判断）
+        """
+        reach = radius + self.max_radius
+        size = self.cell_size
+        min_cx = int(math.floor((x - reach) / size))
+        max_cx = int(math.floor((x + reach) / size))
+        min_cy = int(math.floor((y - reach) / size))
+        max_cy = int(math.floor((y + reach) / size))
+
+        cells = self.cells
+        candidates = []
+        # 查询范围比已占用的格子还多时，直接遍历已占用的格子
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(cells):
+            for (cx, cy), bucket in cells.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    candidates.extend(bucket)
+            return candidates
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    candidates.extend(bucket)
+        return candidates
+
+    def iter_buckets_near(self, x, y, reach):
+        """
+        从 (x, y) 所在格子开始一圈一圈向外，逐个返回距离 reach 以内的格子里的对象列表，
+        便于调用方找到足够近的对象后提前停止
+
+        Args:
+            x: 圆心 x
+            y: 圆心 y
+            reach: 搜索距离（与 query 不同，不会再加上最大对象半径）
+        """
+        size = self.cell_size
+        center_cx, center_cy = self._cell_of(x, y)
+        min_cx = int(math.floor((x - reach) / size))
+        max_cx = int(math.floor((x + reach) / size))
+        min_cy = int(math.floor((y - reach) / size))
+        max_cy = int(math.floor((y + reach) / size))
+        max_ring = max(center_cx - min_cx, max_cx - center_cx, center_cy - min_cy, max_cy - center_cy)
+
+        cells = self.cells
+        for ring in range(max_ring + 1):
+            for cx in range(max(min_cx, center_cx - ring), min(max_cx, center_cx + ring) + 1):
+                on_edge_x = abs(cx - center_cx) == ring
+                for cy in range(max(min_cy, center_cy - ring), min(max_cy, center_cy + ring) + 1):
+                    # 只遍历这一圈的格子
+                    if not on_edge_x and abs(cy - center_cy) != ring:
+                        continue
+                    bucket = cells.get((cx, cy))
+                    if bucket:
+                        yield bucket
+
+
+def swept_circles_hit(a_start, a_end, b_start, b_end, radius_sum):
+    """
+    两个圆在一个时间步内各自从起点匀速直线运动到终点，判断期间是否相碰
+
+    按相对运动求最近距离：d(t) = d0 + t * v，t 取 [0, 1] 内使 |d(t)| 最小的值
+
+    Args:
+        a_start: 圆 A 起点 (x, y)
+        a_end: 圆 A 终点 (x, y)
+        b_start: 圆 B 起点 (x, y)
+        b_end: 圆 B 终点 (x, y)
+        radius_sum: 两圆半径之和
+
+    Returns:
+        bool: 距离最小时 <= radius_sum 即视为相碰（与 collide_circle 一致）
+    """
+    dx = b_start[0] - a_start[0]
+    dy = b_start[1] - a_start[1]
+    vx = (b_end[0] - b_start[0]) - (a_end[0] - a_start[0])
+    vy = (b_end[1] - b_start[1]) - (a_end[1] - a_start[1])
+    speed_sq = vx * vx + vy * vy
+    if speed_sq > 0:
+        t = -(dx * vx + dy * vy) / speed_sq
+        if t > 1:
+            t = 1
+        elif t < 0:
+            t = 0
+        dx += vx * t
+        dy += vy * t
+    return dx * dx + dy * dy <= radius_sum * radius_sum
@@ -1,6 +1,7 @@
 import pygame
 import sys
 import os
+from collections import OrderedDict
 
 # ================== 1. 获取资源绝对路径 ==================
 def get_resource_path(relative_path):
@@ -18,13 +19,22 @@ def get_resource_path(relative_path):
 BACKGROUND_GIF_PATH = get_resource_path("bg1.jpg")  # 可替换为 JPG/PNG/GIF
 _ORIGINAL_BACKGROUND = None
 _CURRENT_BACKGROUND = None
-gif_frames = []
-gif_delays = []
+_background_source = None  # 流式解码的背景帧数据源（BackgroundSource）
+gif_frame_count = 0
 current_frame_idx = 0
 frame_timer = 0
 SPEED_FACTOR = 1  # GIF原速播放
+BACKGROUND_RING_SIZE = 8  # 最多保留的已解码原始帧数
+
+# 缩放后背景帧缓存：键为 (帧序号, 宽, 高)，按字节预算做 LRU 淘汰
+# 预算只够几个窗口尺寸的若干帧，常驻内存不随 GIF 长度增长（960x540 约 23 帧，1080p 约 5 帧）
+SCALED_BACKGROUND_CACHE_BUDGET = 48 * 1024 * 1024
+_scaled_background_cache = OrderedDict()
+_scaled_background_bytes = 0
 
 # 全局提示变量
+TIP_DURATION = 2000  # 底部提示显示时长（毫秒）
+TOP_TIP_DURATION = 3000  # 顶部提示显示时长（毫秒）
 tip_text = ""
 tip_color = (255, 255, 255)
 tip_show_time = 0
@@ -40,65 +50,165 @@ MIN_ALPHA = 170
 MAX_ALPHA = 255
 
 # ================== 3. 初始化 pygame ==================
-pygame.init()
-pygame.font.init()
+# 导入本模块不再有副作用：窗口、字体和背景都在 init() 中显式初始化
 
 # 窗口基础配置
 _INIT_WIDTH = 960
 _INIT_HEIGHT = 540
 WIDTH = _INIT_WIDTH
 HEIGHT = _INIT_HEIGHT
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption("躲避球")
+SCREEN = None
+HEADLESS = False
+_initialized = False
+
+
+def init(headless=False, load_background=True):
+    """
+    初始化 pygame、创建窗口并加载背景（重复调用无副作用）
+
+    Args:
+        headless: 无头模式，使用 SDL 的 dummy 视频驱动，不弹出窗口
+            （测试、基准测试和批量模拟使用）
+        load_background: 是否加载背景图片，不加载时使用灰色兜底背景
+
+    Returns:
+        pygame.Surface: 窗口 Surface
+    """
+    global SCREEN, HEADLESS, _initialized
+    if _initialized:
+        return SCREEN
+
+    HEADLESS = headless
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    pygame.font.init()
+
+    SCREEN = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("躲避球")
+    _initialized = True
+
+    if load_background:
+        _load_background()
+    else:
+        _use_fallback_background()
+    return SCREEN
+
+
+def is_initialized():
+    return _initialized
+
+
+def get_data_path(filename):
+    """
+    存档文件路径（兼容exe和开发环境）：打包的 exe 保存到用户目录，开发环境保存在当前目录
+
+    Args:
+        filename: 文件名
+
+    Returns:
+        str: 文件路径
+    """
+    try:
+        if getattr(sys, 'frozen', False):
+            if sys.platform == 'win32':
+                # Windows: 保存到用户的AppData/Roaming目录
+                save_dir = os.path.join(os.getenv('APPDATA'), '躲避球游戏')
+            else:
+                # macOS/Linux: 保存到用户home目录
+                save_dir = os.path.join(os.path.expanduser('~'), '.躲避球游戏')
+            os.makedirs(save_dir, exist_ok=True)
+            return os.path.join(save_dir, filename)
+    except Exception:
+        pass
+    return filename
+
+
+def get_screen():
+    return SCREEN
 
 # ================== 4. GIF/图片背景加载 ==================
-try:
-    from PIL import Image
-
-    with Image.open(BACKGROUND_GIF_PATH) as img:
-        try:
-            n_frames = img.n_frames  # 多帧 GIF
-        except AttributeError:
-            n_frames = 1  # 单帧 JPG/PNG 或单帧 GIF
-
-        for frame_idx in range(n_frames):
-            if n_frames > 1:
-                img.seek(frame_idx)
-            frame = img.convert("RGBA")
-            pygame_frame = pygame.image.fromstring(frame.tobytes(), frame.size, frame.mode).convert_alpha()
-            gif_frames.append(pygame_frame)
-            original_delay = img.info.get("duration", 100)
-            delayed_time = original_delay * SPEED_FACTOR
-            gif_delays.append(delayed_time)
-
-    if gif_frames:
-        _ORIGINAL_BACKGROUND = gif_frames
-        _CURRENT_BACKGROUND = pygame.transform.smoothscale(gif_frames[0], (WIDTH, HEIGHT))
+def get_scaled_background(frame_idx, width, height):
+    """
+    获取缩放到指定窗口尺寸的背景帧（带缓存）
+
+    每个 (帧序号, 宽, 高) 只 smoothscale 一次，之后播放 GIF 或回到用过的窗口尺寸
+    都只是查表；缓存超出 SCALED_BACKGROUND_CACHE_BUDGET 时淘汰最久未用的帧
+
+    Args:
+        frame_idx: GIF 帧序号，None 表示静态兜底背景
+        width: 目标宽度
+        height: 目标高度
+
+    Returns:
+        pygame.Surface: 缩放后的背景
+    """
+    global _scaled_background_bytes
+    key = (frame_idx, width, height)
+    surface = _scaled_background_cache.get(key)
+    if surface is not None:
+        _scaled_background_cache.move_to_end(key)
+        return surface
+
+    if frame_idx is None:
+        surface = pygame.transform.scale(_ORIGINAL_BACKGROUND, (width, height))
     else:
-        _ORIGINAL_BACKGROUND = pygame.Surface((_INIT_WIDTH, _INIT_HEIGHT))
-        _ORIGINAL_BACKGROUND.fill((200, 200, 200))
-        _CURRENT_BACKGROUND = _ORIGINAL_BACKGROUND.copy()
+        surface = pygame.transform.smoothscale(_background_source.get_frame(frame_idx), (width, height))
+
+    nbytes = surface.get_pitch() * surface.get_height()
+    _scaled_background_cache[key] = surface
+    _scaled_background_bytes += nbytes
+    # 至少保留当前这一帧
+    while len(_scaled_background_cache) > 1 and _scaled_background_bytes > SCALED_BACKGROUND_CACHE_BUDGET:
+        _, old_surface = _scaled_background_cache.popitem(last=False)
+        _scaled_background_bytes -= old_surface.get_pitch() * old_surface.get_height()
+    return surface
+
+
+# 只解码第一帧，其余帧在播放时按需解码
+def _load_background():
+    global _background_source, gif_frame_count, _ORIGINAL_BACKGROUND, _CURRENT_BACKGROUND
+    try:
+        from background_source import BackgroundSource
 
-except Exception as e:
-    print(f"GIF/图片加载失败：{e}，使用灰色兜底")
+        _background_source = BackgroundSource(BACKGROUND_GIF_PATH, BACKGROUND_RING_SIZE, SPEED_FACTOR)
+        gif_frame_count = _background_source.frame_count
+        _ORIGINAL_BACKGROUND = _background_source
+        _CURRENT_BACKGROUND = get_scaled_background(0, WIDTH, HEIGHT)
+
+    except Exception as e:
+        print(f"GIF/图片加载失败：{e}，使用灰色兜底")
+        _use_fallback_background()
+
+
+def _use_fallback_background():
+    global _background_source, gif_frame_count, _ORIGINAL_BACKGROUND, _CURRENT_BACKGROUND
+    _background_source = None
+    gif_frame_count = 0
     _ORIGINAL_BACKGROUND = pygame.Surface((_INIT_WIDTH, _INIT_HEIGHT))
     _ORIGINAL_BACKGROUND.fill((200, 200, 200))
-    _CURRENT_BACKGROUND = _ORIGINAL_BACKGROUND.copy()
+    _CURRENT_BACKGROUND = get_scaled_background(None, WIDTH, HEIGHT)
 
 
 # ================== 5. 核心函数 ==================
 def update_gif_frame(dt):
     """
     更新 GIF 或背景帧
+
+    Returns:
+        bool: 背景是否换到了新的一帧（脏矩形模式据此整屏重绘）
     """
     global current_frame_idx, frame_timer, _CURRENT_BACKGROUND
-    if not gif_frames:
-        return
+    if gif_frame_count <= 1:
+        return False
     frame_timer += dt
-    if frame_timer >= gif_delays[current_frame_idx]:
-        current_frame_idx = (current_frame_idx + 1) % len(gif_frames)
+    if frame_timer >= _background_source.get_delay(current_frame_idx):
+        current_frame_idx = (current_frame_idx + 1) % gif_frame_count
         frame_timer = 0
-        _CURRENT_BACKGROUND = pygame.transform.smoothscale(gif_frames[current_frame_idx], (WIDTH, HEIGHT))
+        _CURRENT_BACKGROUND = get_scaled_background(current_frame_idx, WIDTH, HEIGHT)
+        return True
+    return False
 
 
 def get_window_size():
@@ -113,11 +223,12 @@ def update_window(new_width, new_height):
     global WIDTH, HEIGHT, SCREEN, _CURRENT_BACKGROUND
     WIDTH = max(400, new_width)
     HEIGHT = max(300, new_height)
-    SCREEN = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-    if gif_frames:
-        _CURRENT_BACKGROUND = pygame.transform.smoothscale(gif_frames[current_frame_idx], (WIDTH, HEIGHT))
+    if _initialized:
+        SCREEN = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+    if gif_frame_count:
+        _CURRENT_BACKGROUND = get_scaled_background(current_frame_idx, WIDTH, HEIGHT)
     else:
-        _CURRENT_BACKGROUND = pygame.transform.scale(_ORIGINAL_BACKGROUND, (WIDTH, HEIGHT))
+        _CURRENT_BACKGROUND = get_scaled_background(None, WIDTH, HEIGHT)
 
 
 # ================== 6. 提示框绘制函数 ==================
@@ -135,31 +246,44 @@ def set_top_tip(text, color=(255, 255, 255)):
     top_tip_show_time = pygame.time.get_ticks()
 
 
+def get_tip_deadline():
+    """当前提示（含顶部提示）最早的消失时刻（pygame 毫秒时钟），没有提示时返回 None"""
+    deadlines = []
+    if tip_text:
+        deadlines.append(tip_show_time + TIP_DURATION + 1)
+    if top_tip_text:
+        deadlines.append(top_tip_show_time + TOP_TIP_DURATION + 1)
+    return min(deadlines, default=None)
+
+
+def get_time_to_next_gif_frame():
+    """距离背景下一次换帧的毫秒数，静态背景返回 None"""
+    if gif_frame_count <= 1:
+        return None
+    return max(0, _background_source.get_delay(current_frame_idx) - frame_timer)
+
+
 def draw_tip(screen):
     global tip_text, tip_color, tip_show_time, top_tip_text, top_tip_color, top_tip_show_time
 
-    TIP_DURATION = 2000
-    TOP_TIP_DURATION = 3000
+    from font_cache import get_font
+    from dirty_rect import mark_dirty
+
     current_time = pygame.time.get_ticks()
 
     # 底部提示
     if tip_text and (current_time - tip_show_time) <= TIP_DURATION:
-        try:
-            font = pygame.font.Font(FONT_PATH, 24)
-        except:
-            font = pygame.font.SysFont("simhei", 24)
+        font = get_font(24)
         tip_surface = font.render(tip_text, True, tip_color)
         tip_rect = tip_surface.get_rect(center=(WIDTH // 2, HEIGHT - 50))
         bg_rect = pygame.Rect(tip_rect.x - 10, tip_rect.y - 5, tip_rect.width + 20, tip_rect.height + 10)
         pygame.draw.rect(screen, (0, 0, 0, 180), bg_rect, border_radius=5)
         screen.blit(tip_surface, tip_rect)
+        mark_dirty(bg_rect)
 
     # 顶部提示
     if top_tip_text and (current_time - top_tip_show_time) <= TOP_TIP_DURATION:
-        try:
-            font = pygame.font.Font(FONT_PATH, 24)
-        except:
-            font = pygame.font.SysFont("simhei", 24)
+        font = get_font(24)
         top_tip_surface = font.render(top_tip_text, True, top_tip_color)
         top_tip_rect = top_tip_surface.get_rect(center=(WIDTH // 2, 60))
         bg_rect = pygame.Rect(top_tip_rect.x - 15, top_tip_rect.y - 8,
@@ -169,6 +293,7 @@ def draw_tip(screen):
         screen.blit(s, (bg_rect.x, bg_rect.y))
         pygame.draw.rect(screen, (255, 215, 0), bg_rect, 2, border_radius=8)
         screen.blit(top_tip_surface, top_tip_rect)
+        mark_dirty(bg_rect)
 
     # 清除已过期提示
     if tip_text and (current_time - tip_show_time) > TIP_DURATION:
@@ -191,8 +316,31 @@ MAX_SPEED = 30
 COLLIDE_RATIO = 1.1
 WIN_LOSE_DELAY = 1000
 TIME_LIMIT = 10000  # 10秒
+DIRTY_RECT_RENDERING = False  # 脏矩形渲染（只刷新变化区域），默认关闭
 FONT_PATH = r"C:\WINDOWS\FONTS\SIMSUN.TTC"
 SPEED_MULTIPLIER = 1.2
+# 固定时间步模拟：物理按 SIM_TICK_RATE 次/秒推进，与渲染帧率无关
+BASE_TICK_RATE = 60  # 彩球速度等参数按每秒60次更新标定
+SIM_TICK_RATE = 60  # 模拟频率，弱机可调低，游戏速度不变
+SIM_TICK_MS = 1000 / SIM_TICK_RATE
+SIM_TICK_SCALE = BASE_TICK_RATE / SIM_TICK_RATE  # 每个模拟步的位移倍率
+MAX_CATCH_UP_STEPS = 5  # 一帧内最多追赶的模拟步数，超出部分直接丢弃（游戏变慢而不是跳帧）
+NEAR_MISS_DISTANCE = 12  # 彩球与主球边缘相距不到这么多像素后又离开，算一次擦身而过（成就用）
+SWEPT_COLLISION = True  # 连续碰撞检测：按一个模拟步内走过的线段判断，防止快球穿透
+FRAME_PACING = True  # 静态界面事件驱动重绘、失焦降帧、游戏中精确控帧
+UNFOCUSED_FPS = 10  # 窗口失去焦点时的帧率
+MINIMIZED_FPS = 2  # 窗口最小化时的帧率
+IDLE_MAX_WAIT_MS = 1000  # 静态界面最长阻塞等待时间（毫秒）
+PRECISE_SLEEP_MARGIN_MS = 2  # 精确控帧：截止前这段时间忙等而不是 sleep
+PROFILER_ENABLED = False  # 帧耗时分析（游戏中按 F3 开关浮层）
+PROFILER_TOGGLE_KEY = pygame.K_F3
+PROFILER_CSV = "frame_profile.csv"  # 退出时导出的逐帧耗时数据（与存档放在同一目录）
+RECORD_REPLAYS = True  # 每局自动录制回放（replay.py）
+REPLAY_DIR = "replays"  # 回放保存目录（与存档在同一位置，见 get_data_path）
+MAX_REPLAYS = 50  # 最多保留的回放数，超出时删除最旧的（0 为不限制）
+PROFILE_STORE_ENABLED = True  # 积分、道具、成就和对局记录保存到 SQLite 档案库（profile_store.py）
+PROFILE_DB = "profile.db"  # 档案库文件名（与成就存档在同一目录）
+PHYSICS_BACKEND = "sprite"  # 彩球物理后端："sprite" 逐个精灵更新 / "numpy" 向量化批量更新 / "kinetic" 事件驱动
 
 DIFFICULTY_CONFIG = {
     "easy": {"ball_count": 3, "ball_radius": 20, "hole_radius": 25, "init_speed": 3},
@@ -213,3 +361,4 @@ class GameState:
     LOSE_DISPLAY = 4
     END_MENU = 5
     ACHIEVEMENTS = 6
+    LEADERBOARD = 7
@@ -0,0 +1,168 @@
+"""
+主球控制器模块
+PlayerBall 和 simulation.Simulation 的主球位置都可以交给控制器给出：鼠标跟随、脚本回放、
+势场避障自动驾驶等；next_positions 支持一次调用为多局并行模拟同时给出位置
+
+控制器读取的状态对象需要提供：player（x/y/radius）、balls（x/y/speed_x/speed_y/radius）、
+width、height、tick（game_logic.LiveGameState 和 Simulation 都满足）
+"""
+import math
+
+import pygame
+
+import config
+from config import SPEED_MULTIPLIER, SIM_TICK_SCALE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class PlayerController:
+    """控制器基类"""
+
+    def reset(self):
+        """新的一局开始时调用"""
+
+    def next_position(self, state):
+        """
+        给出主球本步的位置
+
+        Returns:
+            tuple: (x, y)，返回 None 表示主球保持原位
+        """
+        raise NotImplementedError
+
+    def next_positions(self, states):
+        """批量版本：为多局模拟一次给出位置列表（子类可以向量化实现）"""
+        return [self.next_position(state) for state in states]
+
+    def __call__(self, state):
+        # 可以直接作为 Simulation 的 player_input 使用
+        return self.next_position(state)
+
+
+class MouseController(PlayerController):
+    """跟随鼠标（游戏默认的操作方式）"""
+
+    def next_position(self, state):
+        # 无头模式下没有鼠标，主球保持原位
+        if config.HEADLESS:
+            return None
+        return pygame.mouse.get_pos()
+
+
+class ScriptedController(PlayerController):
+    """
+    按脚本给出位置：positions 为逐步位置列表，或者函数 positions(tick) -> (x, y)
+    列表用完后保持最后一个位置（loop=True 时循环）
+    """
+
+    def __init__(self, positions, loop=False):
+        self.positions = positions
+        self.loop = loop
+
+    def next_position(self, state):
+        positions = self.positions
+        if callable(positions):
+            return positions(state.tick)
+        if not positions:
+            return None
+        tick = state.tick
+        if self.loop:
+            return positions[tick % len(positions)]
+        return positions[min(tick, len(positions) - 1)]
+
+
+class PotentialFieldController(PlayerController):
+    """
+    势场避障：每个彩球（按速度预测 lookahead 步后的位置）产生与距离平方成反比的斥力，
+    四周墙壁也产生斥力，主球每步沿合力方向最多移动 max_step 像素
+
+    next_positions 把多局的彩球拼成一个数组一次算完；没有 NumPy 时逐个计算
+    """
+
+    def __init__(self, max_step=12, lookahead=6, wall_weight=0.5, min_force=1e-4):
+        """
+        Args:
+            max_step: 每步最大移动距离（像素）
+            lookahead: 预测彩球位置的步数
+            wall_weight: 墙壁斥力权重
+            min_force: 合力小于该值时保持不动
+        """
+        self.max_step = max_step
+        self.lookahead = lookahead
+        self.wall_weight = wall_weight
+        self.min_force = min_force
+
+    def _move(self, state, fx, fy):
+        player = state.player
+        norm = math.hypot(fx, fy)
+        if norm < self.min_force:
+            return None
+        r = player.radius
+        x = min(max(player.x + fx / norm * self.max_step, r), state.width - r)
+        y = min(max(player.y + fy / norm * self.max_step, r), state.height - r)
+        return x, y
+
+    def _wall_force(self, state):
+        player = state.player
+        r = player.radius
+        left = max(player.x - r, 1.0)
+        right = max(state.width - r - player.x, 1.0)
+        top = max(player.y - r, 1.0)
+        bottom = max(state.height - r - player.y, 1.0)
+        w = self.wall_weight
+        return w * (1 / left ** 2 - 1 / right ** 2), w * (1 / top ** 2 - 1 / bottom ** 2)
+
+    def next_position(self, state):
+        if np is not None:
+            return self.next_positions([state])[0]
+        player = state.player
+        ahead = self.lookahead * SPEED_MULTIPLIER * SIM_TICK_SCALE
+        fx, fy = self._wall_force(state)
+        for ball in state.balls:
+            dx = player.x - (ball.x + ball.speed_x * ahead)
+            dy = player.y - (ball.y + ball.speed_y * ahead)
+            dist = max(math.hypot(dx, dy), 1e-6)
+            gap = max(dist - player.radius - ball.radius, 1.0)
+            fx += dx / dist / gap ** 2
+            fy += dy / dist / gap ** 2
+        return self._move(state, fx, fy)
+
+    def next_positions(self, states):
+        if np is None:
+            return [self.next_position(state) for state in states]
+        count = len(states)
+        ahead = self.lookahead * SPEED_MULTIPLIER * SIM_TICK_SCALE
+
+        # 所有局的彩球拼成一个数组，game 记录每个彩球属于第几局
+        game, bx, by, radius = [], [], [], []
+        for i, state in enumerate(states):
+            for ball in state.balls:
+                game.append(i)
+                bx.append(ball.x + ball.speed_x * ahead)
+                by.append(ball.y + ball.speed_y * ahead)
+                radius.append(ball.radius)
+        px = np.array([state.player.x for state in states], dtype=np.float64)
+        py = np.array([state.player.y for state in states], dtype=np.float64)
+        pr = np.array([state.player.radius for state in states], dtype=np.float64)
+
+        fx = np.zeros(count)
+        fy = np.zeros(count)
+        if game:
+            game = np.array(game)
+            dx = px[game] - np.array(bx)
+            dy = py[game] - np.array(by)
+            dist = np.maximum(np.hypot(dx, dy), 1e-6)
+            gap = np.maximum(dist - pr[game] - np.array(radius), 1.0)
+            weight = 1.0 / (dist * gap * gap)
+            np.add.at(fx, game, dx * weight)
+            np.add.at(fy, game, dy * weight)
+
+        positions = []
+        for i, state in enumerate(states):
+            wall_x, wall_y = self._wall_force(state)
+            positions.append(self._move(state, fx[i] + wall_x, fy[i] + wall_y))
+        return positions
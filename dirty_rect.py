@@ -0,0 +1,99 @@
+"""
+脏矩形渲染模块
+只恢复/提交本帧和上一帧画过的区域，替代每帧整屏 blit 背景 + display.flip()
+
+用法（每帧）：
+    begin_frame(screen, background)   # 用背景擦掉上一帧画过的区域
+    ... 绘制，并对画过的区域调用 mark_dirty(rect) ...
+    end_frame()                       # display.update(上一帧区域 + 本帧区域)
+
+GIF 背景换帧、窗口缩放等情况调用 request_full_redraw()，下一帧退回整屏重绘
+"""
+import pygame
+
+# 脏区域面积超过窗口面积的这个比例时，直接整屏刷新更划算
+FULL_REDRAW_AREA_RATIO = 0.6
+
+_active = False
+_full_redraw = True
+_screen = None
+_prev_rects = []
+_cur_rects = []
+
+# 统计信息
+dirty_stats = {"frames": 0, "full_redraws": 0, "partial_updates": 0}
+
+
+def is_active():
+    """当前帧是否处于脏矩形模式（未启用时所有 mark_dirty 调用都是空操作）"""
+    return _active
+
+
+def request_full_redraw():
+    """下一帧整屏重绘（背景换帧、窗口缩放、切换界面时调用）"""
+    global _full_redraw
+    _full_redraw = True
+
+
+def mark_dirty(rect):
+    """
+    记录本帧画过的区域
+
+    Args:
+        rect: pygame.Rect 或 (x, y, w, h)
+    """
+    if _active and rect:
+        _cur_rects.append(pygame.Rect(rect))
+
+
+def mark_dirty_rects(rects):
+    """批量记录画过的区域（例如 Group.draw 的返回值）"""
+    if _active and rects:
+        for rect in rects:
+            if rect:
+                _cur_rects.append(pygame.Rect(rect))
+
+
+def begin_frame(screen, background):
+    """
+    开始一帧：整屏重绘时铺满背景，否则只用背景擦掉上一帧画过的区域
+
+    Args:
+        screen: 窗口 Surface
+        background: 与窗口同尺寸的背景 Surface
+    """
+    global _active, _screen, _cur_rects
+    _active = True
+    _screen = screen
+    _cur_rects = []
+    if _full_redraw or background.get_size() != screen.get_size():
+        screen.blit(background, (0, 0))
+        request_full_redraw()
+    else:
+        for rect in _prev_rects:
+            screen.blit(background, rect, rect)
+
+
+def end_frame():
+    """结束一帧：把需要更新的区域提交到屏幕"""
+    global _full_redraw, _prev_rects
+    dirty_stats["frames"] += 1
+    screen_rect = _screen.get_rect()
+    update_rects = [r.clip(screen_rect) for r in _prev_rects + _cur_rects]
+    update_rects = [r for r in update_rects if r.width and r.height]
+
+    if not _full_redraw:
+        area = sum(r.width * r.height for r in update_rects)
+        if area > screen_rect.width * screen_rect.height * FULL_REDRAW_AREA_RATIO:
+            _full_redraw = True
+
+    if _full_redraw:
+        pygame.display.flip()
+        dirty_stats["full_redraws"] += 1
+    else:
+        if update_rects:
+            pygame.display.update(update_rects)
+        dirty_stats["partial_updates"] += 1
+
+    _prev_rects = _cur_rects
+    _full_redraw = False
@@ -0,0 +1,178 @@
+"""
+字体缓存模块
+进程内共享的字体注册表：字体路径只解析一次，Font 对象按 (字体, 字号) 做 LRU 缓存；
+同时缓存渲染好的文字 Surface，静态/半静态文字不再每帧重新光栅化
+"""
+import os
+from collections import OrderedDict
+
+import pygame
+
+# 缓存的 Font 对象上限（项目里常用字号只有十来种，留足余量）
+FONT_CACHE_SIZE = 32
+
+# 备用系统字体名
+FALLBACK_FONT_NAME = "simhei"
+
+# 文字 Surface 缓存的内存预算（字节）
+TEXT_CACHE_BUDGET = 4 * 1024 * 1024
+
+_UNRESOLVED = object()
+_default_face = _UNRESOLVED
+_font_cache = OrderedDict()
+_text_cache = OrderedDict()
+_text_cache_bytes = 0
+
+# 统计信息：用于确认稳定运行时每帧不再构造字体
+font_stats = {"hits": 0, "misses": 0, "constructions": 0, "evictions": 0}
+text_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _ensure_font_init():
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+
+def resolve_default_face():
+    """
+    解析默认字体文件（只在第一次调用时真正查找）
+
+    优先使用 config.FONT_PATH，不存在或无法加载时退回系统字体 simhei，
+    再找不到则使用 pygame 内置默认字体（None）
+
+    Returns:
+        str or None: 字体文件路径，None 表示 pygame 默认字体
+    """
+    global _default_face
+    if _default_face is not _UNRESOLVED:
+        return _default_face
+
+    _ensure_font_init()
+    from config import FONT_PATH
+
+    face = None
+    if FONT_PATH and os.path.exists(FONT_PATH):
+        try:
+            pygame.font.Font(FONT_PATH, 12)
+            face = FONT_PATH
+        except Exception:
+            face = None
+    if face is None:
+        face = pygame.font.match_font(FALLBACK_FONT_NAME)
+
+    _default_face = face
+    return _default_face
+
+
+def get_font(size, face=_UNRESOLVED):
+    """
+    获取指定字号的字体（带 LRU 缓存）
+
+    Args:
+        size: 字号
+        face: 字体文件路径，默认使用解析好的默认字体
+
+    Returns:
+        pygame.font.Font: 缓存的字体对象
+    """
+    if face is _UNRESOLVED:
+        face = resolve_default_face()
+    key = (face, size)
+    font = _font_cache.get(key)
+    if font is not None:
+        _font_cache.move_to_end(key)
+        font_stats["hits"] += 1
+        return font
+
+    font_stats["misses"] += 1
+    _ensure_font_init()
+    try:
+        font = pygame.font.Font(face, size)
+    except Exception:
+        font = pygame.font.Font(None, size)
+    font_stats["constructions"] += 1
+
+    _font_cache[key] = font
+    if len(_font_cache) > FONT_CACHE_SIZE:
+        _font_cache.popitem(last=False)
+        font_stats["evictions"] += 1
+    return font
+
+
+def _surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+def _evict_text_cache(budget):
+    global _text_cache_bytes
+    while _text_cache and _text_cache_bytes > budget:
+        _, old_surface = _text_cache.popitem(last=False)
+        _text_cache_bytes -= _surface_bytes(old_surface)
+        text_cache_stats["evictions"] += 1
+
+
+def render_text(text, size, color, antialias=True, face=_UNRESOLVED):
+    """
+    渲染文字（带 LRU 缓存，按字节预算淘汰）
+
+    返回的 Surface 会被后续调用共享，调用方只能 blit，不能修改它
+
+    Args:
+        text: 文字内容
+        size: 字号
+        color: 文字颜色
+        antialias: 是否抗锯齿
+        face: 字体文件路径，默认使用解析好的默认字体
+
+    Returns:
+        pygame.Surface: 渲染好的文字
+    """
+    global _text_cache_bytes
+    if face is _UNRESOLVED:
+        face = resolve_default_face()
+    key = (text, face, size, tuple(color), antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        text_cache_stats["hits"] += 1
+        return surface
+
+    text_cache_stats["misses"] += 1
+    surface = get_font(size, face).render(text, antialias, color)
+    nbytes = _surface_bytes(surface)
+    # 单个超出预算的文字直接返回，不进缓存
+    if nbytes > TEXT_CACHE_BUDGET:
+        return surface
+    _text_cache[key] = surface
+    _text_cache_bytes += nbytes
+    _evict_text_cache(TEXT_CACHE_BUDGET)
+    return surface
+
+
+def set_text_cache_budget(budget):
+    """修改文字缓存的字节预算，超出部分立即淘汰"""
+    global TEXT_CACHE_BUDGET
+    TEXT_CACHE_BUDGET = max(0, int(budget))
+    _evict_text_cache(TEXT_CACHE_BUDGET)
+
+
+def get_text_cache_stats():
+    """
+    获取文字缓存统计
+
+    Returns:
+        dict: hits/misses/evictions 计数，以及当前条目数和占用字节数
+    """
+    stats = dict(text_cache_stats)
+    stats["entries"] = len(_text_cache)
+    stats["bytes"] = _text_cache_bytes
+    return stats
+
+
+def clear_font_cache():
+    """清空字体缓存和文字缓存（字体路径需要重新解析时使用）"""
+    global _default_face, _text_cache_bytes
+    _font_cache.clear()
+    _text_cache.clear()
+    _text_cache_bytes = 0
+    _default_face = _UNRESOLVED
@@ -0,0 +1,227 @@
+"""
+帧节奏控制模块
+游戏中按固定帧率精确控帧并统计帧间隔抖动；开始/难度选择/结算/成就这些静态界面改为事件驱动：
+没有输入、按钮悬停变化、提示到期或 GIF 换帧时不重绘，线程阻塞在事件等待上；
+窗口失去焦点或最小化时大幅降低帧率。退出时报告跳过的帧数和 CPU 占用
+"""
+import time
+
+import pygame
+
+from config import (
+    FPS, UNFOCUSED_FPS, MINIMIZED_FPS, IDLE_MAX_WAIT_MS, PRECISE_SLEEP_MARGIN_MS,
+    get_tip_deadline, get_time_to_next_gif_frame,
+)
+from ui import get_hovered_button, clear_button_rects
+
+# 这些事件一定会改变界面（或需要界面响应）
+_REDRAW_EVENTS = {
+    pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL, pygame.KEYDOWN, pygame.KEYUP,
+    pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWSHOWN, pygame.WINDOWRESTORED,
+    pygame.WINDOWFOCUSGAINED, pygame.QUIT,
+}
+
+
+class FramePacer:
+    """
+    帧节奏控制器
+
+    用法：每帧先 dt = wait(active)，再用 get_events() 取事件，最后 should_redraw(...) 决定是否绘制
+    """
+
+    def __init__(self, fps=FPS):
+        self.fps = fps
+        self.focused = True
+        self.minimized = False
+        self._last_time = time.perf_counter()
+        self._pending = []  # 事件等待时取到的事件
+        self._last_state = None
+        self._last_hover = None
+        self._tip_deadline = None
+        self._force_redraw = True
+
+        # 统计
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        self._intervals = []  # 游戏中的帧间隔（毫秒），只保留最近一段
+        # 按模式（连续刷新/静态界面）累计的 [CPU 时间, 墙上时间]
+        self._usage = {True: [0.0, 0.0], False: [0.0, 0.0]}
+        self._mode = False
+        self._mark_cpu = time.process_time()
+        self._mark_wall = time.perf_counter()
+
+    def _target_fps(self):
+        if self.minimized:
+            return MINIMIZED_FPS
+        if not self.focused:
+            return UNFOCUSED_FPS
+        return self.fps
+
+    def _sleep_until(self, deadline):
+        # 先粗睡到截止前一小段，再忙等到截止时刻，避免 sleep 精度不足造成的抖动
+        remaining = deadline - time.perf_counter()
+        if remaining > PRECISE_SLEEP_MARGIN_MS / 1000:
+            time.sleep(remaining - PRECISE_SLEEP_MARGIN_MS / 1000)
+        while time.perf_counter() < deadline:
+            pass
+
+    def wait(self, active):
+        """
+        等到下一帧
+
+        Args:
+            active: 是否为需要连续刷新的状态（游戏中、胜负提示）
+
+        Returns:
+            int: 距上一帧的毫秒数
+        """
+        if active:
+            self._sleep_until(self._last_time + 1 / self._target_fps())
+        else:
+            self._wait_idle()
+
+        # 上一帧（处理 + 等待）的 CPU 和墙上时间计入上一帧的模式
+        cpu = time.process_time()
+        now = time.perf_counter()
+        usage = self._usage[self._mode]
+        usage[0] += cpu - self._mark_cpu
+        usage[1] += now - self._mark_wall
+        self._mark_cpu, self._mark_wall, self._mode = cpu, now, active
+
+        dt = (now - self._last_time) * 1000
+        self._last_time = now
+        if active and self.focused and not self.minimized:
+            self._intervals.append(dt)
+            if len(self._intervals) > 3600:
+                del self._intervals[:1800]
+        return int(dt)
+
+    def _wait_idle(self):
+        # 静态界面：两帧之间至少间隔一个（失焦/最小化时更长的）帧间隔
+        min_wait = 1000 / self._target_fps() - (time.perf_counter() - self._last_time) * 1000
+        if min_wait > 0:
+            time.sleep(min_wait / 1000)
+        if pygame.event.peek():
+            return
+
+        # 然后阻塞等待事件，最长等到下一次 GIF 换帧或提示到期
+        elapsed = (time.perf_counter() - self._last_time) * 1000
+        timeout = IDLE_MAX_WAIT_MS
+        gif_wait = get_time_to_next_gif_frame()
+        if gif_wait is not None:
+            timeout = min(timeout, gif_wait - elapsed)
+        deadline = get_tip_deadline()
+        if deadline is not None:
+            timeout = min(timeout, deadline - pygame.time.get_ticks())
+        if timeout < 1:
+            return
+        # 向上取整，避免在换帧前一刻醒来白白空转一轮
+        event = pygame.event.wait(int(timeout) + 1)
+        if event.type != pygame.NOEVENT:
+            self._pending.append(event)
+
+    def get_events(self):
+        """取出本帧的所有事件（包括等待时取到的事件），并更新焦点状态"""
+        events = self._pending + pygame.event.get()
+        self._pending = []
+        for event in events:
+            if event.type == pygame.WINDOWFOCUSLOST:
+                self.focused = False
+            elif event.type == pygame.WINDOWFOCUSGAINED:
+                self.focused = True
+            elif event.type == pygame.WINDOWMINIMIZED:
+                self.minimized = True
+            elif event.type in (pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWMAXIMIZED):
+                self.minimized = False
+        return events
+
+    def request_redraw(self):
+        """强制下一帧重绘"""
+        self._force_redraw = True
+
+    def should_redraw(self, state, active, events, gif_changed):
+        """
+        判断本帧是否需要绘制
+
+        Args:
+            state: 当前游戏状态
+            active: 是否为连续刷新的状态
+            events: 本帧事件
+            gif_changed: 背景是否换帧
+        """
+        redraw = active or self._force_redraw or gif_changed or state != self._last_state
+        if state != self._last_state:
+            clear_button_rects()
+            self._last_state = state
+
+        # 提示到期需要重绘一次把提示擦掉
+        if self._tip_deadline is not None and pygame.time.get_ticks() >= self._tip_deadline:
+            redraw = True
+
+        if not redraw:
+            for event in events:
+                # 自定义事件（如后台加载完成）也需要重绘
+                if event.type in _REDRAW_EVENTS or event.type >= pygame.USEREVENT:
+                    redraw = True
+                    break
+                if event.type == pygame.MOUSEMOTION and get_hovered_button(event.pos) != self._last_hover:
+                    redraw = True
+                    break
+
+        if redraw:
+            self._force_redraw = False
+            self._last_hover = get_hovered_button(pygame.mouse.get_pos())
+            self.frames_drawn += 1
+        else:
+            self.frames_skipped += 1
+        return redraw
+
+    def frame_drawn(self):
+        """一帧绘制完成后调用（记录绘制时的提示到期时间）"""
+        self._tip_deadline = get_tip_deadline()
+
+    def get_jitter_stats(self):
+        """
+        游戏中帧间隔的统计
+
+        Returns:
+            dict: frames/mean_ms/jitter_ms（与目标帧间隔的平均绝对偏差）/p99_ms
+        """
+        intervals = self._intervals
+        if not intervals:
+            return {"frames": 0, "mean_ms": 0.0, "jitter_ms": 0.0, "p99_ms": 0.0}
+        target = 1000 / self.fps
+        ordered = sorted(intervals)
+        return {
+            "frames": len(intervals),
+            "mean_ms": sum(intervals) / len(intervals),
+            "jitter_ms": sum(abs(v - target) for v in intervals) / len(intervals),
+            "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        }
+
+    def get_cpu_usage(self):
+        """
+        各模式的 CPU 占用率（CPU 时间 / 墙上时间）
+
+        Returns:
+            dict: {"active": 占用率, "static": 占用率}，没有数据时为 None
+        """
+        result = {}
+        for name, mode in (("active", True), ("static", False)):
+            cpu, wall = self._usage[mode]
+            result[name] = cpu / wall if wall > 0 else None
+        return result
+
+    def report(self):
+        """打印节奏统计：跳过的重绘、各模式 CPU 占用、游戏中的抖动"""
+        total = self.frames_drawn + self.frames_skipped
+        if total:
+            print(f"帧节奏：共 {total} 帧，跳过重绘 {self.frames_skipped} 帧（{self.frames_skipped / total:.0%}）")
+        usage = self.get_cpu_usage()
+        for name, label in (("static", "静态界面"), ("active", "游戏中")):
+            if usage[name] is not None:
+                print(f"{label} CPU 占用：{usage[name]:.0%}")
+        jitter = self.get_jitter_stats()
+        if jitter["frames"]:
+            print(f"游戏中帧间隔：平均 {jitter['mean_ms']:.2f}ms，抖动 {jitter['jitter_ms']:.2f}ms，"
+                  f"p99 {jitter['p99_ms']:.2f}ms")
@@ -1,7 +1,13 @@
 import pygame
+import os
 import random
+import time
 from config import *
-from sprites import PlayerBall, Ball, Hole
+from sprites import PlayerBall, Ball, Hole, get_breathing_frame
+from collision import SpatialHash, swept_circles_hit
+from simulation import generate_layout
+from achievement_rules import BALL_ABSORBED, NEAR_MISS
+import profiler
 
 # 全局精灵组初始化
 all_sprites = pygame.sprite.Group()
@@ -9,186 +15,197 @@ player_group = pygame.sprite.Group()
 balls = pygame.sprite.Group()
 holes = pygame.sprite.Group()
 current_difficulty = "easy"
+current_seed = None  # 本局的随机种子
+current_items = {}  # 本局激活的道具
+# 本局的回放录制器（replay.ReplayRecorder），不录制时为 None
+replay_recorder = None
+# 主球控制器（controllers.PlayerController），None 时跟随鼠标
+player_controller = None
+# 对局事件监听器 listener(事件, **数据)（成就系统用），None 时不检测擦身而过
+event_listener = None
+_near_balls = set()  # 上一步在主球附近的彩球（擦身而过检测）
 # ========== 新增：游戏计时器 ==========
 game_start_time = 0
+# 固定时间步模拟的计时：胜负判定按模拟时间而不是墙上时间
+sim_tick_count = 0
+initial_ball_count = 0  # 本局开始时的彩球数量
+
+# ========== 新增：碰撞粗筛用的彩球空间哈希（每次更新后重建一次） ==========
+_ball_grid = SpatialHash()
+_update_tick = 0
+_ball_grid_tick = -1
+
+# ========== 新增：NumPy 向量化物理后端（可选依赖） ==========
+_ball_engine = None
+if PHYSICS_BACKEND == "numpy":
+    try:
+        from ball_physics import BallArrayEngine
+        _ball_engine = BallArrayEngine()
+    except ImportError as e:
+        print(f"NumPy 物理后端不可用：{e}，使用逐精灵更新")
+
+# ========== 新增：事件驱动物理后端（撞墙/进洞按预测事件处理，只有主球碰撞逐步检测） ==========
+_kinetic_engine = None
+if PHYSICS_BACKEND == "kinetic":
+    from kinetic_engine import KineticEngine
+    _kinetic_engine = KineticEngine(*get_window_size())
 
 
 # 重置游戏核心函数 - 新增多黑洞逻辑，彩球/黑洞数量对应难度
-def reset_game(difficulty):
-    global current_difficulty, game_start_time
+def reset_game(difficulty, ball_count=None, seed=None, items=None, record=None):
+    """
+    重置游戏
+
+    Args:
+        difficulty: 难度
+        ball_count: 自定义彩球数量（压力测试用），默认与黑洞数量相同
+        seed: 随机种子，默认随机生成；布局与同种子的 simulation.Simulation 完全相同
+        items: 本局激活的道具，默认取道具系统中激活的道具（回放时传入录制的道具）
+        record: 是否录制本局回放，默认按 RECORD_REPLAYS
+
+    只有正常开局（不指定 items、不关闭录制）才消耗玩家激活的道具；
+    回放等传入 items 或 record=False 的对局不改动玩家档案
+    """
+    global current_difficulty, current_seed, current_items, game_start_time, _ball_grid_tick, sim_tick_count
+    global replay_recorder, initial_ball_count, _near_balls
+    if seed is None:
+        seed = random.getrandbits(32)
     current_difficulty = difficulty
+    current_seed = seed
+    if _ball_engine is not None:
+        _ball_engine.clear()
+    if _kinetic_engine is not None:
+        _kinetic_engine.clear()
     all_sprites.empty()
     player_group.empty()
     balls.empty()
     holes.empty()
     # ========== 新增：重置游戏开始时间 ==========
     game_start_time = pygame.time.get_ticks()
+    sim_tick_count = 0
 
     width, height = get_window_size()
     cfg = DIFFICULTY_CONFIG[difficulty]
 
+    # 网格格子取彩球直径的 2 倍
+    _ball_grid.clear(cell_size=max(16, cfg["ball_radius"] * 4))
+    _ball_grid_tick = -1
+
     # ========== 新增：导入道具系统 ==========
     from score_item_system import get_active_items, clear_active_items
 
-    # 获取激活的道具效果
-    active_items = get_active_items()
-
-    # 根据道具效果调整黑洞和玩家球的大小
-    hole_radius = cfg["hole_radius"]
-    # ========== 修改：主球固定大小为30，不受难度影响 ==========
-    player_radius = 30  # 固定大小，所有难度都一样
+    # 布局（黑洞、彩球、主球位置和道具效果）由模拟核心统一生成
+    consume_items = items is None and record is not False
+    current_items = get_active_items() if items is None else dict(items)
+    layout = generate_layout(difficulty, width, height, random.Random(seed), current_items, ball_count)
 
-    # 道具1：黑洞放大
-    if active_items.get("item1", False):
-        hole_radius *= 2  # 放大一倍
+    replay_recorder = None
+    if record is None:
+        record = RECORD_REPLAYS
+    if record and ball_count is None:
+        from replay import ReplayRecorder
+        replay_recorder = ReplayRecorder(seed, difficulty, current_items, width, height, SIM_TICK_RATE)
 
-    # 根据难度定义彩球/黑洞数量（简单3/普通6/地狱12）
-    count_map = {
-        "easy": 3,
-        "normal": 6,
-        "hell": 12
-    }
-    obj_count = count_map[difficulty]
-
-    # ========== 先创建黑洞和彩球，然后再确定主球位置 ==========
-    # 创建多个黑洞（随机位置，避免重叠）
-    for _ in range(obj_count):
-        # 随机生成位置，确保黑洞不超出窗口且远离边缘
-        hole_x = random.randint(hole_radius * 2, width - hole_radius * 2)
-        hole_y = random.randint(hole_radius * 2, height - hole_radius * 2)
-        # 检测黑洞是否重叠，若重叠则重新生成位置
-        overlap = True
-        while overlap:
-            overlap = False
-            for existing_hole in holes:
-                dx = hole_x - existing_hole.x
-                dy = hole_y - existing_hole.y
-                distance = (dx ** 2 + dy ** 2) ** 0.5
-                if distance < hole_radius * 3:  # 黑洞间距至少3倍半径
-                    hole_x = random.randint(hole_radius * 2, width - hole_radius * 2)
-                    hole_y = random.randint(hole_radius * 2, height - hole_radius * 2)
-                    overlap = True
-                    break
+    for hole_x, hole_y, hole_radius in layout["holes"]:
         # 创建黑洞并加入精灵组
         hole = Hole(hole_x, hole_y, hole_radius)
         all_sprites.add(hole)
         holes.add(hole)
 
-    # 创建对应数量的敌方彩球（随机位置+速度，适配难度）
-    ball_positions = []  # 记录所有彩球的位置和半径
-    for _ in range(obj_count):
-        # 彩球位置远离黑洞和边缘
-        ball_x = random.randint(cfg["ball_radius"] * 2, width - cfg["ball_radius"] * 2)
-        ball_y = random.randint(cfg["ball_radius"] * 2, height - cfg["ball_radius"] * 2)
-
-        # 确保彩球初始位置不与黑洞重叠
-        overlap = True
-        while overlap:
-            overlap = False
-            for hole in holes:
-                dx = ball_x - hole.x
-                dy = ball_y - hole.y
-                distance = (dx ** 2 + dy ** 2) ** 0.5
-                if distance < (cfg["ball_radius"] + hole_radius) * 2:
-                    ball_x = random.randint(cfg["ball_radius"] * 2, width - cfg["ball_radius"] * 2)
-                    ball_y = random.randint(cfg["ball_radius"] * 2, height - cfg["ball_radius"] * 2)
-                    overlap = True
-                    break
-
-        color = random.choice([RED, GREEN, BLUE])
-        ball = Ball(ball_x, ball_y, cfg["ball_radius"], color)
-        # 彩球速度适配难度配置
-        ball.speed_x = random.randint(-cfg["init_speed"], cfg["init_speed"])
-        ball.speed_y = random.randint(-cfg["init_speed"], cfg["init_speed"])
-        # 避免彩球初始速度为0
-        if ball.speed_x == 0:
-            ball.speed_x = 1 if random.random() > 0.5 else -1
-        if ball.speed_y == 0:
-            ball.speed_y = 1 if random.random() > 0.5 else -1
+    for ball_x, ball_y, ball_radius, color, speed_x, speed_y in layout["balls"]:
+        ball = Ball(ball_x, ball_y, ball_radius, color)
+        ball.speed_x = speed_x
+        ball.speed_y = speed_y
         all_sprites.add(ball)
         balls.add(ball)
+        if _ball_engine is not None:
+            _ball_engine.add_ball(ball)
 
-        # 记录彩球位置信息，用于主球位置检查
-        ball_positions.append({
-            "x": ball_x,
-            "y": ball_y,
-            "radius": cfg["ball_radius"]
-        })
-
-    # ========== 新增：寻找安全的主球生成位置 ==========
-    player_x, player_y = find_safe_player_position(width, height, player_radius, ball_positions, holes)
+    initial_ball_count = len(balls)
+    _near_balls = set()
 
-    # 创建玩家主球（固定大小30）
+    # 创建玩家主球（道具2的缩小效果已计入半径）
+    player_x, player_y, player_radius = layout["player"]
     player = PlayerBall(player_x, player_y, player_radius, WHITE)
-    # 道具2：主球缩小（在创建后应用）
-    if active_items.get("item2", False):
-        from score_item_system import apply_item_effect_to_player
-        apply_item_effect_to_player(player)
-
+    if player_controller is not None:
+        player_controller.reset()
+        player.controller = player_controller
+        player.controller_state = live_state
     all_sprites.add(player)
     player_group.add(player)
 
-    # ========== 新增：应用道具效果到所有黑洞 ==========
-    if active_items.get("item1", False):
-        for hole in holes:
-            from score_item_system import apply_item_effect_to_hole
-            apply_item_effect_to_hole(hole)
-
     # 清除激活的道具状态（一次性使用）
-    clear_active_items()
+    if consume_items:
+        clear_active_items()
+
+    # 事件驱动后端：黑洞大小确定后再登记，彩球据此预测进洞事件
+    if _kinetic_engine is not None:
+        _kinetic_engine.resize(width, height)
+        for hole in holes:
+            _kinetic_engine.add_hole_sprite(hole)
+        for ball in balls:
+            _kinetic_engine.add_ball_sprite(ball)
 
     return GameState.PLAYING
 
 
-# ========== 新增：寻找安全的主球生成位置函数 ==========
-def find_safe_player_position(width, height, player_radius, ball_positions, holes):
-    """寻找安全的主球生成位置，避免开门杀"""
-    max_attempts = 200  # 最大尝试次数
-    min_safe_distance = 500  # 最小安全距离（像素）
+# ========== 新增：主球控制器 ==========
+class LiveGameState:
+    """把当前对局包装成控制器使用的状态接口（属性与 simulation.Simulation 一致）"""
 
-    for attempt in range(max_attempts):
-        # 随机生成候选位置
-        candidate_x = random.randint(player_radius * 2, width - player_radius * 2)
-        candidate_y = random.randint(player_radius * 2, height - player_radius * 2)
+    @property
+    def player(self):
+        return get_player_ball()
 
-        # 检查是否安全（远离所有彩球）
-        safe_from_balls = True
-        for ball_info in ball_positions:
-            dx = candidate_x - ball_info["x"]
-            dy = candidate_y - ball_info["y"]
-            distance = (dx ** 2 + dy ** 2) ** 0.5
+    @property
+    def balls(self):
+        # NumPy/事件驱动后端不逐步更新精灵，控制器读取前先把当前的位置和速度写回
+        if _ball_engine is not None:
+            _ball_engine.sync_sprites()
+        elif _kinetic_engine is not None:
+            _kinetic_engine.sync_state()
+        return balls.sprites()
 
-            # 需要保持至少最小安全距离
-            if distance < (player_radius + ball_info["radius"] + min_safe_distance):
-                safe_from_balls = False
-                break
+    @property
+    def holes(self):
+        return holes.sprites()
 
-        # 如果离彩球太近，尝试下一个位置
-        if not safe_from_balls:
-            continue
+    @property
+    def width(self):
+        return get_window_size()[0]
+
+    @property
+    def height(self):
+        return get_window_size()[1]
+
+    @property
+    def tick(self):
+        return sim_tick_count
+
+
+live_state = LiveGameState()
 
-        # 检查是否安全（远离所有黑洞）
-        safe_from_holes = True
-        for hole in holes:
-            dx = candidate_x - hole.x
-            dy = candidate_y - hole.y
-            distance = (dx ** 2 + dy ** 2) ** 0.5
 
-            # 需要保持至少一定距离（黑洞半径+主球半径+额外安全距离）
-            if distance < (player_radius + hole.radius + 50):
-                safe_from_holes = False
-                break
+def set_player_controller(controller):
+    """
+    设置主球控制器（下一局开始时生效）
+
+    Args:
+        controller: controllers.PlayerController，None 恢复鼠标操作
+    """
+    global player_controller
+    player_controller = controller
 
-        # 如果离黑洞太近，尝试下一个位置
-        if not safe_from_holes:
-            continue
 
-        # 位置安全，返回这个位置
-        return candidate_x, candidate_y
+def set_event_listener(listener):
+    """
+    设置对局事件监听器：每个模拟步结束时通知 ball_absorbed/near_miss 事件
 
-    # 如果找不到完全安全的位置，返回屏幕中心（最后的保障）
-    print(f"警告：经过{max_attempts}次尝试未找到完全安全位置，使用屏幕中心")
-    return width // 2, height // 2
+    Args:
+        listener: listener(事件, **数据)，None 取消
+    """
+    global event_listener
+    event_listener = listener
 
 
 # ========== 原有函数保持不变 ==========
@@ -239,17 +256,71 @@ def get_current_difficulty():
     return current_difficulty
 
 
+# 获取本次更新后的彩球空间哈希（同一帧内的多次碰撞检测共用）
+def get_ball_grid():
+    global _ball_grid_tick
+    if _ball_grid_tick != _update_tick:
+        _ball_grid.rebuild(balls)
+        _ball_grid_tick = _update_tick
+    return _ball_grid
+
+
+# 一个模拟步内彩球最多移动的距离（粗筛时扩大查询范围，保证扫掠线段不漏检）
+MAX_BALL_STEP = MAX_SPEED * SPEED_MULTIPLIER * SIM_TICK_SCALE * 2 ** 0.5
+
+
+def _ball_hits_hole(hole, ball):
+    if not SWEPT_COLLISION:
+        return pygame.sprite.collide_circle(hole, ball)
+    # 黑洞静止，彩球沿本步走过的线段扫掠
+    hole_pos = hole.rect.center
+    return swept_circles_hit(hole_pos, hole_pos, (ball.prev_x, ball.prev_y), (ball.x, ball.y),
+                             hole.radius + ball.radius)
+
+
+def _player_hits_ball(player, ball):
+    if not SWEPT_COLLISION:
+        return pygame.sprite.collide_circle(player, ball)
+    # 主球和彩球都沿本步走过的线段扫掠（按相对运动计算）
+    return swept_circles_hit((player.prev_x, player.prev_y), (player.x, player.y),
+                             (ball.prev_x, ball.prev_y), (ball.x, ball.y),
+                             player.radius + ball.radius)
+
+
 # 检测小球进黑洞（适配多黑洞，彩球和黑洞碰撞后都消失）
 def check_ball_hole_collision():
+    if _kinetic_engine is not None:
+        # 进洞事件已由引擎按预测时间处理，这里只移除对应的精灵
+        captures = _kinetic_engine.pop_captures()
+        for ball, hole in captures:
+            ball.kill()
+            hole.kill()
+        return bool(captures)
+    if _ball_engine is not None:
+        # 直接在数组上判断，不重建空间哈希
+        captures = _ball_engine.find_hole_hits(holes.sprites(), SWEPT_COLLISION)
+        for hole, hole_balls in captures:
+            for ball in hole_balls:
+                ball.kill()
+            hole.kill()
+        return bool(captures)
+
     collided = False
     collided_holes = []  # 记录需要删除的黑洞
+    grid = get_ball_grid()
+    reach = MAX_BALL_STEP if SWEPT_COLLISION else 0
 
-    # 遍历所有黑洞，检测彩球碰撞
+    # 遍历所有黑洞，只对附近的彩球做精确碰撞检测
     for hole in holes:
-        collided_balls = pygame.sprite.spritecollide(hole, balls, True, pygame.sprite.collide_circle)
+        hole_x, hole_y = hole.rect.center
+        collided_balls = [ball for ball in grid.query(hole_x, hole_y, hole.radius + reach)
+                          if ball.alive() and _ball_hits_hole(hole, ball)]
         if collided_balls:
             collided = True
             collided_holes.append(hole)  # 标记这个黑洞也要删除
+            for ball in collided_balls:
+                grid.remove(ball)
+                ball.kill()
 
     # 删除所有碰撞过的黑洞
     for hole in collided_holes:
@@ -264,7 +335,21 @@ def check_player_collision():
     player = get_player_ball()
     if not player:
         return False
-    return pygame.sprite.spritecollideany(player, balls, pygame.sprite.collide_circle)
+    if _kinetic_engine is not None:
+        # 彩球位置只在这里按需计算
+        return _kinetic_engine.find_player_hit((player.prev_x, player.prev_y), (player.x, player.y),
+                                               player.radius, _kinetic_engine.time - 1, SWEPT_COLLISION)
+    if _ball_engine is not None:
+        return _ball_engine.find_player_hit(player, SWEPT_COLLISION)
+    player_x, player_y = player.rect.center
+    reach = 0
+    if SWEPT_COLLISION:
+        # 查询范围覆盖主球本步走过的线段和彩球的最大位移
+        reach = ((player.x - player.prev_x) ** 2 + (player.y - player.prev_y) ** 2) ** 0.5 + MAX_BALL_STEP
+    for ball in get_ball_grid().query(player_x, player_y, player.radius + reach):
+        if _player_hits_ball(player, ball):
+            return ball
+    return None
 
 
 # ========== 修改：检测胜利条件（所有彩球都被黑洞吸收 OR 坚持10秒） ==========
@@ -273,27 +358,36 @@ def check_win_condition():
     if len(balls) == 0:
         return True, "all_balls_absorbed"
 
-    # 条件2：坚持10秒没有失败
-    current_time = pygame.time.get_ticks()
-    elapsed_time = current_time - game_start_time
+    # 条件2：坚持10秒没有失败（按模拟时间计）
+    elapsed_time = get_elapsed_time()
     if elapsed_time >= TIME_LIMIT:
         return True, "time_survived"
 
     return False, None
 
 
-# ========== 新增：获取已游戏时间 ==========
+# ========== 新增：获取已游戏时间（模拟时间，毫秒） ==========
 def get_elapsed_time():
-    if game_start_time == 0:
-        return 0
-    current_time = pygame.time.get_ticks()
-    return current_time - game_start_time
+    return sim_tick_count * 1000 // SIM_TICK_RATE
+
+
+# ========== 新增：本局概况（对局记录用） ==========
+def get_round_info():
+    """
+    Returns:
+        dict: difficulty/seed/items/elapsed_ms/balls_absorbed
+    """
+    return {
+        "difficulty": current_difficulty,
+        "seed": current_seed,
+        "items": dict(current_items),
+        "elapsed_ms": get_elapsed_time(),
+        "balls_absorbed": initial_ball_count - len(balls),
+    }
 
 
 # ========== 新增：获取剩余时间 ==========
 def get_remaining_time():
-    if game_start_time == 0:
-        return TIME_LIMIT
     elapsed = get_elapsed_time()
     remaining = TIME_LIMIT - elapsed
     return max(0, remaining)
@@ -301,11 +395,140 @@ def get_remaining_time():
 
 # 所有精灵更新
 def update_all_sprites(dt):
-    all_sprites.update()
+    global _update_tick
+    _update_tick += 1
+    if _ball_engine is not None:
+        # 彩球由 NumPy 引擎批量更新，精灵只在控制器需要时同步，绘制直接读数组
+        _ball_engine.step(*get_window_size())
+        player_group.update()
+        holes.update()
+    elif _kinetic_engine is not None:
+        # 彩球不逐步移动，只处理这一步内到期的撞墙/进洞事件
+        _kinetic_engine.resize(*get_window_size())
+        _kinetic_engine.advance()
+        player_group.update()
+        holes.update()
+    else:
+        all_sprites.update()
+
+
+# ========== 新增：推进一个固定时间步 ==========
+def step_simulation():
+    """
+    推进一个固定时间步：更新精灵、检测彩球入洞、判定胜负
+
+    Returns:
+        tuple: (结果, 原因)，结果为 None（继续）/"win"/"lose"，
+            原因为 "all_balls_absorbed"/"time_survived"/"lose"
+    """
+    global sim_tick_count
+    update_all_sprites(SIM_TICK_MS)
+    if replay_recorder is not None:
+        player = get_player_ball()
+        replay_recorder.record((player.x, player.y) if player._tracking else None)
+    sim_tick_count += 1
+    profiler.mark("update")
+    # 检测彩球入洞（彩球和黑洞都会消失）
+    ball_count = len(balls)
+    check_ball_hole_collision()
+
+    outcome, reason = None, None
+    if check_player_collision():
+        outcome, reason = "lose", "lose"
+    else:
+        win_result, win_reason = check_win_condition()
+        if win_result:
+            outcome, reason = "win", win_reason
+    if event_listener is not None:
+        _notify_events(ball_count, outcome)
+    profiler.mark("collision")
+    if outcome:
+        _finish_replay(reason)
+    return outcome, reason
+
+
+def _notify_events(ball_count, outcome):
+    """把本步的进洞和擦身而过通知给事件监听器"""
+    global _near_balls
+    absorbed = ball_count - len(balls)
+    if absorbed:
+        event_listener(BALL_ABSORBED, count=absorbed)
+    player = get_player_ball()
+    if player is None or outcome == "lose":
+        return
+    # 上一步还在主球附近、这一步离开了（且没有进洞）的彩球算擦身而过
+    reach = player.radius + NEAR_MISS_DISTANCE
+    if _kinetic_engine is not None:
+        near = _kinetic_engine.balls_within((player.x, player.y), reach)
+    elif _ball_engine is not None:
+        near = _ball_engine.balls_within(player.x, player.y, reach)
+    else:
+        near = set()
+        for ball in get_ball_grid().query(player.x, player.y, reach):
+            limit = reach + ball.radius
+            if ball.alive() and (ball.x - player.x) ** 2 + (ball.y - player.y) ** 2 <= limit * limit:
+                near.add(ball)
+    misses = sum(1 for ball in _near_balls - near if ball.alive())
+    _near_balls = near
+    if misses:
+        event_listener(NEAR_MISS, count=misses)
+
+
+def _finish_replay(reason):
+    """结束录制，回放文件由后台线程写出"""
+    global replay_recorder
+    if replay_recorder is None:
+        return
+    path = os.path.join(get_data_path(REPLAY_DIR),
+                        f"{time.strftime('%Y%m%d_%H%M%S')}_{current_difficulty}_{current_seed}.bhr")
+    replay_recorder.finish(reason, path, keep=MAX_REPLAYS)
+    replay_recorder = None
+
+
+# ========== 新增：渲染插值 ==========
+def apply_render_interpolation(alpha):
+    """
+    把彩球的绘制位置设为上一步和当前步之间的插值（只影响绘制，下一步更新时会被覆盖）
+
+    Args:
+        alpha: 插值系数，0~1
+    """
+    if _ball_engine is not None:
+        _ball_engine.interpolate(alpha)
+        return
+    if _kinetic_engine is not None:
+        # 位置是时间的函数，直接按插值时刻计算
+        _kinetic_engine.sync_sprites(_kinetic_engine.time - 1 + alpha, get_breathing_frame())
+        return
+    for ball in balls:
+        ball.rect.center = (ball.prev_x + (ball.x - ball.prev_x) * alpha,
+                            ball.prev_y + (ball.y - ball.prev_y) * alpha)
+
+
+# ========== 新增：绘制本局的精灵 ==========
+def draw_sprites(surface):
+    """
+    按黑洞、彩球、主球的顺序绘制所有精灵
+
+    Returns:
+        list: 画过的区域（传给 dirty_rect.mark_dirty_rects）
+    """
+    if _ball_engine is None:
+        return all_sprites.draw(surface)
+    # NumPy 后端的彩球不经过精灵，直接从数组批量绘制
+    import dirty_rect
+    rects = list(holes.draw(surface))
+    rects += _ball_engine.draw(surface, get_breathing_frame(), dirty_rect.is_active()) or []
+    rects += player_group.draw(surface)
+    return rects
 
 
 # 清空所有精灵
 def clear_all_sprites():
+    if _ball_engine is not None:
+        _ball_engine.clear()
+    if _kinetic_engine is not None:
+        _kinetic_engine.clear()
     all_sprites.empty()
     player_group.empty()
     balls.empty()
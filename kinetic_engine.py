@@ -0,0 +1,407 @@
+"""
+事件驱动（动力学）彩球模拟模块
+两次反弹之间彩球做匀速直线运动，撞墙和进洞的时间都可以解析算出：
+引擎用小根堆保存预测的事件（撞墙反弹加速、彩球进洞），直接从一个事件跳到下一个事件，
+只在需要位置时（绘制、主球碰撞检测）才按时间计算彩球位置
+
+撞墙与逐步规则（simulation.advance_ball）一致：只在整数模拟步上判断，彩球先越过墙壁，
+在第一个越界的模拟步才反向，因此同一个种子的结果与逐步模拟相同
+
+时间单位为模拟步（tick），速度单位为 像素/模拟步
+"""
+import heapq
+import math
+
+from config import MAX_SPEED, SPEED_MULTIPLIER, SIM_TICK_SCALE
+
+# 事件类型
+EVENT_WALL = 0
+EVENT_HOLE = 1
+
+
+class KineticEngine:
+    """
+    事件驱动的彩球引擎
+    每个彩球保存当前这段直线运动的起点、起始时间和速度；
+    事件带有彩球的版本号，彩球状态变化（反弹、被移除）后旧事件自动失效
+    """
+
+    def __init__(self, width, height):
+        """
+        Args:
+            width: 场地宽度
+            height: 场地高度
+        """
+        self.width = width
+        self.height = height
+        self.time = 0.0
+        self.balls = []  # 彩球状态 dict 列表，下标即彩球 id
+        self.holes = []  # 黑洞状态 dict 列表，下标即黑洞 id
+        self.alive_count = 0
+        self.events_processed = 0
+        self._heap = []
+        self._seq = 0
+        self._captures = []  # 尚未取走的进洞事件 (彩球精灵, 黑洞精灵)
+        self.last_capture_time = None
+
+    # ========== 建立场景 ==========
+    def add_hole(self, x, y, radius, sprite=None):
+        """添加黑洞，返回黑洞 id"""
+        self.holes.append({"x": x, "y": y, "radius": radius, "alive": True, "sprite": sprite})
+        return len(self.holes) - 1
+
+    def add_ball(self, x, y, speed_x, speed_y, radius, boost=1.2, sprite=None):
+        """
+        添加彩球并预测它的事件
+
+        Args:
+            x, y: 初始位置
+            speed_x, speed_y: 初始速度（与 Ball.speed_x/speed_y 同单位）
+            radius: 半径
+            boost: 反弹加速因子
+            sprite: 对应的 Ball 精灵（可选，用于绘制和进洞时移除）
+
+        Returns:
+            int: 彩球 id
+        """
+        ball = {
+            "x0": x, "y0": y, "t0": self.time,
+            "speed_x": speed_x, "speed_y": speed_y,
+            "radius": radius, "boost": boost,
+            "version": 0, "alive": True, "sprite": sprite,
+            "bounce": None,  # 最近一次撞墙 (时间, 反弹前的 speed_x, speed_y)，主球扫掠检测用
+        }
+        self.balls.append(ball)
+        ball_id = len(self.balls) - 1
+        self.alive_count += 1
+        if sprite is not None:
+            sprite.engine = self
+            sprite.engine_index = ball_id
+        self._predict(ball_id)
+        return ball_id
+
+    def add_ball_sprite(self, sprite):
+        """按 Ball 精灵当前的状态添加彩球"""
+        return self.add_ball(sprite.x, sprite.y, sprite.speed_x, sprite.speed_y,
+                             sprite.radius, sprite.bounce_speed_boost, sprite)
+
+    def add_hole_sprite(self, sprite):
+        """按 Hole 精灵当前的状态添加黑洞"""
+        sprite.engine_index = self.add_hole(sprite.x, sprite.y, sprite.radius, sprite)
+        return sprite.engine_index
+
+    def remove_ball(self, sprite):
+        """移除彩球（精灵被 kill 时调用）"""
+        ball_id = sprite.engine_index
+        if sprite.engine is not self or ball_id < 0:
+            return
+        self._remove_ball(ball_id)
+        sprite.engine = None
+        sprite.engine_index = -1
+
+    def clear(self):
+        """清空场景"""
+        for ball in self.balls:
+            sprite = ball["sprite"]
+            if sprite is not None and sprite.engine is self:
+                sprite.engine = None
+                sprite.engine_index = -1
+        self.time = 0.0
+        self.balls = []
+        self.holes = []
+        self.alive_count = 0
+        self._heap = []
+        self._captures = []
+        self.last_capture_time = None
+
+    def resize(self, width, height):
+        """场地尺寸变化：把所有彩球的运动段移到当前时间并重新预测"""
+        if (width, height) == (self.width, self.height):
+            return
+        self.width = width
+        self.height = height
+        for ball_id, ball in enumerate(self.balls):
+            if ball["alive"]:
+                self._rebase(ball, self.time)
+                ball["version"] += 1
+                self._predict(ball_id)
+
+    # ========== 运动学 ==========
+    @staticmethod
+    def _velocity(ball):
+        scale = SPEED_MULTIPLIER * SIM_TICK_SCALE
+        return ball["speed_x"] * scale, ball["speed_y"] * scale
+
+    def position(self, ball_id, t=None):
+        """计算彩球在时刻 t（默认当前时间）的位置"""
+        ball = self.balls[ball_id]
+        if t is None:
+            t = self.time
+        vx, vy = self._velocity(ball)
+        dt = t - ball["t0"]
+        return ball["x0"] + vx * dt, ball["y0"] + vy * dt
+
+    def _rebase(self, ball, t):
+        vx, vy = self._velocity(ball)
+        dt = t - ball["t0"]
+        ball["x0"] += vx * dt
+        ball["y0"] += vy * dt
+        ball["t0"] = t
+
+    def _push(self, t, kind, ball_id, version, hole_id=-1):
+        self._seq += 1
+        heapq.heappush(self._heap, (t, self._seq, kind, ball_id, version, hole_id))
+
+    @staticmethod
+    def _time_to_wall(p0, v, radius, size):
+        # 按连续运动估算接触墙壁的时间，再由 _wall_time 对齐到模拟步
+        if v > 0:
+            return max(0.0, (size - radius - p0) / v)
+        if v < 0:
+            return max(0.0, (radius - p0) / v)
+        return math.inf
+
+    def _wall_hits(self, ball, t):
+        """时刻 t 的位置是否满足逐步规则的反弹条件，返回 (x 方向, y 方向)"""
+        vx, vy = self._velocity(ball)
+        dt = t - ball["t0"]
+        x = ball["x0"] + vx * dt
+        y = ball["y0"] + vy * dt
+        r = ball["radius"]
+        return x - r <= 0 or x + r >= self.width, y - r <= 0 or y + r >= self.height
+
+    def _wall_time(self, ball):
+        # 逐步规则只在整数模拟步上判断：取接触之后第一个满足反弹条件的模拟步
+        first = math.floor(ball["t0"]) + 1
+        x0, y0, r = ball["x0"], ball["y0"], ball["radius"]
+        if (x0 - r <= 0 or x0 + r >= self.width or y0 - r <= 0 or y0 + r >= self.height) \
+                and any(self._wall_hits(ball, first)):
+            # 越过墙壁后下一步还没回到场内：逐步规则会再反弹一次
+            return float(first)
+        vx, vy = self._velocity(ball)
+        dt = min(self._time_to_wall(x0, vx, r, self.width),
+                 self._time_to_wall(y0, vy, r, self.height))
+        if dt == math.inf:
+            return math.inf
+        tick = max(first, math.ceil(ball["t0"] + dt))
+        # 估算有浮点误差，按反弹条件前后校正一步
+        while tick > first and any(self._wall_hits(ball, tick - 1)):
+            tick -= 1
+        while not any(self._wall_hits(ball, tick)):
+            tick += 1
+        return float(tick)
+
+    def _hole_time(self, ball, hole):
+        # 解 |p0 + v * dt - h| = R，取最早的非负根；已经接触时立即进洞
+        vx, vy = self._velocity(ball)
+        dx = ball["x0"] - hole["x"]
+        dy = ball["y0"] - hole["y"]
+        reach = ball["radius"] + hole["radius"]
+        c = dx * dx + dy * dy - reach * reach
+        if c <= 0:
+            return ball["t0"]
+        a = vx * vx + vy * vy
+        b = 2 * (dx * vx + dy * vy)
+        if a == 0 or b >= 0:
+            return math.inf
+        disc = b * b - 4 * a * c
+        if disc < 0:
+            return math.inf
+        return ball["t0"] + (-b - math.sqrt(disc)) / (2 * a)
+
+    def _predict(self, ball_id, wall_time=None):
+        ball = self.balls[ball_id]
+        if wall_time is None:
+            wall_time = self._wall_time(ball)
+            self._push(wall_time, EVENT_WALL, ball_id, ball["version"])
+        # 只需要安排下一次撞墙之前最早的进洞事件，撞墙后会重新预测
+        best_time, best_hole = wall_time, -1
+        for hole_id, hole in enumerate(self.holes):
+            if hole["alive"]:
+                t = self._hole_time(ball, hole)
+                if t <= best_time:
+                    best_time, best_hole = t, hole_id
+        if best_hole >= 0:
+            self._push(best_time, EVENT_HOLE, ball_id, ball["version"], best_hole)
+
+    # ========== 事件处理 ==========
+    def _remove_ball(self, ball_id):
+        ball = self.balls[ball_id]
+        if ball["alive"]:
+            self._rebase(ball, self.time)
+            ball["alive"] = False
+            ball["version"] += 1
+            self.alive_count -= 1
+
+    def _handle_wall(self, ball_id, t):
+        ball = self.balls[ball_id]
+        hit_x, hit_y = self._wall_hits(ball, t)
+        self._rebase(ball, t)
+        ball["bounce"] = (t, ball["speed_x"], ball["speed_y"])
+        if hit_x:
+            ball["speed_x"] *= -1
+        if hit_y:
+            ball["speed_y"] *= -1
+        # 反弹加速并限速（与 Ball.update 一致）
+        boost = ball["boost"]
+        ball["speed_x"] = max(-MAX_SPEED, min(MAX_SPEED, ball["speed_x"] * boost))
+        ball["speed_y"] = max(-MAX_SPEED, min(MAX_SPEED, ball["speed_y"] * boost))
+        ball["version"] += 1
+        self._predict(ball_id)
+
+    def _handle_hole(self, ball_id, hole_id, t):
+        ball = self.balls[ball_id]
+        hole = self.holes[hole_id]
+        if not hole["alive"]:
+            # 目标黑洞已被别的彩球占用：重新找下一次撞墙之前的进洞事件
+            self._rebase(ball, t)
+            self._predict(ball_id, self._wall_time(ball))
+            return
+        self._remove_ball(ball_id)
+        hole["alive"] = False
+        self.last_capture_time = t
+        self._captures.append((ball["sprite"], hole["sprite"]))
+
+    def next_event_time(self):
+        """下一个有效事件的时间（没有事件时为 inf）"""
+        heap = self._heap
+        while heap:
+            t, _, _, ball_id, version, _ = heap[0]
+            ball = self.balls[ball_id]
+            if ball["alive"] and ball["version"] == version:
+                return t
+            heapq.heappop(heap)
+        return math.inf
+
+    def advance_to(self, t):
+        """
+        处理 t 之前（含）的所有事件，并把时间推进到 t
+
+        Args:
+            t: 目标时间（模拟步）
+        """
+        heap = self._heap
+        while heap and heap[0][0] <= t:
+            event_time, _, kind, ball_id, version, hole_id = heapq.heappop(heap)
+            ball = self.balls[ball_id]
+            if not ball["alive"] or ball["version"] != version:
+                continue
+            self.time = event_time
+            self.events_processed += 1
+            if kind == EVENT_WALL:
+                self._handle_wall(ball_id, event_time)
+            else:
+                self._handle_hole(ball_id, hole_id, event_time)
+        self.time = max(self.time, t)
+
+    def advance(self, ticks=1):
+        """推进若干模拟步"""
+        self.advance_to(self.time + ticks)
+
+    def pop_captures(self):
+        """取走上次调用以来发生的进洞事件列表 [(彩球精灵, 黑洞精灵), ...]"""
+        captures = self._captures
+        self._captures = []
+        return captures
+
+    def run_until(self, time_limit):
+        """
+        无主球地一路推进到所有彩球进洞或达到时间上限（无头批量模拟用）
+
+        Args:
+            time_limit: 时间上限（模拟步）
+
+        Returns:
+            tuple: (原因, 结束时间)，原因为 "all_balls_absorbed" 或 "time_survived"
+        """
+        while self.alive_count > 0:
+            t = self.next_event_time()
+            if t > time_limit:
+                break
+            self.advance_to(t)
+        if self.alive_count == 0 and self.last_capture_time is not None:
+            return "all_balls_absorbed", self.last_capture_time
+        self.time = max(self.time, time_limit)
+        return "time_survived", time_limit
+
+    # ========== 按需计算位置 ==========
+    def find_player_hit(self, prev_pos, pos, radius, prev_time, swept=True):
+        """
+        检查主球从 prev_pos（prev_time 时刻）移动到 pos（当前时刻）期间是否碰到彩球
+
+        Returns:
+            彩球精灵或 id，没有碰撞时返回 None
+        """
+        from collision import swept_circles_hit
+
+        now = self.time
+        scale = SPEED_MULTIPLIER * SIM_TICK_SCALE
+        for ball_id, ball in enumerate(self.balls):
+            if not ball["alive"]:
+                continue
+            end = self.position(ball_id, now)
+            start = end
+            if swept:
+                bounce = ball["bounce"]
+                if bounce is not None and bounce[0] > prev_time:
+                    # 这一步内撞过墙（撞墙只发生在整数模拟步上）：按反弹前的速度倒推上一步的位置
+                    bounce_time, speed_x, speed_y = bounce
+                    bx, by = self.position(ball_id, bounce_time)
+                    back = (bounce_time - prev_time) * scale
+                    start = (bx - speed_x * back, by - speed_y * back)
+                else:
+                    start = self.position(ball_id, prev_time)
+            player_start = prev_pos if swept else pos
+            if swept_circles_hit(player_start, pos, start, end, radius + ball["radius"]):
+                return ball["sprite"] if ball["sprite"] is not None else ball_id
+        return None
+
+    def balls_within(self, pos, distance):
+        """
+        当前时刻与 pos 的边缘距离不超过 distance 的彩球
+
+        Returns:
+            set: 彩球精灵或 id
+        """
+        now = self.time
+        px, py = pos
+        near = set()
+        for ball_id, ball in enumerate(self.balls):
+            if not ball["alive"]:
+                continue
+            x, y = self.position(ball_id, now)
+            reach = distance + ball["radius"]
+            if (x - px) ** 2 + (y - py) ** 2 <= reach * reach:
+                near.add(ball["sprite"] if ball["sprite"] is not None else ball_id)
+        return near
+
+    def sync_state(self):
+        """把当前时刻的位置和速度写回彩球精灵（控制器读取彩球状态前调用，不改绘制位置和贴图）"""
+        now = self.time
+        for ball_id, ball in enumerate(self.balls):
+            sprite = ball["sprite"]
+            # 本步刚进洞的彩球要到碰撞检测时才移除精灵，在那之前控制器仍能看到它
+            if sprite is None or not sprite.alive():
+                continue
+            sprite.x, sprite.y = self.position(ball_id, now)
+            sprite.speed_x = ball["speed_x"]
+            sprite.speed_y = ball["speed_y"]
+
+    def sync_sprites(self, t, breathing_frame):
+        """
+        按时刻 t 的位置更新所有彩球精灵（只在绘制前调用）
+
+        Args:
+            t: 绘制时刻（模拟步，可以是小数，用于渲染插值）
+            breathing_frame: 当前呼吸帧序号
+        """
+        for ball_id, ball in enumerate(self.balls):
+            sprite = ball["sprite"]
+            if not ball["alive"] or sprite is None:
+                continue
+            x, y = self.position(ball_id, t)
+            sprite.x = x
+            sprite.y = y
+            sprite.rect.center = (x, y)
+            strip = sprite.breathing_strip
+            sprite.image = strip[breathing_frame % len(strip)]
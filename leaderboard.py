@@ -0,0 +1,250 @@
+"""
+排行榜模块
+排行榜界面：每个难度用时最短的 10 次清场、各难度的个人最佳和分页的对局记录
+
+数据在档案库的后台线程中查询（排在本局的事务之后），进入结算界面时就开始预取，
+打开排行榜时直接显示；查询完成后投递一个事件唤醒帧循环重绘
+"""
+import time
+from functools import lru_cache
+
+import pygame
+
+from config import get_window_size, DIFFICULTY_CONFIG, BLUE
+from font_cache import get_font, render_text
+from dirty_rect import mark_dirty
+
+TOP_K = 10  # 每个难度显示的最快清场数
+PAGE_SIZE = 8  # 对局记录每页条数
+MARGIN = 30  # 表格左右边距
+COLUMN_GAP = 30  # 两栏之间的间距
+TWO_COLUMN_MIN_WIDTH = 760  # 窗口比这窄时两张表上下排列
+TABLE_TOP = 130
+TABLE_BOTTOM_SPACE = 70  # 底部留给按钮的高度
+LINE_HEIGHT = 26
+DIFFICULTY_NAMES = {"easy": "简单", "normal": "普通", "hell": "地狱"}
+REASON_NAMES = {"all_balls_absorbed": "清场", "time_survived": "坚持", "lose": "失败"}
+ITEM_NAMES = {"item1": "放大", "item2": "缩小"}
+
+# 查询完成时投递的事件（唤醒阻塞在事件等待上的帧循环）
+LEADERBOARD_LOADED = pygame.event.custom_type()
+
+
+def _format_ms(ms):
+    return "-" if ms is None else f"{ms / 1000:.2f}s"
+
+
+def _format_items(items):
+    return "+".join(ITEM_NAMES.get(name, name) for name in items.split(",")) if items else "无"
+
+
+@lru_cache(maxsize=256)
+def _fit_text(text, size, max_width):
+    """超出 max_width 像素的文字截断并加省略号"""
+    font = get_font(size)
+    if font.size(text)[0] <= max_width:
+        return text
+    # 二分查找能放下的最长前缀
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if font.size(text[:mid] + "…")[0] <= max_width:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + "…"
+
+
+class Leaderboard:
+    """排行榜数据和界面状态"""
+
+    def __init__(self):
+        self.difficulty = "easy"
+        self.data = None  # 最近一次加载完成的数据
+        self._future = None
+        self._page_starts = [None]  # 每一页的 before_id（上一页最后一条的 id），用于翻回上一页
+        self._next_before = None  # 下一页的 before_id，没有下一页时为 None
+
+    def refresh(self, difficulty=None):
+        """
+        在后台线程中重新加载（结束一局、切换难度或翻页时调用）
+
+        Args:
+            difficulty: 切换到的难度，None 保持不变
+        """
+        from profile_store import get_profile_store
+        if difficulty is not None and difficulty != self.difficulty:
+            self.difficulty = difficulty
+        store = get_profile_store()
+        if store is None:
+            return
+        difficulty, before_id = self.difficulty, self._page_starts[-1]
+
+        def load(conn):
+            # 多取一条判断是否还有下一页
+            rounds = store.get_rounds(PAGE_SIZE + 1, before_id, conn=conn)
+            return {
+                "difficulty": difficulty,
+                "fastest": store.get_fastest_clears(difficulty, TOP_K, conn=conn),
+                "bests": store.get_personal_bests(DIFFICULTY_CONFIG, conn=conn),
+                "rounds": rounds[:PAGE_SIZE],
+                "has_next": len(rounds) > PAGE_SIZE,
+                "round_count": store.get_round_count(conn=conn),
+            }
+        self._future = store.query_async(load)
+        self._future.add_done_callback(_wake_frame_loop)
+
+    def enter(self, difficulty=None):
+        """
+        进入排行榜界面时调用：还没有数据也没有正在加载（例如上次加载失败）时开始加载
+
+        Args:
+            difficulty: 要显示的难度，None 保持不变
+        """
+        if self.data is None and self._future is None:
+            self.refresh(difficulty)
+
+    def reset_pages(self):
+        """回到对局记录第一页"""
+        self._page_starts = [None]
+
+    def poll(self):
+        """取回已完成的查询结果"""
+        future = self._future
+        if future is None or not future.done():
+            return
+        self._future = None
+        try:
+            self.data = future.result()
+        except Exception as e:
+            print(f"加载排行榜失败：{e}")
+            return
+        rounds = self.data["rounds"]
+        self._next_before = rounds[-1]["id"] if rounds and self.data["has_next"] else None
+
+    def next_page(self):
+        if self._next_before is not None and self._future is None:
+            self._page_starts.append(self._next_before)
+            self.refresh()
+
+    def prev_page(self):
+        if len(self._page_starts) > 1 and self._future is None:
+            self._page_starts.pop()
+            self.refresh()
+
+    def draw(self, screen, is_clicked=False):
+        """
+        绘制排行榜界面
+
+        Returns:
+            str or None: 点击的按钮动作（"back"）
+        """
+        from ui import draw_button, draw_text
+        self.poll()
+        width, height = get_window_size()
+        draw_text("排行榜", 56, BLUE, width // 2, 40)
+
+        # 难度切换按钮
+        for i, difficulty in enumerate(DIFFICULTY_NAMES):
+            selected = difficulty == self.difficulty
+            color = (255, 215, 0) if selected else (255, 182, 193)
+            action = draw_button(DIFFICULTY_NAMES[difficulty], width // 2 + (i - 1) * 130, 95, 110, 40,
+                                 color, (205, 92, 92), difficulty, is_clicked)
+            if action and not selected:
+                self.reset_pages()
+                self.refresh(action)
+
+        data = self.data
+        if data is None:
+            from profile_store import get_profile_store
+            store = get_profile_store()
+            if store is None:
+                message = "档案库不可用，没有对局记录"
+            elif store.migrating:
+                message = "正在升级档案库（为对局记录建立索引）…"
+            else:
+                message = "加载中…"
+            draw_text(message, 28, (255, 255, 255), width // 2, height // 2)
+        else:
+            self._draw_tables(screen, data, width, height)
+
+        # 翻页和返回按钮（靠右排列，窄窗口时缩小返回按钮）
+        back_width = 160 if width >= 600 else 110
+        back_x = width - MARGIN // 2 - back_width // 2
+        next_x = back_x - back_width // 2 - 15 - 55
+        if draw_button("上一页", next_x - 125, height - 45, 110, 40, (220, 240, 255), (0, 100, 200),
+                       "prev", is_clicked) == "prev":
+            self.prev_page()
+        if draw_button("下一页", next_x, height - 45, 110, 40, (220, 240, 255), (0, 100, 200),
+                       "next", is_clicked) == "next":
+            self.next_page()
+        return draw_button("返回", back_x, height - 45, back_width, 40, (255, 182, 193), (205, 92, 92),
+                           "back", is_clicked)
+
+    def _draw_tables(self, screen, data, width, height):
+        white, gray, gold = (255, 255, 255), (200, 200, 200), (255, 215, 0)
+        bottom = height - TABLE_BOTTOM_SPACE
+        content_width = width - 2 * MARGIN
+
+        # 个人最佳（独占一行，横跨整个内容区）
+        best = data["bests"][data["difficulty"]]
+        self._line(screen, f"个人最佳　最快清场 {_format_ms(best['fastest_clear'])}　"
+                           f"最长坚持 {_format_ms(best['longest_survival'])}　"
+                           f"单局最多进洞 {best['most_absorbed'] if best['most_absorbed'] is not None else '-'}",
+                   20, gold, MARGIN, TABLE_TOP, content_width)
+
+        # 栏的位置按窗口宽度计算：够宽时左右两栏，否则上下排列、各占一半高度（放不下的行不画）
+        top = TABLE_TOP + 40
+        if width >= TWO_COLUMN_MIN_WIDTH:
+            column_width = (content_width - COLUMN_GAP) // 2
+            left, right = MARGIN, MARGIN + column_width + COLUMN_GAP
+            left_bottom, right_top = bottom, top
+        else:
+            column_width = content_width
+            left = right = MARGIN
+            left_bottom = right_top = (top + bottom) // 2
+
+        # 最快清场 Top K
+        lines = [(f"最快清场 Top {TOP_K}", 22, white)]
+        if not data["fastest"]:
+            lines.append(("还没有清场记录", 18, gray))
+        for rank, row in enumerate(data["fastest"], 1):
+            lines.append((f"{rank:>2}.  {_format_ms(row['elapsed_ms'])}   道具 {_format_items(row['items'])}",
+                          18, gold if rank == 1 else gray))
+        self._table(screen, lines, left, top, column_width, left_bottom)
+
+        # 对局记录（分页）
+        page = len(self._page_starts)
+        lines = [(f"对局记录（共 {data['round_count']} 局，第 {page} 页）", 22, white)]
+        for row in data["rounds"]:
+            played = time.strftime("%m-%d %H:%M", time.localtime(row["played_at"]))
+            lines.append((f"{played}  {DIFFICULTY_NAMES.get(row['difficulty'], row['difficulty'])}  "
+                          f"{REASON_NAMES.get(row['reason'], row['reason'])}  {_format_ms(row['elapsed_ms'])}  "
+                          f"进洞 {row['balls_absorbed']}  道具 {_format_items(row['items'])}", 18, gray))
+        self._table(screen, lines, right, right_top, column_width, bottom)
+
+    def _table(self, screen, lines, x, y, max_width, bottom):
+        """绘制一张表（第一行是标题），超出 bottom 的行不画"""
+        for i, (text, size, color) in enumerate(lines):
+            if y + LINE_HEIGHT > bottom:
+                break
+            self._line(screen, text, size, color, x, y, max_width)
+            y += 32 if i == 0 else LINE_HEIGHT
+
+    @staticmethod
+    def _line(screen, text, size, color, x, y, max_width):
+        surface = render_text(_fit_text(text, size, max_width), size, color)
+        rect = screen.blit(surface, (x, y))
+        mark_dirty(rect)
+
+
+def _wake_frame_loop(future):
+    # 在档案库的后台线程中调用
+    try:
+        pygame.event.post(pygame.event.Event(LEADERBOARD_LOADED))
+    except pygame.error:
+        pass
+
+
+# 全局排行榜实例
+leaderboard = Leaderboard()
@@ -3,13 +3,21 @@ import random
 
 # 导入配置和核心模块
 from config import (
-    SCREEN, FPS, TIME_LIMIT,
+    FPS, TIME_LIMIT,
+    init,
+    get_screen,
     get_window_size,
+    get_data_path,
     get_background_image,
     update_window,
     update_gif_frame,
     WHITE, BLACK, GRAY, DARK_GRAY, BLUE, RED, GREEN, SCORE_RULE,
     WIN_LOSE_DELAY,
+    SIM_TICK_MS, MAX_CATCH_UP_STEPS,
+    DIRTY_RECT_RENDERING,
+    PROFILER_ENABLED, PROFILER_TOGGLE_KEY, PROFILER_CSV,
+    FRAME_PACING,
+    set_top_tip,
     GameState
 )
 
@@ -24,11 +32,16 @@ from ui import (
 
 # 导入游戏逻辑模块
 from game_logic import (
-    reset_game, all_sprites, balls, holes,
+    reset_game, balls, holes, update_all_sprites,
     check_ball_hole_collision, check_player_collision, check_win_condition,
-    get_player_ball, get_current_difficulty, get_elapsed_time, get_remaining_time
+    step_simulation, apply_render_interpolation, draw_sprites, set_player_controller, set_event_listener,
+    get_player_ball, get_current_difficulty, get_elapsed_time, get_remaining_time,
+    get_round_info
 )
 
+# 导入回放
+from replay import ReplayController, flush_replays
+
 # 导入积分道具系统
 from score_item_system import (
     add_score,
@@ -38,11 +51,28 @@ from score_item_system import (
     get_owned_items,
     get_active_items,  # 新增：获取激活的道具状态
     draw_tip,  # 提示绘制函数
-    set_tip  # 设置提示
+    set_tip,  # 设置提示
+    load_profile  # 从档案库读取积分和道具
 )
 
+# 导入玩家档案库和排行榜
+from profile_store import get_profile_store, commit_profile, close_profile
+from leaderboard import leaderboard
+
 # 导入成就系统
-from achievement_system import achievement_system
+from achievement_system import get_achievement_system, flush_achievements, ROW_HEIGHT as ACHIEVEMENT_ROW_HEIGHT
+
+# 导入字体缓存
+from font_cache import get_font
+
+# 导入脏矩形渲染
+import dirty_rect
+
+# 导入帧节奏控制
+from frame_pacing import FramePacer
+
+# 导入帧耗时分析
+import profiler
 
 # 胜负提示文案配置
 WIN_TEXT = {
@@ -62,11 +92,7 @@ GameState.ACHIEVEMENTS = 6  # 成就界面
 
 # ========== 新增：绘制游戏时间 ==========
 def draw_game_time(screen):
-    from config import FONT_PATH
-    try:
-        font = pygame.font.Font(FONT_PATH, 24)
-    except:
-        font = pygame.font.SysFont("simhei", 24)
+    font = get_font(24)
 
     # 获取已游戏时间（秒）
     elapsed_ms = get_elapsed_time()
@@ -83,6 +109,7 @@ def draw_game_time(screen):
     time_surface = font.render(time_text, True, (255, 255, 255))
     time_rect = time_surface.get_rect(topleft=(10, 10))
     screen.blit(time_surface, time_rect)
+    dirty_rect.mark_dirty(time_rect)
 
     # 显示剩余时间（在右侧）
     WIDTH, HEIGHT = get_window_size()
@@ -99,6 +126,7 @@ def draw_game_time(screen):
     remaining_surface = font.render(remaining_text, True, color)
     remaining_rect = remaining_surface.get_rect(topright=(WIDTH - 10, 10))
     screen.blit(remaining_surface, remaining_rect)
+    dirty_rect.mark_dirty(remaining_rect)
 
     # 绘制进度条
     progress = min(1.0, elapsed_ms / TIME_LIMIT)
@@ -112,10 +140,59 @@ def draw_game_time(screen):
     # 进度条
     pygame.draw.rect(screen, (0, 200, 0) if progress < 0.7 else (255, 200, 0) if progress < 0.9 else (255, 50, 50),
                      (bar_x, bar_y, int(bar_width * progress), bar_height), border_radius=4)
+    dirty_rect.mark_dirty((bar_x, bar_y, bar_width, bar_height))
+
+
+def show_achievement(info):
+    """有新成就解锁时显示顶部提示"""
+    if info:
+        set_top_tip(f"🎉 成就解锁：{info['name']}", (255, 215, 0))  # 金色提示
+
+
+def on_game_event(event, **data):
+    """对局中的事件（彩球进洞、擦身而过）交给成就系统"""
+    show_achievement(get_achievement_system().handle_event(event, **data))
+
+
+def record_round(reason, score_delta):
+    """记录本局，并把这一局的所有修改（积分、道具、成就、对局记录）作为一个事务提交"""
+    store = get_profile_store()
+    if store is None:
+        return
+    info = get_round_info()
+    store.add_round(info["difficulty"], info["seed"], info["items"], reason,
+                    info["elapsed_ms"], info["balls_absorbed"], score_delta)
+    store.commit()
+    # 进入结算界面时就开始预取排行榜（查询排在本局的事务之后）
+    leaderboard.reset_pages()
+    leaderboard.refresh(info["difficulty"])
+
+
+def _shutdown(pacer):
+    """退出游戏：写完回放、档案和成就，输出帧耗时与帧节奏统计，关闭 pygame"""
+    flush_replays()
+    flush_achievements()
+    close_profile()
+    profiler.shutdown(get_data_path(PROFILER_CSV))
+    if pacer is not None:
+        pacer.report()
+    pygame.quit()
+
+
+def main(replay=None, replay_speed=1.0):
+    """
+    游戏主循环（整合所有功能）
+
+    Args:
+        replay: 要播放的回放（replay.Replay），None 为正常游戏
+        replay_speed: 回放倍速
+    """
+    # 初始化 pygame 和窗口（导入模块时不再创建窗口）
+    init()
+    profiler.set_enabled(PROFILER_ENABLED)
+    load_profile()
+    achievement_system = get_achievement_system()
 
-
-def main():
-    """游戏主循环（整合所有功能）"""
     # 初始化游戏状态
     clock = pygame.time.Clock()
     current_state = GameState.START
@@ -123,48 +200,105 @@ def main():
     is_mouse_up = False  # 鼠标左键松开标记（防止点击过快）
     # ========== 新增：胜利原因 ==========
     win_reason = ""  # "all_balls_absorbed" 或 "time_survived"
+    sim_accumulator = 0  # 固定时间步累加器（毫秒）
 
     # ========== 新增：成就系统相关变量 ==========
     unlocked_achievement = None
     achievement_show_time = 0
     ACHIEVEMENT_SHOW_DURATION = 3000  # 成就显示3秒
 
+    # ========== 新增：回放模式直接进入对局，主球由回放驱动 ==========
+    sim_speed = 1.0
+    # 回放的这一局一直到结算界面都不计积分、成就和对局记录
+    watching_replay = replay is not None
+    if replay is not None:
+        if get_window_size() != (replay.width, replay.height):
+            update_window(replay.width, replay.height)
+        set_player_controller(ReplayController(replay))
+        current_state = reset_game(replay.difficulty, seed=replay.seed, items=replay.items, record=False)
+        sim_speed = replay_speed
+    # 回放时对局中的事件不计入成就
+    set_event_listener(on_game_event if replay is None else None)
+
+    # ========== 新增：帧节奏控制（静态界面只在需要时重绘） ==========
+    pacer = FramePacer(FPS) if FRAME_PACING else None
+
     while True:
+        profiler.begin_frame()
+        # 需要连续刷新的状态（开启帧耗时浮层时也一直刷新）
+        active = current_state in (GameState.PLAYING, GameState.WIN_DISPLAY, GameState.LOSE_DISPLAY) \
+            or profiler.is_enabled()
         # 帧率控制（获取每帧耗时，用于GIF播放）
-        dt = clock.tick(FPS)
+        if pacer is not None:
+            dt = pacer.wait(active)
+        else:
+            dt = clock.tick(FPS)
+        profiler.mark("wait")
         # 实时获取当前窗口尺寸
         WIDTH, HEIGHT = get_window_size()
+        SCREEN = get_screen()
 
         # ========== 更新GIF背景帧 ==========
-        update_gif_frame(dt)
+        # 背景换帧时脏矩形模式必须整屏重绘
+        gif_changed = update_gif_frame(dt)
+        if gif_changed:
+            dirty_rect.request_full_redraw()
+        profiler.mark("gif")
 
         # ========== 事件监听 ==========
         mouse_pos = pygame.mouse.get_pos()
         # 重置鼠标松开标记
         is_mouse_up = False
 
-        for event in pygame.event.get():
+        events = pacer.get_events() if pacer is not None else pygame.event.get()
+        for event in events:
             # 退出游戏
             if event.type == pygame.QUIT:
-                pygame.quit()
+                _shutdown(pacer)
                 return
             # 窗口缩放事件
             elif event.type == pygame.VIDEORESIZE:
                 update_window(event.w, event.h)
+                SCREEN = get_screen()
+                dirty_rect.request_full_redraw()
+                if pacer is not None:
+                    pacer.request_redraw()
                 pygame.display.flip()
             # 鼠标左键松开事件（精准检测点击）
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
                     is_mouse_up = True
+            # 开关帧耗时浮层
+            elif event.type == pygame.KEYDOWN and event.key == PROFILER_TOGGLE_KEY:
+                profiler.toggle()
+                dirty_rect.request_full_redraw()
+            # ========== 新增：成就列表滚动（滚轮/方向键/翻页键） ==========
+            elif event.type == pygame.MOUSEWHEEL and current_state == GameState.ACHIEVEMENTS:
+                achievement_system.scroll(-event.y * ACHIEVEMENT_ROW_HEIGHT)
+            elif event.type == pygame.KEYDOWN and current_state == GameState.ACHIEVEMENTS:
+                scroll_keys = {pygame.K_UP: -ACHIEVEMENT_ROW_HEIGHT, pygame.K_DOWN: ACHIEVEMENT_ROW_HEIGHT,
+                               pygame.K_PAGEUP: -HEIGHT // 2, pygame.K_PAGEDOWN: HEIGHT // 2}
+                if event.key in scroll_keys:
+                    achievement_system.scroll(scroll_keys[event.key])
+        profiler.mark("events")
+
+        # 静态界面没有变化时跳过绘制（线程在下一帧的等待中阻塞）
+        if pacer is not None and not pacer.should_redraw(current_state, active, events, gif_changed):
+            profiler.end_frame()
+            continue
 
         # ========== 绘制背景 ==========
         background = get_background_image()
-        SCREEN.blit(background, (0, 0))
+        if DIRTY_RECT_RENDERING:
+            dirty_rect.begin_frame(SCREEN, background)
+        else:
+            SCREEN.blit(background, (0, 0))
+        profiler.mark("background")
 
         # ========== 主球跟随逻辑（游戏中） ==========
         if current_state == GameState.PLAYING:
             player_ball = get_player_ball()
-            if player_ball is not None:
+            if player_ball is not None and player_ball.controller is None:
                 player_ball.rect.center = mouse_pos
 
         # ========== 游戏状态管理 ==========
@@ -185,44 +319,70 @@ def main():
             easy_action, normal_action, hell_action = draw_difficulty_buttons(is_mouse_up)
             if easy_action == "easy":
                 current_state = reset_game("easy")
+                sim_accumulator = 0
                 # ========== 新增：通知成就系统开始新游戏 ==========
-                used_items = any(get_active_items().values())
+                used_items = any(get_round_info()["items"].values())
                 achievement_system.start_new_game("easy", used_items)
             elif normal_action == "normal":
                 current_state = reset_game("normal")
+                sim_accumulator = 0
                 # ========== 新增：通知成就系统开始新游戏 ==========
-                used_items = any(get_active_items().values())
+                used_items = any(get_round_info()["items"].values())
                 achievement_system.start_new_game("normal", used_items)
             elif hell_action == "hell":
                 current_state = reset_game("hell")
+                sim_accumulator = 0
                 # ========== 新增：通知成就系统开始新游戏 ==========
-                used_items = any(get_active_items().values())
+                used_items = any(get_round_info()["items"].values())
                 achievement_system.start_new_game("hell", used_items)
+            # 开局前在菜单中的购买/使用道具随开局一起提交
+            if current_state == GameState.PLAYING:
+                commit_profile()
 
         # 游戏中界面
         elif current_state == GameState.PLAYING:
-            # 更新精灵状态
-            all_sprites.update()
-            # 检测彩球入洞（彩球和黑洞都会消失）
-            check_ball_hole_collision()
+            # ========== 固定时间步推进模拟（与渲染帧率无关） ==========
+            sim_accumulator += dt * sim_speed
+            outcome, reason = None, None
+            steps = 0
+            max_steps = MAX_CATCH_UP_STEPS * max(1, int(sim_speed + 0.999))
+            while sim_accumulator >= SIM_TICK_MS and steps < max_steps:
+                sim_accumulator -= SIM_TICK_MS
+                steps += 1
+                # 更新精灵状态 + 彩球入洞 + 胜负判定
+                outcome, reason = step_simulation()
+                if outcome:
+                    break
+            # 追赶不过来时丢弃积压的时间（游戏变慢而不是瞬移）
+            if steps == max_steps:
+                sim_accumulator = min(sim_accumulator, SIM_TICK_MS)
+            # 彩球按两次模拟步之间的插值位置绘制
+            apply_render_interpolation(min(1.0, sim_accumulator / SIM_TICK_MS))
+            profiler.mark("update")
 
             # ========== 绘制游戏时间 ==========
             draw_game_time(SCREEN)
+            profiler.mark("hud")
+
+            # 回放结束后恢复鼠标操作
+            if outcome and replay is not None:
+                set_player_controller(None)
+                set_event_listener(on_game_event)
+                replay, sim_speed = None, 1.0
 
             # 胜负判定
-            if check_player_collision():
+            if outcome == "lose":
                 current_state = GameState.LOSE_DISPLAY
                 win_lose_start_time = pygame.time.get_ticks()
                 win_reason = "lose"
-            else:
-                win_result, reason = check_win_condition()
-                if win_result:
-                    current_state = GameState.WIN_DISPLAY
-                    win_lose_start_time = pygame.time.get_ticks()
-                    win_reason = reason
+            elif outcome == "win":
+                current_state = GameState.WIN_DISPLAY
+                win_lose_start_time = pygame.time.get_ticks()
+                win_reason = reason
 
             # 绘制所有精灵
-            all_sprites.draw(SCREEN)
+            dirty_rect.mark_dirty_rects(draw_sprites(SCREEN))
+            profiler.mark("sprites")
 
         # 胜利提示界面
         elif current_state == GameState.WIN_DISPLAY:
@@ -231,7 +391,10 @@ def main():
             draw_text(win_text, 74, GREEN, WIDTH // 2, HEIGHT // 2)
 
             # ========== 修改：根据胜利原因显示不同提示 ==========
-            if win_reason == "time_survived":
+            if watching_replay:
+                score_to_add = 0
+                draw_text("回放结束", 40, (255, 215, 0), WIDTH // 2, HEIGHT // 2 + 60)
+            elif win_reason == "time_survived":
                 score_to_add = SCORE_RULE[current_diff]
                 draw_text(f"坚持10秒胜利！获得{score_to_add}积分", 40, (255, 215, 0), WIDTH // 2, HEIGHT // 2 + 60)
             else:  # all_balls_absorbed
@@ -239,22 +402,24 @@ def main():
                 draw_text(f"获得 {score_to_add} 积分", 30, (255, 215, 0), WIDTH // 2, HEIGHT // 2 + 60)
 
             if pygame.time.get_ticks() - win_lose_start_time >= WIN_LOSE_DELAY:
-                # ========== 修改：两种胜利方式都给予积分 ==========
-                add_score(current_diff)  # 两种胜利方式都用相同的积分
+                if watching_replay:
+                    watching_replay = False
+                else:
+                    # ========== 修改：两种胜利方式都给予积分 ==========
+                    add_score(current_diff)  # 两种胜利方式都用相同的积分
 
-                # ========== 新增：检查并解锁成就 ==========
-                new_achievement = achievement_system.check_level_completion(current_diff, win_reason)
-                if new_achievement:
+                    # ========== 新增：检查并解锁成就 ==========
+                    new_achievement = achievement_system.check_level_completion(current_diff, win_reason,
+                                                                                get_elapsed_time())
+                    if new_achievement:
 
-                    unlocked_achievement = new_achievement
-                    achievement_show_time = pygame.time.get_ticks()
+                        unlocked_achievement = new_achievement
+                        achievement_show_time = pygame.time.get_ticks()
 
-                    # ========== 关键修改：使用顶部提示 ==========
-                    from config import set_top_tip
-                    tip_text = f"🎉 成就解锁：{new_achievement['name']}"
-
-                    set_top_tip(tip_text, (255, 215, 0))  # 金色提示
+                        # ========== 关键修改：使用顶部提示 ==========
+                        show_achievement(new_achievement)
 
+                    record_round(win_reason, score_to_add)
                 current_state = GameState.END_MENU
 
         # 失败提示界面
@@ -263,8 +428,15 @@ def main():
             lose_text = LOSE_TEXT[current_diff]
             draw_text(lose_text, 74, RED, WIDTH // 2, HEIGHT // 2)
             # 失败积分提示-白色字体清晰可见 ✔优化
-            draw_text("积分不变，再接再厉！", 30, BLACK, WIDTH // 2, HEIGHT // 2 + 60)
+            draw_text("回放结束" if watching_replay else "积分不变，再接再厉！", 30, BLACK, WIDTH // 2, HEIGHT // 2 + 60)
             if pygame.time.get_ticks() - win_lose_start_time >= WIN_LOSE_DELAY:
+                if watching_replay:
+                    watching_replay = False
+                else:
+                    # 失败也通知成就系统（连胜清零）
+                    show_achievement(achievement_system.check_level_completion(current_diff, "lose",
+                                                                               get_elapsed_time()))
+                    record_round("lose", 0)
                 current_state = GameState.END_MENU
 
         # 结算界面（游戏结束）
@@ -286,6 +458,9 @@ def main():
             # ========== 新增：成就按钮（右下角） ==========
             achievement_action = draw_button("查看成就", WIDTH - 100, HEIGHT - 80, 160, 55, (255, 182, 193),
                                              (205, 92, 92), "achievements", is_mouse_up)
+            # ========== 新增：排行榜按钮（左下角） ==========
+            leaderboard_action = draw_button("排行榜", 100, HEIGHT - 80, 160, 55, (255, 182, 193),
+                                             (205, 92, 92), "leaderboard", is_mouse_up)
 
             # 道具购买按钮
             item1_action, item2_action, use_item_action = draw_item_buttons(is_mouse_up)
@@ -294,14 +469,12 @@ def main():
             if item1_action == "buy_item1":
                 success, msg = buy_item("item1")
                 if success:
-                    # 购买道具即视为使用道具（因为道具会在下一局生效）
-                    achievement_system.mark_item_used()
+                    show_achievement(achievement_system.mark_item_bought("item1"))
 
             if item2_action == "buy_item2":
                 success, msg = buy_item("item2")
                 if success:
-                    # 购买道具即视为使用道具（因为道具会在下一局生效）
-                    achievement_system.mark_item_used()
+                    show_achievement(achievement_system.mark_item_bought("item2"))
 
             # 处理道具使用逻辑
             if use_item_action == "use_item":
@@ -309,16 +482,19 @@ def main():
                 used = use_all_items()
                 if used:
                     # 使用道具
-                    achievement_system.mark_item_used()
+                    show_achievement(achievement_system.mark_item_used())
 
             # 按钮事件响应
             if restart_action == "restart":
                 current_state = GameState.START
             elif quit_action == "quit":
-                pygame.quit()
+                _shutdown(pacer)
                 return
             elif achievement_action == "achievements":
                 current_state = GameState.ACHIEVEMENTS
+            elif leaderboard_action == "leaderboard":
+                leaderboard.enter(get_current_difficulty())
+                current_state = GameState.LEADERBOARD
 
         # ========== 新增：成就界面 ==========
         elif current_state == GameState.ACHIEVEMENTS:
@@ -329,9 +505,10 @@ def main():
             unlocked_count, total_count = achievement_system.get_achievement_count()
             draw_text(f"已解锁：{unlocked_count}/{total_count}", 36, (255, 215, 0), WIDTH // 2, 140)
 
-            # 绘制所有成就
+            # 绘制成就（可滚动，只绘制可见的条目；底部留出返回按钮的位置）
             start_y = 180
-            achievement_system.draw_achievement_list(SCREEN, WIDTH // 2 - 200, start_y, show_hidden=True)
+            achievement_system.draw_achievement_list(SCREEN, WIDTH // 2 - 200, start_y, show_hidden=True,
+                                                     height=HEIGHT - start_y - 120)
 
             # 返回按钮（右下角）
             back_action = draw_button("返回", WIDTH - 100, HEIGHT - 80, 160, 55, (255, 182, 193), (205, 92, 92), "back",
@@ -340,11 +517,25 @@ def main():
             if back_action == "back":
                 current_state = GameState.END_MENU
 
+        # ========== 新增：排行榜界面 ==========
+        elif current_state == GameState.LEADERBOARD:
+            if leaderboard.draw(SCREEN, is_mouse_up) == "back":
+                current_state = GameState.END_MENU
+
         # 绘制全局提示（包括成就提示）
         draw_tip(SCREEN)
+        profiler.draw_overlay(SCREEN)
+        profiler.mark("hud")
 
         # 更新屏幕显示
-        pygame.display.flip()
+        if DIRTY_RECT_RENDERING:
+            dirty_rect.end_frame()
+        else:
+            pygame.display.flip()
+        if pacer is not None:
+            pacer.frame_drawn()
+        profiler.mark("flip")
+        profiler.end_frame()
 
 
 if __name__ == "__main__":
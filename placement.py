@@ -0,0 +1,168 @@
+"""
+出生点放置模块
+基于网格加速的随机投点（带最小间距的 Poisson-disk 采样）+ 最佳候选兜底：
+每个点最多尝试固定次数，保证关卡初始化一定能结束；约束无法满足时自动放宽并报告
+"""
+import math
+import random
+
+from collision import SpatialHash
+
+# 某个点放不下时，之后的间距/安全距离缩小到原来的这个比例
+RELAX_FACTOR = 0.9
+
+
+class _Point:
+    """放进空间哈希的点（SpatialHash 按 rect.center 和 radius 索引）"""
+    __slots__ = ("rect", "radius", "clearance")
+
+    def __init__(self, x, y, clearance):
+        self.rect = _Center(x, y)
+        self.radius = clearance
+        self.clearance = clearance
+
+
+class _Center:
+    __slots__ = ("center",)
+
+    def __init__(self, x, y):
+        self.center = (x, y)
+
+
+def _random_coord(rng, low, high):
+    # 窗口太小时区间可能为空，退回区间中点
+    if low > high:
+        return (low + high) // 2
+    return rng.randint(low, high)
+
+
+def _build_obstacle_grid(obstacles):
+    """
+    把障碍物 (x, y, 安全距离) 放进空间哈希，查询半径为 0 即可找到所有可能冲突的障碍物
+    """
+    max_clearance = max((c for _, _, c in obstacles), default=0)
+    grid = SpatialHash(cell_size=max(16, min(max_clearance, 64)))
+    for x, y, clearance in obstacles:
+        grid.insert(_Point(x, y, clearance))
+    return grid
+
+
+def _slack(grid, x, y, stop_below, scale=1.0):
+    """
+    计算候选点的最小余量：min(距离 - 安全距离 * scale)，>= 0 表示满足所有约束
+
+    余量一旦低于 stop_below 就提前返回（最佳候选剪枝），由近到远遍历格子让剪枝尽早发生
+    """
+    worst = math.inf
+    hypot = math.hypot
+    for bucket in grid.iter_buckets_near(x, y, grid.max_radius * scale):
+        for point in bucket:
+            px, py = point.rect.center
+            slack = hypot(x - px, y - py) - point.clearance * scale
+            if slack < worst:
+                worst = slack
+                if worst < stop_below:
+                    return worst
+    return worst
+
+
+def estimate_capacity(width, height, margin, min_distance):
+    """估算给定区域内按最小间距最多能放下多少个点（六边形密堆积）"""
+    usable_w = max(1, width - margin * 2)
+    usable_h = max(1, height - margin * 2)
+    if min_distance <= 0:
+        return math.inf
+    return int((usable_w + min_distance) * (usable_h + min_distance) / (min_distance ** 2 * math.sqrt(3) / 2))
+
+
+def place_points(count, width, height, margin, min_distance=0, obstacles=(), rng=random, max_attempts=30):
+    """
+    在窗口内随机放置 count 个点
+
+    每个点最多尝试 max_attempts 次随机位置，先找满足所有约束的位置；
+    都不满足时取余量最大的候选（最佳候选采样），并把之后的间距/安全距离按
+    RELAX_FACTOR 逐步缩小，区域被占满时后续的点很快就能放下，总工作量有上限
+
+    Args:
+        count: 点的数量
+        width: 区域宽度
+        height: 区域高度
+        margin: 离边缘的最小距离
+        min_distance: 点与点之间的最小距离
+        obstacles: 需要避开的障碍物列表 [(x, y, 安全距离), ...]
+        rng: 随机数生成器（random 模块或 random.Random 实例）
+        max_attempts: 每个点最多尝试次数
+
+    Returns:
+        tuple: (点列表 [(x, y), ...], 报告 dict)
+            报告包含 requested/placed/relaxed（放宽的点数）/scale（最终约束比例）
+            /min_distance/infeasible（间距约束超出区域容量）
+    """
+    report = {
+        "requested": count,
+        "placed": 0,
+        "relaxed": 0,
+        "scale": 1.0,
+        "min_distance": min_distance,
+        "infeasible": False,
+    }
+
+    # 间距约束明显放不下时，先按容量缩小间距
+    capacity = estimate_capacity(width, height, margin, min_distance)
+    if count > capacity:
+        report["infeasible"] = True
+        usable = max(1, width - margin * 2) * max(1, height - margin * 2)
+        min_distance = math.sqrt(usable / (count * math.sqrt(3) / 2)) * 0.9
+        report["min_distance"] = min_distance
+
+    obstacle_grid = _build_obstacle_grid(obstacles)
+    point_grid = SpatialHash(cell_size=max(16, min_distance))
+    points = []
+    low_x, high_x = margin, width - margin
+    low_y, high_y = margin, height - margin
+
+    scale = 1.0
+    for _ in range(count):
+        best = None
+        best_slack = -math.inf
+        for _ in range(max_attempts):
+            x = _random_coord(rng, low_x, high_x)
+            y = _random_coord(rng, low_y, high_y)
+            slack = _slack(obstacle_grid, x, y, best_slack, scale)
+            if min_distance > 0 and slack > best_slack:
+                slack = min(slack, _slack(point_grid, x, y, best_slack, scale))
+            if slack > best_slack:
+                best, best_slack = (x, y), slack
+                if slack >= 0:
+                    break
+
+        if best_slack < 0:
+            # 放不下：使用最佳候选，并放宽后续的点
+            report["relaxed"] += 1
+            scale *= RELAX_FACTOR
+        points.append(best)
+        if min_distance > 0:
+            point_grid.insert(_Point(best[0], best[1], min_distance))
+
+    report["placed"] = len(points)
+    report["scale"] = scale
+    return points, report
+
+
+def find_safe_position(width, height, margin, obstacles, rng=random, max_attempts=200):
+    """
+    寻找一个离所有障碍物都足够远的位置（最佳候选采样）
+
+    Args:
+        width: 区域宽度
+        height: 区域高度
+        margin: 离边缘的最小距离
+        obstacles: 障碍物列表 [(x, y, 安全距离), ...]
+        rng: 随机数生成器
+        max_attempts: 最多尝试次数
+
+    Returns:
+        tuple: ((x, y), 是否完全满足安全距离)
+    """
+    points, report = place_points(1, width, height, margin, 0, obstacles, rng, max_attempts)
+    return points[0], report["relaxed"] == 0
@@ -0,0 +1,343 @@
+"""
+玩家档案存储模块
+积分、道具、成就和每局记录统一保存在一个 SQLite 档案库中（WAL 模式）
+
+- 启动时只读积分、道具、成就这几张小表，对局记录按页查询，记录再多也能毫秒级打开
+- 排行榜（每个难度最快清场）和个人最佳都走索引，不扫描对局记录；对局数单独计数
+- 游戏线程的修改先暂存在内存中（同一项多次修改只保留最后一次），每局结束时 commit()
+  把这一局的所有修改作为一个事务交给后台线程写入，帧循环不等待磁盘
+- 没有 sqlite3 模块或关闭 PROFILE_STORE_ENABLED 时 get_profile_store() 返回 None，
+  积分和道具只保存在内存中，成就退回 JSON 文件存档
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from config import PROFILE_STORE_ENABLED, PROFILE_DB, get_data_path
+
+SCHEMA_VERSION = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inventory (
+    item TEXT PRIMARY KEY,
+    owned INTEGER NOT NULL,
+    active INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS achievements (
+    id TEXT PRIMARY KEY,
+    unlocked INTEGER NOT NULL,
+    unlock_time INTEGER,
+    progress INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    difficulty TEXT NOT NULL,
+    seed INTEGER,
+    items TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    elapsed_ms INTEGER NOT NULL,
+    balls_absorbed INTEGER NOT NULL,
+    score_delta INTEGER NOT NULL
+);
+"""
+# 索引在后台线程中建立（对局记录很多时要几秒，不能卡住启动）
+INDEXES = """
+CREATE INDEX IF NOT EXISTS rounds_clears ON rounds (difficulty, reason, elapsed_ms);
+CREATE INDEX IF NOT EXISTS rounds_survival ON rounds (difficulty, elapsed_ms);
+CREATE INDEX IF NOT EXISTS rounds_absorbed ON rounds (difficulty, balls_absorbed);
+"""
+CLEAR_REASON = "all_balls_absorbed"  # 清场（所有彩球入洞）的结束原因
+ROUND_COLUMNS = ("id", "played_at", "difficulty", "seed", "items", "reason",
+                 "elapsed_ms", "balls_absorbed", "score_delta")
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL 下 NORMAL 只在检查点时 fsync，崩溃最多丢失最后几个事务，不会损坏档案
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ProfileStore:
+    """玩家档案库"""
+
+    def __init__(self, path):
+        self.path = path
+        self.commits = 0  # 提交给后台线程的事务数
+        self._conn = _connect(path)  # 游戏线程只用它读
+        self._pending = {}  # (表, 键) -> (sql, 参数)，同一项只保留最后一次修改
+        self._pending_rounds = []
+        self._queue = None
+        self._thread = None
+        self.migrating = False  # 后台线程还在升级档案库（建立索引）
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if 0 < version < 2:
+                # 版本 2：成就增加规则计数
+                self._conn.execute("ALTER TABLE achievements ADD COLUMN progress INTEGER NOT NULL DEFAULT 0")
+        if version < SCHEMA_VERSION:
+            # 要扫描对局记录的升级排在后台线程的最前面，之后提交的事务和查询都在它完成后执行；
+            # 启动只读积分、道具和成就，不需要等它
+            self.migrating = True
+            self._submit(lambda conn: self._migrate(conn, version))
+
+    def _migrate(self, conn, version):
+        try:
+            with conn:
+                conn.executescript(INDEXES)
+                if version < 3:
+                    # 版本 3：对局数单独计数，显示分页时不再 COUNT(*) 整张表
+                    conn.execute("INSERT OR REPLACE INTO profile (key, value) "
+                                 "VALUES ('round_count', (SELECT COUNT(*) FROM rounds))")
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        except sqlite3.Error as e:
+            print(f"升级档案库失败：{e}")
+        finally:
+            self.migrating = False
+
+    # ========== 读取 ==========
+    def load_profile(self):
+        """
+        读取积分、道具和成就（不读对局记录）
+
+        Returns:
+            dict: score/owned_items/active_items/achievements，
+                achievements 为 {成就ID: {"unlocked", "unlock_time", "progress"}}
+        """
+        conn = self._conn
+        row = conn.execute("SELECT value FROM profile WHERE key = 'score'").fetchone()
+        owned, active = {}, {}
+        for item, item_owned, item_active in conn.execute("SELECT item, owned, active FROM inventory"):
+            owned[item] = item_owned
+            active[item] = bool(item_active)
+        achievements = {
+            achievement_id: {"unlocked": bool(unlocked), "unlock_time": unlock_time, "progress": progress}
+            for achievement_id, unlocked, unlock_time, progress in conn.execute(
+                "SELECT id, unlocked, unlock_time, progress FROM achievements")
+        }
+        return {
+            "score": row[0] if row else 0,
+            "owned_items": owned,
+            "active_items": active,
+            "achievements": achievements,
+        }
+
+    # 以下查询都可以传入 conn，在后台线程中执行（见 query_async）
+    def get_round_count(self, conn=None):
+        """已保存的对局数"""
+        row = (conn or self._conn).execute("SELECT value FROM profile WHERE key = 'round_count'").fetchone()
+        return row[0] if row else 0
+
+    def get_rounds(self, limit=20, before_id=None, conn=None):
+        """
+        按时间倒序分页读取对局记录（按 id 翻页，不用 OFFSET，翻到多深都不扫描前面的记录）
+
+        Args:
+            limit: 每页条数
+            before_id: 只读 id 小于它的记录（上一页最后一条的 id），None 为第一页
+
+        Returns:
+            list: [{列名: 值}, ...]
+        """
+        sql = f"SELECT {', '.join(ROUND_COLUMNS)} FROM rounds"
+        if before_id is None:
+            rows = (conn or self._conn).execute(f"{sql} ORDER BY id DESC LIMIT ?", (limit,))
+        else:
+            rows = (conn or self._conn).execute(f"{sql} WHERE id < ? ORDER BY id DESC LIMIT ?", (before_id, limit))
+        return [dict(zip(ROUND_COLUMNS, row)) for row in rows]
+
+    def get_fastest_clears(self, difficulty, limit=10, conn=None):
+        """某难度用时最短的清场对局（走 rounds_clears 索引）"""
+        rows = (conn or self._conn).execute(
+            f"SELECT {', '.join(ROUND_COLUMNS)} FROM rounds WHERE difficulty = ? AND reason = ? "
+            f"ORDER BY elapsed_ms, id LIMIT ?", (difficulty, CLEAR_REASON, limit))
+        return [dict(zip(ROUND_COLUMNS, row)) for row in rows]
+
+    def get_personal_bests(self, difficulties, conn=None):
+        """
+        各难度的个人最佳（每项都是一次索引查找）
+
+        Returns:
+            dict: {难度: {"fastest_clear": 毫秒, "longest_survival": 毫秒, "most_absorbed": 个数}}，
+                没有记录的项为 None
+        """
+        conn = conn or self._conn
+        bests = {}
+        for difficulty in difficulties:
+            bests[difficulty] = {
+                "fastest_clear": conn.execute(
+                    "SELECT MIN(elapsed_ms) FROM rounds WHERE difficulty = ? AND reason = ?",
+                    (difficulty, CLEAR_REASON)).fetchone()[0],
+                "longest_survival": conn.execute(
+                    "SELECT MAX(elapsed_ms) FROM rounds WHERE difficulty = ?", (difficulty,)).fetchone()[0],
+                "most_absorbed": conn.execute(
+                    "SELECT MAX(balls_absorbed) FROM rounds WHERE difficulty = ?", (difficulty,)).fetchone()[0],
+            }
+        return bests
+
+    # ========== 暂存修改 ==========
+    def set_score(self, score):
+        self._pending[("profile", "score")] = (
+            "INSERT OR REPLACE INTO profile (key, value) VALUES ('score', ?)", (score,))
+
+    def set_items(self, owned_items, active_items):
+        for item, owned in owned_items.items():
+            self._pending[("inventory", item)] = (
+                "INSERT OR REPLACE INTO inventory (item, owned, active) VALUES (?, ?, ?)",
+                (item, owned, int(bool(active_items.get(item)))))
+
+    def set_achievement(self, achievement_id, unlocked, unlock_time, progress=0):
+        self._pending[("achievements", achievement_id)] = (
+            "INSERT OR REPLACE INTO achievements (id, unlocked, unlock_time, progress) VALUES (?, ?, ?, ?)",
+            (achievement_id, int(unlocked), unlock_time, progress))
+
+    def add_round(self, difficulty, seed, items, reason, elapsed_ms, balls_absorbed, score_delta):
+        """
+        暂存一局的记录
+
+        Args:
+            items: 本局激活的道具 {"item1": bool, ...}
+            reason: 结束原因（"all_balls_absorbed"/"time_survived"/"lose"）
+        """
+        self._pending_rounds.append((
+            time.time(), difficulty, seed, ",".join(name for name, on in sorted(items.items()) if on),
+            reason, elapsed_ms, balls_absorbed, score_delta))
+
+    # ========== 提交 ==========
+    def has_pending(self):
+        return bool(self._pending or self._pending_rounds)
+
+    def commit(self):
+        """把暂存的修改作为一个事务交给后台线程写入"""
+        if not self.has_pending():
+            return
+        statements = list(self._pending.values())
+        rounds = self._pending_rounds
+        self._pending = {}
+        self._pending_rounds = []
+        self._submit(lambda conn: self._write(conn, statements, rounds))
+        self.commits += 1
+
+    def query_async(self, func):
+        """
+        在后台线程中执行查询（排在已提交的事务之后，能读到刚结束的这一局）
+
+        Args:
+            func: func(conn)，可以调用本类带 conn 参数的查询方法
+
+        Returns:
+            concurrent.futures.Future: 查询结果
+        """
+        future = Future()
+
+        def job(conn):
+            try:
+                future.set_result(func(conn))
+            except Exception as e:
+                future.set_exception(e)
+        self._submit(job)
+        return future
+
+    def _submit(self, job):
+        if self._queue is None:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name="profile-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+        self._queue.put(job)
+
+    def flush(self, timeout=5.0):
+        """等待已提交的事务全部写完（最多等待 timeout 秒）"""
+        if self._queue is None:
+            return
+        # 队列按顺序执行，标记任务执行时之前提交的事务都已写完
+        done = threading.Event()
+        self._submit(lambda conn: done.set())
+        if not done.wait(timeout):
+            print(f"等待档案写入超时：{self.path}")
+
+    def close(self):
+        """提交暂存的修改并等待写完（退出前调用）"""
+        self.commit()
+        self.flush()
+
+    def _run(self):
+        try:
+            conn = _connect(self.path)
+        except sqlite3.Error as e:
+            # 连接失败时任务照常取出（查询得到异常），不让 flush 一直等待
+            print(f"打开档案库写入连接失败：{e}")
+            conn = None
+        while True:
+            job = self._queue.get()
+            try:
+                job(conn)
+            except Exception as e:
+                # 一个任务出错不能让后台线程退出，否则之后的事务都不会再写
+                print(f"档案后台任务失败：{e!r}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(conn, statements, rounds):
+        try:
+            with conn:
+                for sql, params in statements:
+                    conn.execute(sql, params)
+                if rounds:
+                    conn.executemany(
+                        "INSERT INTO rounds (played_at, difficulty, seed, items, reason, elapsed_ms, "
+                        "balls_absorbed, score_delta) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rounds)
+                    conn.execute("UPDATE profile SET value = value + ? WHERE key = 'round_count'", (len(rounds),))
+        except sqlite3.Error as e:
+            print(f"保存档案失败：{e}")
+
+
+_store = None
+_store_failed = False
+
+
+def get_profile_store():
+    """
+    全局档案库（第一次调用时打开）
+
+    Returns:
+        ProfileStore or None: 不可用时返回 None
+    """
+    global _store, _store_failed
+    if _store is None and not _store_failed:
+        if sqlite3 is None or not PROFILE_STORE_ENABLED:
+            _store_failed = True
+            return None
+        try:
+            _store = ProfileStore(get_data_path(PROFILE_DB))
+        except sqlite3.Error as e:
+            print(f"打开档案库失败，本次进度不会保存：{e}")
+            _store_failed = True
+    return _store
+
+
+def commit_profile():
+    """提交本局的所有修改（档案库不可用时什么也不做）"""
+    store = get_profile_store()
+    if store is not None:
+        store.commit()
+
+
+def close_profile():
+    """退出前提交并等待写完"""
+    if _store is not None:
+        _store.close()
@@ -0,0 +1,174 @@
+"""
+帧耗时分析模块
+把每一帧拆成若干阶段（等待、事件、GIF、背景、更新、碰撞、界面、精灵绘制、刷新屏幕）计时，
+最近 RING_SIZE 帧保存在预分配的环形缓冲区中，可绘制 p50/p95/p99 浮层，退出时导出 CSV
+
+未开启时所有函数在第一行就返回，几乎没有额外开销
+"""
+import time
+from array import array
+
+import pygame
+
+from font_cache import render_text
+from dirty_rect import mark_dirty
+
+# 帧阶段（顺序即浮层和 CSV 中的列顺序）
+PHASES = ("wait", "events", "gif", "background", "update", "collision", "hud", "sprites", "flip")
+PHASE_LABELS = {
+    "wait": "等待帧",
+    "events": "事件",
+    "gif": "GIF换帧",
+    "background": "背景",
+    "update": "精灵更新",
+    "collision": "碰撞检测",
+    "hud": "界面/提示",
+    "sprites": "精灵绘制",
+    "flip": "刷新屏幕",
+}
+RING_SIZE = 600  # 保留最近多少帧（60FPS 下约 10 秒）
+STATS_INTERVAL = 30  # 浮层统计每隔多少帧重新计算一次
+
+_PHASE_INDEX = {name: i for i, name in enumerate(PHASES)}
+_PHASE_COUNT = len(PHASES)
+
+_enabled = False
+_used = False  # 本次运行中是否开启过（决定退出时是否导出）
+_ring = array("d", [0.0]) * (RING_SIZE * _PHASE_COUNT)  # 每帧各阶段耗时（毫秒）
+_current = array("d", [0.0]) * _PHASE_COUNT
+_zeros = array("d", [0.0]) * _PHASE_COUNT
+_frame_count = 0  # 已记录的总帧数
+_last_mark = 0.0
+_stats = None  # 最近一次计算的分位数统计
+_stats_frame = -1
+_panel_surface = None  # 浮层的半透明底板（尺寸不变时复用）
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    """开启/关闭计时（开启时同时显示浮层）"""
+    global _enabled, _used, _last_mark
+    _enabled = enabled
+    if enabled:
+        _used = True
+        _last_mark = time.perf_counter()
+
+
+def toggle():
+    set_enabled(not _enabled)
+
+
+def begin_frame():
+    """帧开始"""
+    global _last_mark
+    if not _enabled:
+        return
+    _current[:] = _zeros
+    _last_mark = time.perf_counter()
+
+
+def mark(phase):
+    """把上一次 mark 以来的时间计入 phase（同一帧内可多次计入同一阶段）"""
+    global _last_mark
+    if not _enabled:
+        return
+    now = time.perf_counter()
+    _current[_PHASE_INDEX[phase]] += (now - _last_mark) * 1000
+    _last_mark = now
+
+
+def end_frame():
+    """帧结束：把本帧各阶段耗时写入环形缓冲区"""
+    global _frame_count
+    if not _enabled:
+        return
+    base = (_frame_count % RING_SIZE) * _PHASE_COUNT
+    _ring[base:base + _PHASE_COUNT] = _current
+    _frame_count += 1
+
+
+def _frames():
+    """按时间顺序返回缓冲区中各帧的起始下标"""
+    count = min(_frame_count, RING_SIZE)
+    first = _frame_count - count
+    return [((first + i) % RING_SIZE) * _PHASE_COUNT for i in range(count)]
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def get_stats():
+    """
+    计算缓冲区内各阶段及整帧耗时的分位数
+
+    Returns:
+        dict: {阶段: (p50, p95, p99)}，整帧为 "total"
+    """
+    bases = _frames()
+    stats = {}
+    totals = [0.0] * len(bases)
+    for i, phase in enumerate(PHASES):
+        values = [_ring[base + i] for base in bases]
+        for j, value in enumerate(values):
+            totals[j] += value
+        values.sort()
+        stats[phase] = (_percentile(values, 0.5), _percentile(values, 0.95), _percentile(values, 0.99))
+    totals.sort()
+    stats["total"] = (_percentile(totals, 0.5), _percentile(totals, 0.95), _percentile(totals, 0.99))
+    return stats
+
+
+def draw_overlay(screen):
+    """在左下角绘制各阶段 p50/p95/p99 浮层"""
+    global _stats, _stats_frame, _panel_surface
+    if not _enabled:
+        return
+    if _stats is None or _frame_count - _stats_frame >= STATS_INTERVAL:
+        _stats = get_stats()
+        _stats_frame = _frame_count
+
+    # 每行：阶段名 + 三列分位数（毫秒），列位置固定便于对齐
+    rows = [("阶段(ms)", "p50", "p95", "p99")]
+    for phase in PHASES + ("total",):
+        rows.append((PHASE_LABELS.get(phase, "整帧"),) + tuple(f"{v:.2f}" for v in _stats[phase]))
+
+    line_height = 18
+    columns = (8, 110, 170, 230)
+    _, height = screen.get_size()
+    panel = pygame.Rect(5, height - line_height * len(rows) - 15, 290, line_height * len(rows) + 10)
+    if _panel_surface is None or _panel_surface.get_size() != panel.size:
+        _panel_surface = pygame.Surface(panel.size, pygame.SRCALPHA)
+        _panel_surface.fill((0, 0, 0, 160))
+    screen.blit(_panel_surface, panel)
+    for i, row in enumerate(rows):
+        y = panel.y + 5 + i * line_height
+        for x, text in zip(columns, row):
+            screen.blit(render_text(text, 14, (220, 255, 220)), (panel.x + x, y))
+    mark_dirty(panel)
+
+
+def dump_csv(path):
+    """把缓冲区中的逐帧数据导出为 CSV（每行一帧，单位毫秒）"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("frame," + ",".join(PHASES) + ",total\n")
+        first = _frame_count - min(_frame_count, RING_SIZE)
+        for i, base in enumerate(_frames()):
+            values = _ring[base:base + _PHASE_COUNT]
+            f.write(f"{first + i}," + ",".join(f"{v:.3f}" for v in values) + f",{sum(values):.3f}\n")
+
+
+def shutdown(path):
+    """退出时调用：本次运行中开启过计时就导出 CSV"""
+    if not _used or _frame_count == 0:
+        return
+    try:
+        dump_csv(path)
+        print(f"帧耗时数据已导出到 {path}")
+    except OSError as e:
+        print(f"导出帧耗时数据失败：{e}")
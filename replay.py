@@ -0,0 +1,265 @@
+"""
+对局回放模块
+一局游戏 = 随机种子 + 难度 + 激活的道具 + 每个模拟步的主球位置，
+主球位置按与上一步的差值（zigzag + varint）编码，一局通常只有几 KB；
+录制时每步只往内存列表追加一个位置，结束时编码并交给后台线程写文件，不会卡帧
+
+回放可以在游戏窗口中实时/快进播放，也可以无头全速运行（与 game_logic 使用同一套规则），
+用来复现 bug 或作为回归基准
+
+运行：python replay.py 回放文件 [--play] [--speed 4]
+"""
+import argparse
+import functools
+import os
+import struct
+import time
+
+from async_writer import QueuedWriter
+from controllers import ScriptedController
+
+MAGIC = b"BHRP"
+VERSION = 1
+# 魔数, 版本, 种子, 难度, 道具位, 宽, 高, 模拟频率, 步数, 结果
+HEADER = struct.Struct("<4sBQBBHHHIB")
+DIFFICULTIES = ("easy", "normal", "hell")
+ITEMS = ("item1", "item2")
+RESULTS = (None, "all_balls_absorbed", "time_survived", "lose")
+
+
+# ========== 变长整数编码 ==========
+def _write_varint(buf, value):
+    # zigzag：把有符号整数映射成无符号整数，小的负数也只占 1 字节
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), pos
+
+
+class Replay:
+    """一局回放的内容"""
+
+    def __init__(self, seed, difficulty, items, width, height, tick_rate, positions, reason=None):
+        """
+        Args:
+            seed: 随机种子
+            difficulty: 难度
+            items: 激活的道具 {"item1": bool, "item2": bool}
+            width: 场地宽度
+            height: 场地高度
+            tick_rate: 录制时的模拟频率
+            positions: 每个模拟步的主球位置 [(x, y) 或 None, ...]
+            reason: 结束原因（"all_balls_absorbed"/"time_survived"/"lose"，未结束为 None）
+        """
+        self.seed = seed
+        self.difficulty = difficulty
+        self.items = dict(items)
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.positions = positions
+        self.reason = reason
+
+    def encode(self):
+        """编码为二进制"""
+        item_bits = sum(1 << i for i, name in enumerate(ITEMS) if self.items.get(name))
+        buf = bytearray(HEADER.pack(
+            MAGIC, VERSION, self.seed, DIFFICULTIES.index(self.difficulty), item_bits,
+            self.width, self.height, self.tick_rate, len(self.positions), RESULTS.index(self.reason),
+        ))
+        last_x, last_y = 0, 0
+        # 位置按整数像素记录（鼠标输入本来就是整数）
+        for pos in self.positions:
+            # 每步先写 x 差值*2+是否有输入，有输入时再写 y 差值
+            if pos is None:
+                _write_varint(buf, 0)
+                continue
+            x, y = round(pos[0]), round(pos[1])
+            _write_varint(buf, (x - last_x) * 2 + 1)
+            _write_varint(buf, y - last_y)
+            last_x, last_y = x, y
+        return bytes(buf)
+
+    @classmethod
+    def decode(cls, data):
+        """从二进制解码"""
+        (magic, version, seed, difficulty, item_bits,
+         width, height, tick_rate, tick_count, result) = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("不是回放文件")
+        if version != VERSION:
+            raise ValueError(f"不支持的回放版本：{version}")
+        positions = []
+        pos = HEADER.size
+        x, y = 0, 0
+        for _ in range(tick_count):
+            value, pos = _read_varint(data, pos)
+            if not value & 1:
+                positions.append(None)
+                continue
+            dy, pos = _read_varint(data, pos)
+            x += value >> 1
+            y += dy
+            positions.append((x, y))
+        items = {name: bool(item_bits & (1 << i)) for i, name in enumerate(ITEMS)}
+        return cls(seed, DIFFICULTIES[difficulty], items, width, height, tick_rate, positions, RESULTS[result])
+
+
+def load_replay(path):
+    """读取回放文件"""
+    with open(path, "rb") as f:
+        return Replay.decode(f.read())
+
+
+# ========== 录制 ==========
+class ReplayRecorder:
+    """录制一局：record 只是往列表里追加位置，编码和写文件在结束时进行"""
+
+    def __init__(self, seed, difficulty, items, width, height, tick_rate):
+        self.replay = Replay(seed, difficulty, items, width, height, tick_rate, [])
+
+    def record(self, pos):
+        """记录本模拟步的主球位置（None 表示还没有输入）"""
+        self.replay.positions.append(pos)
+
+    def finish(self, reason, path=None, keep=0):
+        """
+        结束录制
+
+        Args:
+            reason: 结束原因
+            path: 保存路径，指定时交给后台线程写出
+            keep: 写出后目录中最多保留的回放数（删除最旧的），0 为不限制
+
+        Returns:
+            Replay: 录制结果
+        """
+        self.replay.reason = reason
+        if path is not None:
+            save_replay_async(path, self.replay.encode(), keep)
+        return self.replay
+
+
+def _prune_replays(written_path, keep):
+    """刚写出 written_path 后，只保留它所在目录中最新的 keep 个回放文件"""
+    directory = os.path.dirname(written_path) or "."
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".bhr")]
+    if len(paths) <= keep:
+        return
+    paths.sort(key=lambda p: (os.path.getmtime(p), p))
+    for old_path in paths[:-keep]:
+        os.remove(old_path)
+
+
+_writer = None
+
+
+def save_replay_async(path, data, keep=0):
+    """
+    把编码好的回放交给后台线程写出
+
+    Args:
+        path: 保存路径
+        data: 编码后的回放
+        keep: 写出后目录中最多保留的回放数（删除最旧的），0 为不限制
+    """
+    global _writer
+    if _writer is None:
+        # 与存档共用后台写入器：先写临时文件再改名，写到一半崩溃也不会留下损坏的回放
+        _writer = QueuedWriter(name="replay-writer")
+    _writer.submit(path, data, functools.partial(_prune_replays, keep=keep) if keep else None)
+
+
+def flush_replays():
+    """等待所有回放写完（退出前调用）"""
+    if _writer is not None:
+        _writer.flush()
+
+
+# ========== 回放 ==========
+class ReplayController(ScriptedController):
+    """按回放中记录的位置驱动主球（回放用完后主球保持原位）"""
+
+    def __init__(self, replay):
+        super().__init__(replay.positions)
+
+    def next_position(self, state):
+        if state.tick >= len(self.positions):
+            return None
+        return self.positions[state.tick]
+
+
+def play_headless(replay):
+    """
+    无头全速回放：在 game_logic 中按回放的种子、道具和主球输入重新跑一局
+
+    Returns:
+        dict: reason/ticks/elapsed_ms/balls_absorbed/matches（与录制时的结果是否一致）
+    """
+    import config
+    import game_logic
+
+    if not config.is_initialized():
+        config.init(headless=True, load_background=False)
+    if config.get_window_size() != (replay.width, replay.height):
+        config.update_window(replay.width, replay.height)
+    game_logic.set_player_controller(ReplayController(replay))
+    try:
+        game_logic.reset_game(replay.difficulty, seed=replay.seed, items=replay.items, record=False)
+        initial_balls = len(game_logic.balls)
+        reason = None
+        while reason is None and game_logic.sim_tick_count < len(replay.positions):
+            _, reason = game_logic.step_simulation()
+    finally:
+        game_logic.set_player_controller(None)
+    return {
+        "reason": reason,
+        "ticks": game_logic.sim_tick_count,
+        "elapsed_ms": game_logic.get_elapsed_time(),
+        "balls_absorbed": initial_balls - len(game_logic.balls),
+        "matches": reason == replay.reason and game_logic.sim_tick_count == len(replay.positions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对局回放")
+    parser.add_argument("path", help="回放文件")
+    parser.add_argument("--play", action="store_true", help="在游戏窗口中播放（默认无头全速校验）")
+    parser.add_argument("--speed", type=float, default=1.0, help="窗口播放倍速")
+    parser.add_argument("--repeat", type=int, default=1, help="无头模式重复次数（作为基准测试）")
+    args = parser.parse_args()
+
+    replay = load_replay(args.path)
+    print(f"种子 {replay.seed}，难度 {replay.difficulty}，道具 {replay.items}，"
+          f"{len(replay.positions)} 步，结果 {replay.reason}，文件 {os.path.getsize(args.path)} 字节")
+
+    if args.play:
+        import main as game_main
+        game_main.main(replay=replay, replay_speed=args.speed)
+        return
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        result = play_headless(replay)
+    elapsed = time.perf_counter() - start
+    print(f"回放结果 {result['reason']}，{result['ticks']} 步，"
+          f"{'与录制一致' if result['matches'] else '与录制不一致！'}")
+    print(f"每次回放 {elapsed / args.repeat * 1000:.1f}ms（实时的 {result['elapsed_ms'] * args.repeat / 1000 / elapsed:.0f} 倍）")
+
+
+if __name__ == "__main__":
+    main()
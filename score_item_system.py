@@ -1,5 +1,7 @@
 import pygame
 from config import get_window_size, SCORE_RULE, ITEM_PRICE  # 新增导入config中的常量
+from font_cache import get_font
+from dirty_rect import mark_dirty
 
 # ========== 提示管理全局变量 ==========
 tip_text = ""  # 提示文本
@@ -11,6 +13,33 @@ TIP_DURATION = 2000  # 提示默认显示2秒
 total_score = 0
 owned_items = {"item1": 0, "item2": 0}
 active_items = {"item1": False, "item2": False}
+_profile_loaded = False  # 是否已从档案库读取（未读取时不写回，避免覆盖存档）
+
+
+# ========== 新增：档案读写 ==========
+def load_profile():
+    """从档案库读取积分和道具（启动时调用）"""
+    global total_score, _profile_loaded
+    from profile_store import get_profile_store
+    store = get_profile_store()
+    if store is None:
+        return
+    profile = store.load_profile()
+    total_score = profile["score"]
+    owned_items.update(profile["owned_items"])
+    active_items.update(profile["active_items"])
+    _profile_loaded = True
+
+
+def _save_profile():
+    # 只暂存到档案库，每局结束时统一提交
+    if not _profile_loaded:
+        return
+    from profile_store import get_profile_store
+    store = get_profile_store()
+    store.set_score(total_score)
+    store.set_items(owned_items, active_items)
+
 
 # ========== 提示操作函数 ==========
 def set_tip(text, color=(255, 255, 255)):
@@ -37,6 +66,7 @@ def buy_item(item_name):
         return False, "积分不足"
     total_score -= ITEM_PRICE[item_name]
     owned_items[item_name] += 1
+    _save_profile()
     tip_msg = f"成功购买{get_item_name(item_name)}！剩余积分：{total_score}"
     set_tip(tip_msg, (0,255,0))
     return True, tip_msg
@@ -48,6 +78,7 @@ def use_item(item_name):
         return False, "道具数量不足"
     owned_items[item_name] -= 1
     active_items[item_name] = True
+    _save_profile()
     tip_msg = f"下一关将生效{get_item_name(item_name)}！"
     set_tip(tip_msg, (255, 215, 0))  # 金色提示
     return True, tip_msg
@@ -62,6 +93,7 @@ def use_all_items():
             active_items[item_name] = True
             has_item = True
     if has_item:
+        _save_profile()
         set_tip("道具生效！下一关自动触发效果", (255,215,0)) #金色提示
         return True
     else:
@@ -73,6 +105,7 @@ def add_score(difficulty):
     global total_score
     if difficulty in SCORE_RULE:
         total_score += SCORE_RULE[difficulty]
+        _save_profile()
         set_tip(f"通关{difficulty}难度，获得{SCORE_RULE[difficulty]}积分！总积分：{total_score}", (0, 255, 0))
         print(f"通关{difficulty}难度，获得{SCORE_RULE[difficulty]}积分，总积分：{total_score}")
 
@@ -84,6 +117,7 @@ def get_total_score():
 def clear_active_items():
     global active_items
     active_items = {"item1": False, "item2": False}
+    _save_profile()
 
 
 def get_owned_items():
@@ -104,22 +138,22 @@ def get_item_name(item_name):
 
 def apply_item_effect_to_hole(hole):
     """应用道具1效果：黑洞半径放大一倍"""
+    from sprites import get_circle_surface
     if active_items["item1"]:
         new_radius = hole.radius * 2  # 放大一倍
         hole.radius = new_radius
-        hole.image = pygame.Surface((new_radius * 2, new_radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(hole.image, (0, 0, 0), (new_radius, new_radius), new_radius)
+        hole.image = get_circle_surface(new_radius, (0, 0, 0))
         hole.rect = hole.image.get_rect(center=hole.rect.center)
 
 
 def apply_item_effect_to_player(player_ball):
     """应用道具2效果：主球半径缩小一半"""
+    from sprites import get_circle_surface
     if active_items["item2"]:
         new_radius = player_ball.radius // 2  # 缩小一半
         new_radius = max(new_radius, 5)  # 最小半径为5
         player_ball.radius = new_radius
-        player_ball.image = pygame.Surface((new_radius * 2, new_radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(player_ball.image, player_ball.color, (new_radius, new_radius), new_radius)
+        player_ball.image = get_circle_surface(new_radius, player_ball.color)
         player_ball.rect = player_ball.image.get_rect(center=player_ball.rect.center)
 
 
@@ -127,11 +161,7 @@ def apply_item_effect_to_player(player_ball):
 def draw_score_item_info(screen):
     """结算界面绘制道具信息（右侧显示）"""
     WIDTH, HEIGHT = get_window_size()
-    try:
-        from config import FONT_PATH
-        font = pygame.font.Font(FONT_PATH, 20)
-    except:
-        font = pygame.font.SysFont("simhei", 20)
+    font = get_font(20)
 
     # 绘制位置：屏幕右侧
     start_x = WIDTH - 220
@@ -142,6 +172,7 @@ def draw_score_item_info(screen):
     title_surface = font.render(title_text, True, (255, 215, 0))  # 金色
     title_rect = title_surface.get_rect(topleft=(start_x, start_y))
     screen.blit(title_surface, title_rect)
+    mark_dirty(title_rect)
 
     # 绘制拥有的道具
     item_y = start_y + 30
@@ -150,6 +181,7 @@ def draw_score_item_info(screen):
         item_surface = font.render(item_text, True, (255, 255, 255))
         item_rect = item_surface.get_rect(topleft=(start_x, item_y))
         screen.blit(item_surface, item_rect)
+        mark_dirty(item_rect)
         item_y += 25
 
     # 绘制生效中的道具
@@ -158,6 +190,7 @@ def draw_score_item_info(screen):
     active_surface = font.render(active_text, True, (0, 255, 0))  # 绿色
     active_rect = active_surface.get_rect(topleft=(start_x, active_y))
     screen.blit(active_surface, active_rect)
+    mark_dirty(active_rect)
 
     active_y += 25
     for item_code, is_active in active_items.items():
@@ -166,4 +199,5 @@ def draw_score_item_info(screen):
             active_item_surface = font.render(active_item_text, True, (0, 255, 0))
             active_item_rect = active_item_surface.get_rect(topleft=(start_x + 10, active_y))
             screen.blit(active_item_surface, active_item_rect)
+            mark_dirty(active_item_rect)
             active_y += 20
\ No newline at end of file
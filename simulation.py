@@ -0,0 +1,371 @@
+"""
+确定性模拟核心模块
+不读取 pygame 时钟和鼠标：随机种子、时钟（模拟步计数）和主球输入都由外部注入，
+与 reset_game / Ball.update / check_* 使用同一套规则；
+相同的种子和输入序列总是得到相同的结果，无头运行时可以远快于实时
+"""
+import random
+
+from config import (
+    DIFFICULTY_CONFIG, MAX_SPEED, SPEED_MULTIPLIER, SIM_TICK_SCALE, SIM_TICK_RATE,
+    SWEPT_COLLISION, TIME_LIMIT, RED, GREEN, BLUE, get_window_size,
+)
+from collision import swept_circles_hit
+from placement import place_points, find_safe_position
+
+# 各难度的彩球/黑洞数量（简单3/普通6/地狱12）
+OBJECT_COUNT = {
+    "easy": 3,
+    "normal": 6,
+    "hell": 12
+}
+PLAYER_RADIUS = 30  # 主球固定大小，所有难度都一样
+BALL_COLORS = [RED, GREEN, BLUE]
+# 一个模拟步内彩球最多移动的距离（精确判断前的包围盒粗筛用）
+MAX_BALL_STEP = MAX_SPEED * SPEED_MULTIPLIER * SIM_TICK_SCALE * 2 ** 0.5
+
+
+# ========== 共享规则 ==========
+def advance_ball(ball, width, height):
+    """
+    彩球前进一个模拟步：移动 + 边界反弹 + 反弹加速 + 限速
+
+    Args:
+        ball: 任何带 x/y/prev_x/prev_y/speed_x/speed_y/radius/bounce_speed_boost 属性的对象
+        width: 场地宽度
+        height: 场地高度
+    """
+    ball.prev_x = ball.x
+    ball.prev_y = ball.y
+    ball.x += ball.speed_x * SPEED_MULTIPLIER * SIM_TICK_SCALE
+    ball.y += ball.speed_y * SPEED_MULTIPLIER * SIM_TICK_SCALE
+
+    # 边界碰撞反弹时加速
+    bounced = False
+    if ball.x - ball.radius <= 0 or ball.x + ball.radius >= width:
+        ball.speed_x *= -1
+        bounced = True
+    if ball.y - ball.radius <= 0 or ball.y + ball.radius >= height:
+        ball.speed_y *= -1
+        bounced = True
+
+    if bounced:
+        ball.speed_x *= ball.bounce_speed_boost
+        ball.speed_y *= ball.bounce_speed_boost
+
+        # 限制最大速度，避免过快
+        if abs(ball.speed_x) > MAX_SPEED:
+            ball.speed_x = MAX_SPEED if ball.speed_x > 0 else -MAX_SPEED
+        if abs(ball.speed_y) > MAX_SPEED:
+            ball.speed_y = MAX_SPEED if ball.speed_y > 0 else -MAX_SPEED
+
+
+def circles_hit(a, b):
+    """
+    两个圆在本模拟步内是否相碰（与 collide_circle 一致；开启连续碰撞检测时按扫掠线段判断）
+
+    Args:
+        a, b: 带 x/y/prev_x/prev_y/radius 属性的对象（静止对象的 prev 与当前位置相同）
+    """
+    radius_sum = a.radius + b.radius
+    if not SWEPT_COLLISION:
+        dx = a.x - b.x
+        dy = a.y - b.y
+        return dx * dx + dy * dy <= radius_sum * radius_sum
+    return swept_circles_hit((a.prev_x, a.prev_y), (a.x, a.y), (b.prev_x, b.prev_y), (b.x, b.y), radius_sum)
+
+
+def find_safe_player_position(width, height, player_radius, ball_positions, hole_positions, rng=random):
+    """
+    寻找安全的主球生成位置，避免开门杀（找不到完全安全的位置时取最安全的候选）
+
+    Args:
+        ball_positions: 彩球列表 [(x, y, 半径), ...]
+        hole_positions: 黑洞列表 [(x, y, 半径), ...]
+    """
+    max_attempts = 200  # 最大尝试次数
+    min_safe_distance = 500  # 最小安全距离（像素）
+
+    # 需要保持至少最小安全距离（彩球），以及黑洞半径+主球半径+额外安全距离（黑洞）
+    obstacles = [(x, y, player_radius + radius + min_safe_distance) for x, y, radius in ball_positions]
+    obstacles.extend((x, y, player_radius + radius + 50) for x, y, radius in hole_positions)
+
+    (player_x, player_y), is_safe = find_safe_position(
+        width, height, player_radius * 2, obstacles, rng=rng, max_attempts=max_attempts
+    )
+    if not is_safe:
+        print(f"警告：经过{max_attempts}次尝试未找到完全安全位置，使用最安全的候选位置")
+    return player_x, player_y
+
+
+def generate_layout(difficulty, width, height, rng=random, active_items=None, ball_count=None):
+    """
+    生成一局的初始布局（reset_game 和 Simulation 共用）
+
+    Args:
+        difficulty: 难度
+        width: 场地宽度
+        height: 场地高度
+        rng: 随机数生成器（random 模块或 random.Random 实例）
+        active_items: 本局激活的道具 {"item1": bool, "item2": bool}
+        ball_count: 自定义彩球数量（压力测试用），默认与黑洞数量相同
+
+    Returns:
+        dict: holes [(x, y, 半径)] / balls [(x, y, 半径, 颜色, speed_x, speed_y)] / player (x, y, 半径)
+            半径均已计入道具效果
+    """
+    cfg = DIFFICULTY_CONFIG[difficulty]
+    active_items = active_items or {}
+    obj_count = OBJECT_COUNT[difficulty]
+
+    # 道具1：黑洞放大（放置按放大一倍计算，apply_item_effect_to_hole 会再放大一倍）
+    hole_radius = cfg["hole_radius"]
+    final_hole_radius = hole_radius
+    if active_items.get("item1", False):
+        hole_radius *= 2
+        final_hole_radius = hole_radius * 2
+
+    # 创建多个黑洞（随机位置，黑洞间距至少3倍半径；尝试次数有上限，放不下时自动放宽）
+    hole_points, hole_report = place_points(
+        obj_count, width, height,
+        margin=hole_radius * 2,
+        min_distance=hole_radius * 3,
+        rng=rng,
+    )
+    if hole_report["relaxed"]:
+        print(f"警告：{hole_report['relaxed']}个黑洞无法满足间距要求，已放宽放置")
+
+    # 彩球位置远离黑洞和边缘
+    hole_clearance = [(x, y, (cfg["ball_radius"] + hole_radius) * 2) for x, y in hole_points]
+    ball_points, ball_report = place_points(
+        obj_count if ball_count is None else ball_count, width, height,
+        margin=cfg["ball_radius"] * 2,
+        obstacles=hole_clearance,
+        rng=rng,
+    )
+    if ball_report["relaxed"]:
+        print(f"警告：{ball_report['relaxed']}个彩球无法避开黑洞，已放宽放置")
+
+    balls = []
+    for ball_x, ball_y in ball_points:
+        color = rng.choice(BALL_COLORS)
+        # 彩球速度适配难度配置
+        speed_x = rng.randint(-cfg["init_speed"], cfg["init_speed"])
+        speed_y = rng.randint(-cfg["init_speed"], cfg["init_speed"])
+        # 避免彩球初始速度为0
+        if speed_x == 0:
+            speed_x = 1 if rng.random() > 0.5 else -1
+        if speed_y == 0:
+            speed_y = 1 if rng.random() > 0.5 else -1
+        balls.append((ball_x, ball_y, cfg["ball_radius"], color, speed_x, speed_y))
+
+    player_x, player_y = find_safe_player_position(
+        width, height, PLAYER_RADIUS,
+        [(x, y, radius) for x, y, radius, _, _, _ in balls],
+        [(x, y, hole_radius) for x, y in hole_points],
+        rng,
+    )
+    # 道具2：主球缩小一半（最小半径为5）
+    player_radius = PLAYER_RADIUS
+    if active_items.get("item2", False):
+        player_radius = max(PLAYER_RADIUS // 2, 5)
+
+    return {
+        "holes": [(x, y, final_hole_radius) for x, y in hole_points],
+        "balls": balls,
+        "player": (player_x, player_y, player_radius),
+    }
+
+
+# ========== 纯数据实体 ==========
+class SimBall:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "speed_x", "speed_y", "radius", "color", "bounce_speed_boost")
+
+    def __init__(self, x, y, radius, color, speed_x, speed_y):
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
+        self.radius = radius
+        self.color = color
+        self.speed_x = speed_x
+        self.speed_y = speed_y
+        self.bounce_speed_boost = 1.2  # 每次反弹加速20%
+
+
+class SimBody:
+    """主球或黑洞"""
+    __slots__ = ("x", "y", "prev_x", "prev_y", "radius")
+
+    def __init__(self, x, y, radius):
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
+        self.radius = radius
+
+
+class Simulation:
+    """
+    一局游戏的确定性模拟
+
+    时钟就是模拟步计数 tick，每步 1000 / SIM_TICK_RATE 毫秒；
+    主球输入在每一步由 step(player_pos) 传入，或由构造时注入的 player_input(sim) 给出，
+    返回 None 表示主球保持原位
+    """
+
+    def __init__(self, difficulty, seed=None, active_items=None, player_input=None,
+                 width=None, height=None, ball_count=None):
+        """
+        Args:
+            difficulty: 难度
+            seed: 随机种子（None 时每次不同）
+            active_items: 本局激活的道具 {"item1": bool, "item2": bool}
+            player_input: 主球输入，可调用对象 player_input(sim) -> (x, y) 或 None
+            width: 场地宽度，默认当前窗口宽度
+            height: 场地高度，默认当前窗口高度
+            ball_count: 自定义彩球数量
+        """
+        default_width, default_height = get_window_size()
+        self.width = width or default_width
+        self.height = height or default_height
+        self.difficulty = difficulty
+        self.seed = seed
+        self.active_items = dict(active_items or {})
+        self.player_input = player_input
+        self.rng = random.Random(seed)
+
+        layout = generate_layout(difficulty, self.width, self.height, self.rng, self.active_items, ball_count)
+        self.holes = [SimBody(x, y, radius) for x, y, radius in layout["holes"]]
+        self.balls = [SimBall(*ball) for ball in layout["balls"]]
+        self.player = SimBody(*layout["player"])
+        self.initial_ball_count = len(self.balls)
+
+        self.tick = 0
+        self.result = None  # None（进行中）/"win"/"lose"
+        self.reason = None  # "all_balls_absorbed"/"time_survived"/"lose"
+        self._tracking = False
+
+    @property
+    def elapsed_ms(self):
+        """已进行的模拟时间（毫秒）"""
+        return self.tick * 1000 // SIM_TICK_RATE
+
+    @property
+    def balls_absorbed(self):
+        return self.initial_ball_count - len(self.balls)
+
+    def move_player(self, pos):
+        """设置主球本步的位置（第一次输入是瞬移，不算作移动轨迹）"""
+        player = self.player
+        player.prev_x, player.prev_y = player.x, player.y
+        if pos is None:
+            return
+        player.x, player.y = pos
+        if not self._tracking:
+            player.prev_x, player.prev_y = player.x, player.y
+            self._tracking = True
+
+    def step(self, player_pos=None):
+        """
+        推进一个模拟步（与 game_logic.step_simulation 顺序一致）
+
+        Args:
+            player_pos: 主球本步的位置，None 时使用注入的 player_input
+
+        Returns:
+            tuple: (结果, 原因)，与 step_simulation 相同
+        """
+        if self.result is not None:
+            return self.result, self.reason
+
+        self.advance_balls()
+        if player_pos is None and self.player_input is not None:
+            player_pos = self.player_input(self)
+        return self.finish_step(player_pos)
+
+    def advance_balls(self):
+        """模拟步的前半段：移动所有彩球（批量控制器在两段之间统一给出主球位置）"""
+        for ball in self.balls:
+            advance_ball(ball, self.width, self.height)
+
+    def finish_step(self, player_pos):
+        """模拟步的后半段：移动主球、检测碰撞、判定胜负"""
+        self.move_player(player_pos)
+        self.tick += 1
+
+        # 检测彩球入洞（彩球和黑洞都会消失），先用包围盒排除远处的彩球
+        step_reach = MAX_BALL_STEP if SWEPT_COLLISION else 0
+        if self.holes and self.balls:
+            absorbed = set()
+            remaining_holes = []
+            for hole in self.holes:
+                hx, hy = hole.x, hole.y
+                hits = [ball for ball in self.balls
+                        if abs(ball.x - hx) <= hole.radius + ball.radius + step_reach
+                        and abs(ball.y - hy) <= hole.radius + ball.radius + step_reach
+                        and id(ball) not in absorbed and circles_hit(hole, ball)]
+                if hits:
+                    absorbed.update(id(ball) for ball in hits)
+                else:
+                    remaining_holes.append(hole)
+            if absorbed:
+                self.holes = remaining_holes
+                self.balls = [ball for ball in self.balls if id(ball) not in absorbed]
+
+        # 检测玩家碰撞小球
+        player = self.player
+        player_reach = player.radius + step_reach + abs(player.x - player.prev_x) + abs(player.y - player.prev_y)
+        for ball in self.balls:
+            if (abs(ball.x - player.x) <= player_reach + ball.radius
+                    and abs(ball.y - player.y) <= player_reach + ball.radius
+                    and circles_hit(player, ball)):
+                self.result, self.reason = "lose", "lose"
+                return self.result, self.reason
+
+        # 所有彩球都被黑洞吸收，或坚持到时间上限
+        if not self.balls:
+            self.result, self.reason = "win", "all_balls_absorbed"
+        elif self.elapsed_ms >= TIME_LIMIT:
+            self.result, self.reason = "win", "time_survived"
+        return self.result, self.reason
+
+    def run(self, max_ticks=None):
+        """
+        一直推进到分出胜负（或达到 max_ticks）
+
+        Returns:
+            dict: result/reason/ticks/elapsed_ms/balls_absorbed
+        """
+        while self.result is None and (max_ticks is None or self.tick < max_ticks):
+            self.step()
+        return self.summary()
+
+    def summary(self):
+        """当前结果摘要"""
+        return {
+            "result": self.result,
+            "reason": self.reason,
+            "ticks": self.tick,
+            "elapsed_ms": self.elapsed_ms,
+            "balls_absorbed": self.balls_absorbed,
+        }
+
+
+def run_batch(sims, controller, max_ticks=None):
+    """
+    用同一个控制器并行推进多局模拟：每一步只调用一次 controller.next_positions
+
+    Args:
+        sims: Simulation 列表
+        controller: controllers.PlayerController
+        max_ticks: 每局最多推进的步数
+
+    Returns:
+        list: 每局的 summary()
+    """
+    active = [sim for sim in sims if sim.result is None]
+    while active:
+        for sim in active:
+            sim.advance_balls()
+        for sim, pos in zip(active, controller.next_positions(active)):
+            sim.finish_step(pos)
+        active = [sim for sim in active
+                  if sim.result is None and (max_ticks is None or sim.tick < max_ticks)]
+    return [sim.summary() for sim in sims]
@@ -1,6 +1,75 @@
 import pygame
 import random
+import config
 from config import *
+from simulation import advance_ball
+
+# ========== 共享贴图：同半径同颜色的精灵共用同一张 Surface ==========
+# 键为 (半径, 颜色, 透明度)，透明度为 None 表示不透明
+_circle_surfaces = {}
+# 键为 (半径, 颜色)，值为一个呼吸周期内每帧的贴图
+_breathing_strips = {}
+
+
+def _compute_breathing_alphas():
+    """预计算一个完整呼吸周期的透明度序列（与逐帧 ±FLASH_SPEED 的效果一致）"""
+    alphas = []
+    alpha, direction = MAX_ALPHA, -1
+    while True:
+        alpha += direction * FLASH_SPEED
+        if alpha <= MIN_ALPHA:
+            alpha = MIN_ALPHA
+            direction = 1
+        if alpha >= MAX_ALPHA:
+            alpha = MAX_ALPHA
+            direction = -1
+        alphas.append(alpha)
+        if alpha == MAX_ALPHA and direction == -1:
+            return alphas
+
+
+BREATHING_ALPHAS = _compute_breathing_alphas()
+
+
+def get_circle_surface(radius, color, alpha=None):
+    """
+    获取共享的圆形贴图（只能 blit，不能修改）
+
+    Args:
+        radius: 半径
+        color: 颜色
+        alpha: 整体透明度，None 表示不透明
+
+    Returns:
+        pygame.Surface: 圆形贴图
+    """
+    key = (radius, tuple(color), alpha)
+    surface = _circle_surfaces.get(key)
+    if surface is None:
+        surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        # 透明度直接画进逐像素 alpha（比逐像素 alpha 再叠加整体 alpha 的 blit 快 2~3 倍）
+        fill = tuple(color[:3]) if alpha is None else (*color[:3], alpha)
+        pygame.draw.circle(surface, fill, (radius, radius), radius)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        _circle_surfaces[key] = surface
+    return surface
+
+
+def get_breathing_strip(radius, color):
+    """获取呼吸闪烁的贴图序列（按 BREATHING_ALPHAS 顺序）"""
+    key = (radius, tuple(color))
+    strip = _breathing_strips.get(key)
+    if strip is None:
+        strip = [get_circle_surface(radius, color, alpha) for alpha in BREATHING_ALPHAS]
+        _breathing_strips[key] = strip
+    return strip
+
+
+def get_breathing_frame():
+    """根据全局时钟计算当前呼吸帧序号（所有彩球同步闪烁）"""
+    return pygame.time.get_ticks() * FPS // 1000
+
 
 # 基础精灵类
 class GameObject(pygame.sprite.Sprite):
@@ -8,8 +77,7 @@ class GameObject(pygame.sprite.Sprite):
         super().__init__()
         self.radius = radius
         self.color = color
-        self.image = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, color, (radius, radius), radius)
+        self.image = get_circle_surface(radius, color)
         self.rect = self.image.get_rect(center=(x, y))
         self.x = x
         self.y = y
@@ -22,49 +90,35 @@ class GameObject(pygame.sprite.Sprite):
 class Ball(GameObject):
     def __init__(self, x, y, radius, color):
         super().__init__(x, y, radius, color)
-        self.alpha = MAX_ALPHA  # 初始最亮
-        self.flash_direction = -1  # 闪烁方向：-1变暗 / 1变亮
+        # 呼吸闪烁贴图序列（同半径同颜色的彩球共用）
+        self.breathing_strip = get_breathing_strip(radius, color)
         self.speed_x = 0
         self.speed_y = 0
+        # 上一个模拟步的位置（渲染插值用）
+        self.prev_x = x
+        self.prev_y = y
         # ========== 新增：反弹加速因子 ==========
         self.bounce_speed_boost = 1.2  # 每次反弹加速20%
+        # NumPy 物理后端：交给 BallArrayEngine 管理后，位置由引擎写回
+        self.engine = None
+        self.engine_index = -1
+
+    def kill(self):
+        if self.engine is not None:
+            self.engine.remove_ball(self)
+        super().kill()
 
     def update(self):
-        # 彩球呼吸闪烁核心逻辑 - 柔和渐变 不晃眼
-        self.alpha += self.flash_direction * FLASH_SPEED
-        if self.alpha <= MIN_ALPHA:
-            self.alpha = MIN_ALPHA
-            self.flash_direction = 1
-        if self.alpha >= MAX_ALPHA:
-            self.alpha = MAX_ALPHA
-            self.flash_direction = -1
-        self.image.set_alpha(self.alpha)
-
-        # 小球移动+边界反弹逻辑
-        self.x += self.speed_x * SPEED_MULTIPLIER
-        self.y += self.speed_y * SPEED_MULTIPLIER
-        width, height = get_window_size()
-
-        # ========== 修改：边界碰撞反弹时加速 ==========
-        bounced = False
-        if self.x - self.radius <= 0 or self.x + self.radius >= width:
-            self.speed_x *= -1
-            bounced = True
-        if self.y - self.radius <= 0 or self.y + self.radius >= height:
-            self.speed_y *= -1
-            bounced = True
-
-        # 如果发生反弹，加速彩球
-        if bounced:
-            self.speed_x *= self.bounce_speed_boost
-            self.speed_y *= self.bounce_speed_boost
-
-            # 限制最大速度，避免过快
-            max_speed = MAX_SPEED
-            if abs(self.speed_x) > max_speed:
-                self.speed_x = max_speed if self.speed_x > 0 else -max_speed
-            if abs(self.speed_y) > max_speed:
-                self.speed_y = max_speed if self.speed_y > 0 else -max_speed
+        # 由 NumPy 物理引擎驱动时，移动和贴图都在引擎中批量完成
+        if self.engine is not None:
+            return
+
+        # 彩球呼吸闪烁核心逻辑 - 柔和渐变 不晃眼（按全局时钟取预计算的贴图）
+        strip = self.breathing_strip
+        self.image = strip[get_breathing_frame() % len(strip)]
+
+        # 小球移动+边界反弹加速逻辑（与确定性模拟核心共用同一规则）
+        advance_ball(self, *get_window_size())
 
         super().update()
 
@@ -73,12 +127,31 @@ class Ball(GameObject):
 class PlayerBall(GameObject):
     def __init__(self, x, y, radius, color):
         super().__init__(x, y, radius, color)
-        self.image.set_alpha(220)  # 半透明优化 视野更好
+        self.image = get_circle_surface(radius, color, 220)  # 半透明优化 视野更好
+        # 上一个模拟步的位置（连续碰撞检测用）
+        self.prev_x = x
+        self.prev_y = y
+        self._tracking = False  # 开局第一次跟随鼠标是瞬移，不算作移动轨迹
+        # 主球控制器（controllers.PlayerController），None 时跟随鼠标
+        self.controller = None
+        self.controller_state = None  # 传给控制器的状态对象
 
     def update(self):
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        self.x = mouse_x
-        self.y = mouse_y
+        self.prev_x = self.x
+        self.prev_y = self.y
+        if self.controller is not None:
+            pos = self.controller.next_position(self.controller_state)
+        elif not config.HEADLESS:
+            pos = pygame.mouse.get_pos()
+        else:
+            # 无头模式下没有鼠标，主球保持原位
+            pos = None
+        if pos is not None:
+            self.x, self.y = pos
+            if not self._tracking:
+                self.prev_x = self.x
+                self.prev_y = self.y
+                self._tracking = True
         super().update()
 
 
@@ -86,4 +159,4 @@ class PlayerBall(GameObject):
 class Hole(GameObject):
     def __init__(self, x, y, radius, color=BLACK):
         super().__init__(x, y, radius, color)
-        pygame.draw.circle(self.image, (20, 20, 20), (radius, radius), radius)
+        self.image = get_circle_surface(radius, (20, 20, 20))
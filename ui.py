@@ -1,16 +1,32 @@
 import pygame
 from config import get_window_size, GRAY, DARK_GRAY, BLACK, FONT_PATH, BLUE, RED, GREEN
+from font_cache import render_text
+from dirty_rect import mark_dirty
 
 
 def draw_text(text, size, color, x, y):
-    try:
-        font = pygame.font.Font(FONT_PATH, size)
-    except:
-        font = pygame.font.SysFont("simhei", size)
-    text_surface = font.render(text, True, color)
+    text_surface = render_text(text, size, color)
     text_rect = text_surface.get_rect(center=(x, y))
     from config import SCREEN
     SCREEN.blit(text_surface, text_rect)
+    mark_dirty(text_rect)
+
+
+# 本界面绘制过的按钮区域（帧节奏控制用来判断悬停状态是否变化）
+_button_rects = {}
+
+
+def get_hovered_button(pos):
+    """返回鼠标所在按钮的区域（不在按钮上返回 None）"""
+    for key in _button_rects:
+        if pygame.Rect(key).collidepoint(pos):
+            return key
+    return None
+
+
+def clear_button_rects():
+    """切换界面时清空记录的按钮区域"""
+    _button_rects.clear()
 
 
 def draw_button(text, x, y, width, height, normal_color, hover_color, action=None, is_clicked=False, text_color=BLACK):
@@ -18,6 +34,7 @@ def draw_button(text, x, y, width, height, normal_color, hover_color, action=Non
     mouse_pos = pygame.mouse.get_pos()
     button_rect = pygame.Rect(x - width // 2, y - height // 2, width, height)
     is_hover = button_rect.collidepoint(mouse_pos)
+    _button_rects[tuple(button_rect)] = True
 
     # 绘制按钮背景 + 圆角美化
     if is_hover:
@@ -26,13 +43,10 @@ def draw_button(text, x, y, width, height, normal_color, hover_color, action=Non
         pygame.draw.rect(SCREEN, normal_color, button_rect, border_radius=6)
 
     # 按钮文字字号适配小按钮，永不溢出
-    try:
-        font = pygame.font.Font(FONT_PATH, 20)
-    except:
-        font = pygame.font.SysFont("simhei", 20)
-    text_surface = font.render(text, True, text_color)
+    text_surface = render_text(text, 20, text_color)
     text_rect = text_surface.get_rect(center=(x, y))
     SCREEN.blit(text_surface, text_rect)
+    mark_dirty(button_rect.union(text_rect))
 
     if is_clicked and is_hover and action:
         return action